@@ -0,0 +1,83 @@
+"""
+关于页面内容
+
+关于页面的章节按版本保存：每次保存都在一个事务里写入一组新版本号的章节，把
+about_version 中的当前版本号指向它，并删除旧版本的章节。读者要么看到提交前的
+完整旧版本，要么看到提交后的完整新版本，不会在保存过程中读到空页面。
+
+章节以不可变元组缓存在进程内，整体替换。请求时最多每
+ABOUT_VERSION_CHECK_INTERVAL 秒按主键查一次当前版本号，只有版本号变化时才重新
+读取章节；本进程保存后立即使用新版本，其他进程在下次检查时切换。
+"""
+
+from collections import namedtuple
+
+from sqlalchemy import delete, insert, select, update
+
+from extensions import db
+from models import AboutSection, AboutVersion
+from page_cache import Reloader
+
+Section = namedtuple('Section', 'title content')
+Snapshot = namedtuple('Snapshot', 'version sections')
+
+POINTER_ID = 1
+
+
+def current_version():
+    return db.session.execute(
+        select(AboutVersion.version).where(AboutVersion.id == POINTER_ID)).scalar() or 0
+
+
+def load_snapshot():
+    # 版本号和章节用一条语句读出，保存恰好在两次查询之间提交时也不会对不上
+    rows = db.session.execute(
+        select(AboutVersion.version, AboutSection.title, AboutSection.content)
+        .outerjoin(AboutSection, AboutSection.version == AboutVersion.version)
+        .where(AboutVersion.id == POINTER_ID)
+        .order_by(AboutSection.order, AboutSection.id)).all()
+    if not rows:
+        return Snapshot(0, ())
+    return Snapshot(rows[0].version, tuple(Section(row.title, row.content or '')
+                                           for row in rows if row.title is not None))
+
+
+def _is_current(snapshot):
+    return current_version() == snapshot.version
+
+
+class AboutSections:
+    def __init__(self, check_interval=1):
+        self._snapshots = Reloader(load_snapshot, check_interval, is_current=_is_current)
+
+    def init_app(self, app):
+        self._snapshots.interval = app.config.get('ABOUT_VERSION_CHECK_INTERVAL', self._snapshots.interval)
+
+    def snapshot(self):
+        return self._snapshots.get()
+
+    def sections(self):
+        """当前版本的章节，没有保存过时为空元组"""
+        return self.snapshot().sections
+
+    def save(self, sections):
+        """sections 为 [{'title': ..., 'content': ...}]，在一个事务里写入新版本并提交，返回版本号"""
+        sections = tuple(Section(item['title'], item.get('content') or '') for item in sections)
+        # 先更新版本号：这一行被写锁住，同时保存的两个请求会依次拿到不同的版本号
+        if not db.session.execute(
+                update(AboutVersion).where(AboutVersion.id == POINTER_ID)
+                .values(version=AboutVersion.version + 1)).rowcount:
+            db.session.add(AboutVersion(id=POINTER_ID, version=1))
+            db.session.flush()
+        version = current_version()
+        if sections:
+            db.session.execute(insert(AboutSection), [
+                {'version': version, 'title': s.title, 'content': s.content, 'order': i}
+                for i, s in enumerate(sections)])
+        db.session.execute(delete(AboutSection).where(AboutSection.version != version))
+        db.session.commit()
+        self._snapshots.set(Snapshot(version, sections))
+        return version
+
+
+about_sections = AboutSections()
@@ -0,0 +1,192 @@
+"""
+用户活动记录
+
+登录、修改资料、发表/编辑文章、浏览文章、AI 问答等操作通过 activity_log.record()
+记录。record() 只把事件放进内存队列，由后台线程按时间间隔或累计数量批量写入
+（一条 INSERT 配合 executemany），不给每个请求增加一次写事务。队列有长度上限，
+数据库长时间不可写时丢弃最旧的事件并计数。进程退出时（atexit）写回剩余事件。
+
+历史记录按 ACTIVITY_RETENTION_DAYS 保留：策略为 rollup 时，过期的明细先按
+(用户, 日期, 操作) 汇总到 activity_daily 再删除；为 delete 时直接删除。
+清理在后台线程中每隔 ACTIVITY_PRUNE_INTERVAL 秒执行一次，也可以运行
+flask prune-activity 手动执行。
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import func, insert, select, text
+
+from extensions import db
+
+# 操作 -> (图标, 翻译键)
+ACTIONS = {
+    'login': ('bi-person-check', 'login_activity'),
+    'profile_update': ('bi-gear', 'profile_updated'),
+    'password_update': ('bi-shield-lock', 'password_updated_activity'),
+    'article_create': ('bi-file-earmark-plus', 'article_created_activity'),
+    'article_update': ('bi-pencil-square', 'article_updated_activity'),
+    'article_view': ('bi-eye', 'article_viewed_activity'),
+    'chat_message': ('bi-chat-dots', 'chat_activity'),
+}
+
+
+class ActivityLog:
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 5.0
+        self.batch_size = 500
+        self.retention_days = 90
+        self.policy = 'rollup'
+        self.prune_interval = 3600
+        self.dropped = 0
+        self.written = 0
+        self._queue = deque(maxlen=10000)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopped = False
+        self._last_prune = time.monotonic()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('ACTIVITY_FLUSH_INTERVAL', self.interval)
+        self.batch_size = app.config.get('ACTIVITY_BATCH_SIZE', self.batch_size)
+        self.retention_days = app.config.get('ACTIVITY_RETENTION_DAYS', self.retention_days)
+        self.policy = app.config.get('ACTIVITY_RETENTION_POLICY', self.policy)
+        self.prune_interval = app.config.get('ACTIVITY_PRUNE_INTERVAL', self.prune_interval)
+        self._queue = deque(self._queue, maxlen=app.config.get('ACTIVITY_QUEUE_SIZE', self._queue.maxlen))
+        app.cli.add_command(prune_activity_command)
+        atexit.register(self.shutdown)
+
+    def record(self, user_id, action, details=None):
+        if not user_id:
+            return
+        event = {'user_id': user_id, 'action': action,
+                 'timestamp': datetime.utcnow(), 'details': details}
+        with self._lock:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(event)
+            pending = len(self._queue)
+        self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_for(self, user_id):
+        with self._lock:
+            return [e for e in self._queue if e['user_id'] == user_id]
+
+    def recent(self, user_id, limit=20):
+        """用户最近的活动，包括还在队列中未写入的事件，按时间倒序"""
+        from models import Activity
+
+        rows = db.session.query(Activity.action, Activity.timestamp, Activity.details)\
+            .filter(Activity.user_id == user_id)\
+            .order_by(Activity.timestamp.desc(), Activity.id.desc())\
+            .limit(limit).all()
+        events = [{'action': r.action, 'timestamp': r.timestamp, 'details': r.details} for r in rows]
+        events.extend(self.pending_for(user_id))
+        events.sort(key=lambda e: e['timestamp'], reverse=True)
+        return events[:limit]
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._queue), 'written': self.written, 'dropped': self.dropped}
+
+    def flush(self):
+        from models import Activity
+
+        written = 0
+        while True:
+            with self._lock:
+                if not self._queue:
+                    break
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        conn.execute(insert(Activity.__table__), batch)
+            except Exception:
+                # 写入失败时把事件放回队首，下次再试
+                with self._lock:
+                    self._queue.extendleft(reversed(batch))
+                raise
+            written += len(batch)
+            with self._lock:
+                self.written += len(batch)
+        return written
+
+    def prune(self, now=None):
+        """按保留策略清理过期的活动明细，返回删除的行数"""
+        from models import Activity
+
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        table = Activity.__table__
+        with db.engine.begin() as conn:
+            if self.policy == 'rollup':
+                day = func.date(table.c.timestamp)
+                rows = conn.execute(
+                    select(table.c.user_id, day.label('day'), table.c.action,
+                           func.count().label('count'))
+                    .where(table.c.timestamp < cutoff)
+                    .group_by(table.c.user_id, day, table.c.action)).all()
+                if rows:
+                    conn.execute(text(
+                        'INSERT INTO activity_daily (user_id, day, action, count) '
+                        'VALUES (:user_id, :day, :action, :count) '
+                        'ON CONFLICT (user_id, day, action) '
+                        'DO UPDATE SET count = activity_daily.count + excluded.count'),
+                        [dict(row._asdict(), day=str(row.day)) for row in rows])
+            result = conn.execute(table.delete().where(table.c.timestamp < cutoff))
+        return result.rowcount
+
+    def shutdown(self):
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        if self.app is not None:
+            self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='activity-log', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopped:
+                break
+            try:
+                self.flush()
+                if self.retention_days and time.monotonic() - self._last_prune >= self.prune_interval:
+                    self._last_prune = time.monotonic()
+                    with self.app.app_context():
+                        self.prune()
+            except Exception:
+                self.app.logger.exception('活动记录写入失败')
+
+
+activity_log = ActivityLog()
+
+
+@click.command('prune-activity')
+def prune_activity_command():
+    """按保留策略清理过期的用户活动记录"""
+    activity_log.flush()
+    deleted = activity_log.prune()
+    click.echo('已清理 %d 条活动记录（策略：%s，保留 %d 天）' % (
+        deleted, activity_log.policy, activity_log.retention_days))
@@ -1,41 +1,148 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session, abort, Response, stream_with_context
 from flask_login import login_user, login_required, logout_user, current_user
 from werkzeug.utils import secure_filename
+from sqlalchemy.orm import defer
 from datetime import datetime
 import os
 import json
+import hashlib
+import hmac
 from about_content import DEFAULT_ABOUT_CONTENT
-from translations import translations
+import i18n
+import db_engine
+from i18n import get_text
 from extensions import db, login_manager
-from models import User, Article, Activity
+from models import User, Article, Activity, Tag, ChatConfig, ChatConversation, ChatMessage
+import search as article_search
+from view_counter import view_counter
+import page_cache
+from pagination import keyset_paginate
+import tagging
+from listings import article_list_query, to_rows
+import chat_providers
+from http_clients import clients as ai_clients
+import chat_stream
+import chat_context
+import chat_sync
+import user_cache
+from passwords import passwords, PasswordBusy
+from activity_log import activity_log, ACTIONS as ACTIVITY_ACTIONS
+import user_stats
+import templating
+from assets import manifest as asset_manifest
+from uploads import store as upload_store, UploadError, avatar_url
+import article_io
+import article_render
+from body_map import body_map, seed_defaults as seed_body_map
+from symptom_ranking import symptom_ranking
+import related_articles
+from about_sections import about_sections
+from metrics import metrics
+from schema_check import pending_migrations
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///tcm.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+# 上传：单个文件大小上限、每个用户的空间和文件数配额、生成缩略图的线程数
+app.config['UPLOAD_MAX_SIZE'] = 5 * 1024 * 1024
+app.config['UPLOAD_QUOTA_BYTES'] = 50 * 1024 * 1024
+app.config['UPLOAD_QUOTA_FILES'] = 100
+app.config['UPLOAD_THUMBNAIL_WORKERS'] = 2
+# 浏览量延迟写入：每隔多少秒或累计多少次浏览批量写回数据库
+app.config['VIEW_FLUSH_INTERVAL'] = 5
+app.config['VIEW_FLUSH_THRESHOLD'] = 500
+# 页面缓存：最多缓存的页面数和有效期（秒）
+app.config['PAGE_CACHE_SIZE'] = 512
+app.config['PAGE_CACHE_TTL'] = 60
+# 模板字节码缓存目录（默认 instance/jinja_cache），以及是否输出 Server-Timing 渲染耗时
+app.config['JINJA_CACHE_DIR'] = None
+app.config['RENDER_TIMING'] = True
+# 登录用户（连同用户组）缓存的条目数和有效期（秒）
+app.config['USER_CACHE_SIZE'] = 2048
+app.config['USER_CACHE_TTL'] = 60
+# 密码哈希算法和参数（werkzeug 格式，如 'scrypt' 或 'pbkdf2:sha256:600000'），
+# 修改后旧哈希会在用户下次登录时自动升级；哈希线程数和排队上限
+app.config['PASSWORD_HASH_METHOD'] = 'scrypt'
+app.config['PASSWORD_HASH_WORKERS'] = 2
+app.config['PASSWORD_HASH_MAX_PENDING'] = 32
+# 登录失败限流：时间窗口（秒）内每个账号、每个 IP 允许的失败次数
+app.config['LOGIN_FAILURE_WINDOW'] = 300
+app.config['LOGIN_FAILURES_PER_ACCOUNT'] = 5
+app.config['LOGIN_FAILURES_PER_IP'] = 20
+# 用户活动记录：批量写入的间隔（秒）和批大小、内存队列上限，
+# 明细保留天数及过期处理策略（rollup 按天汇总后删除，delete 直接删除）
+app.config['ACTIVITY_FLUSH_INTERVAL'] = 5
+app.config['ACTIVITY_BATCH_SIZE'] = 500
+app.config['ACTIVITY_QUEUE_SIZE'] = 10000
+app.config['ACTIVITY_RETENTION_DAYS'] = 90
+app.config['ACTIVITY_RETENTION_POLICY'] = 'rollup'
+# AI 服务连接池：每个接口地址的最大并发连接数、超时（秒）和 429/5xx 重试次数；
+# 最多保留多少个连接池（接口地址和 api_key 的组合），多少秒后关闭重建
+app.config['CHAT_POOL_SIZE'] = 10
+app.config['CHAT_MAX_POOLS'] = 64
+app.config['CHAT_POOL_TTL'] = 600
+app.config['CHAT_CONNECT_TIMEOUT'] = 10
+app.config['CHAT_READ_TIMEOUT'] = 60
+app.config['CHAT_MAX_RETRIES'] = 3
+# 发给模型的上下文：最多几条最近消息、估算的 token 上限、是否为更早的消息生成滚动摘要
+app.config['CHAT_CONTEXT_MESSAGES'] = 20
+app.config['CHAT_CONTEXT_TOKENS'] = 3000
+app.config['CHAT_CONTEXT_SUMMARY'] = True
+# 人体图谱数据的内存快照最长使用多少秒（本进程内的修改提交后立即失效）
+app.config['BODY_MAP_TTL'] = 300
+# 症状检索最多每隔多少秒检查一次数据版本号，其他进程有修改时在后台重建索引
+# （本进程内的文章修改提交后立即写入索引）
+app.config['SYMPTOM_RANKING_CHECK_INTERVAL'] = 5
+# 关于页面最多每隔多少秒检查一次内容版本号（本进程内保存后立即生效）
+app.config['ABOUT_VERSION_CHECK_INTERVAL'] = 1
+# 性能统计：慢查询阈值（毫秒）和保留条数，按比例抽样做 cProfile 的请求（0 为不抽样）及保留条数；
+# 设置 METRICS_TOKEN 后 Prometheus 可用 Authorization: Bearer <token> 抓取 /metrics
+app.config['METRICS_ENABLED'] = True
+app.config['METRICS_SLOW_QUERY_MS'] = 100
+app.config['METRICS_SLOW_QUERY_LOG'] = 200
+app.config['METRICS_PROFILE_RATE'] = 0.0
+app.config['METRICS_PROFILE_LOG'] = 20
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
 
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
 
+# 数据库地址和连接参数取自环境变量 DATABASE_URL 等，见 db_engine.py
+db_engine.configure(app)
 db.init_app(app)
+metrics.init_app(app)
 login_manager.init_app(app)
 login_manager.login_view = 'login'
-
-def get_text(key, lang=None):
-    if not lang:
-        lang = session.get('lang', 'zh')
-    return translations.get(lang, {}).get(key, key)
-
-app.jinja_env.globals.update(get_text=get_text)
+article_search.init_app(app)
+view_counter.init_app(app)
+page_cache.init_app(app)
+tagging.init_app(app)
+ai_clients.init_app(app)
+user_cache.init_app(app)
+passwords.init_app(app)
+activity_log.init_app(app)
+user_stats.init_app(app)
+templating.init_app(app)
+i18n.init_app(app)
+asset_manifest.init_app(app)
+upload_store.init_app(app)
+article_io.init_app(app)
+article_render.init_app(app)
+body_map.init_app(app)
+symptom_ranking.init_app(app)
+related_articles.init_app(app)
+about_sections.init_app(app)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.load_user(user_id)
 
 @app.route('/')
+@page_cache.cached_page('articles')
 def index():
-    articles = Article.query.filter_by(published=True).order_by(Article.created_at.desc()).limit(5).all()
+    articles = to_rows(article_list_query().filter(Article.published == True)
+                       .order_by(Article.created_at.desc(), Article.id.desc()).limit(5))
     return render_template('index.html', articles=articles)
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -46,16 +153,36 @@ def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
+        ip = request.remote_addr
+        
+        if passwords.throttled(username, ip):
+            flash('登录失败次数过多，请稍后再试', 'error')
+            return render_template('login.html'), 429
+        
         user = User.query.filter_by(username=username).first()
+        try:
+            valid = user is not None and user.check_password(password)
+        except PasswordBusy as e:
+            flash(str(e), 'error')
+            return render_template('login.html'), 503
         
-        if user and user.check_password(password):
+        if valid:
+            passwords.login_succeeded(username)
+            # 哈希参数调整后，登录成功时用新参数重新计算；线程池繁忙时留到下次登录
+            if passwords.needs_rehash(user.password_hash):
+                try:
+                    user.set_password(password)
+                except PasswordBusy:
+                    pass
             login_user(user)
             user.last_login = datetime.utcnow()
             db.session.commit()
+            activity_log.record(user.id, 'login')
             flash('登录成功！', 'success')
             next_page = request.args.get('next')
             return redirect(next_page or url_for('index'))
         else:
+            passwords.login_failed(username, ip)
             flash('用户名或密码错误', 'error')
     
     return render_template('login.html')
@@ -68,7 +195,7 @@ def logout():
 
 @app.route('/about')
 def about():
-    sections = AboutSection.query.order_by(AboutSection.order).all()
+    sections = about_sections.sections()
     if not sections:
         return render_template('about.html', about_content=DEFAULT_ABOUT_CONTENT)
     return render_template('about.html', about_content=sections)
@@ -80,7 +207,7 @@ def manage_about():
         flash('您没有权限访问此页面')
         return redirect(url_for('index'))
     
-    sections = AboutSection.query.order_by(AboutSection.order).all()
+    sections = about_sections.sections()
     if not sections:
         sections = DEFAULT_ABOUT_CONTENT
     return render_template('manage_about.html', about_content=sections)
@@ -95,27 +222,18 @@ def save_about():
         data = request.get_json()
         sections = data.get('sections', [])
         
-        # 删除所有现有章节
-        AboutSection.query.delete()
-        
-        # 添加新章节
-        for i, section in enumerate(sections):
-            new_section = AboutSection(
-                title=section['title'],
-                content=section['content'],
-                order=i
-            )
-            db.session.add(new_section)
-        
-        db.session.commit()
+        # 新版本的章节和版本号在同一个事务里写入，访问者不会看到保存到一半的内容
+        about_sections.save(sections)
         return jsonify({'success': True})
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
 
 @app.route('/chat')
 @login_required
 def chat():
-    return render_template('chat.html')
+    chat_config = chat_providers.get_settings(current_user.id)
+    return render_template('chat.html', chat_config=chat_config)
 
 @app.route('/api/chat/config', methods=['POST'])
 @login_required
@@ -135,6 +253,7 @@ def update_chat_config():
         config.model_list = json.dumps(data.get('model_list', []))
         
         db.session.commit()
+        chat_providers.invalidate_settings(current_user.id)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -142,18 +261,28 @@ def update_chat_config():
 @app.route('/api/chat/conversations', methods=['GET'])
 @login_required
 def get_conversations():
+    """对话列表：不带参数返回第一页，cursor 翻页，since 传上次的 sync_token 只取变化的部分"""
     try:
-        conversations = ChatConversation.query.filter_by(user_id=current_user.id)\
-            .order_by(ChatConversation.updated_at.desc()).all()
-        return jsonify({
-            'success': True,
-            'conversations': [{
-                'id': conv.id,
-                'title': conv.title,
-                'created_at': conv.created_at.isoformat(),
-                'updated_at': conv.updated_at.isoformat()
-            } for conv in conversations]
-        })
+        since = request.args.get('since')
+        cursor = request.args.get('cursor')
+        limit = max(1, min(request.args.get('limit', chat_sync.PAGE_SIZE, type=int), chat_sync.DELTA_LIMIT))
+        
+        # 列表版本没变时直接返回 304
+        etag = hashlib.sha1(('%s|%s|%s|%s' % (
+            chat_sync.list_version(current_user.id), since, cursor, limit)).encode()).hexdigest()
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        
+        if since:
+            result = chat_sync.changes_since(current_user.id, since, limit)
+        else:
+            result = chat_sync.list_page(current_user.id, cursor, limit)
+        response = jsonify(dict(result, success=True))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
@@ -171,12 +300,7 @@ def create_conversation():
         
         return jsonify({
             'success': True,
-            'conversation': {
-                'id': conversation.id,
-                'title': conversation.title,
-                'created_at': conversation.created_at.isoformat(),
-                'updated_at': conversation.updated_at.isoformat()
-            }
+            'conversation': conversation.to_dict()
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -189,54 +313,93 @@ def delete_conversation(id):
         if conversation.user_id != current_user.id:
             return jsonify({'success': False, 'message': '无权删除此对话'})
         
+        chat_sync.record_deletion(conversation)
         db.session.delete(conversation)
         db.session.commit()
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/chat/history/<int:id>')
+@login_required
+def get_chat_history(id):
+    conversation = ChatConversation.query.get_or_404(id)
+    if conversation.user_id != current_user.id:
+        return jsonify({'success': False, 'message': '无权访问此对话'})
+    
+    limit = max(1, min(request.args.get('limit', 30, type=int), 100))
+    page = chat_context.history_page(conversation.id, before=request.args.get('before'), limit=limit)
+    return jsonify({
+        'success': True,
+        # 页内按时间正序，方便前端直接追加；before 游标用于加载更早的消息
+        'messages': [m.to_dict() for m in reversed(page.items)],
+        'before': page.next_cursor,
+        'has_more': page.has_next
+    })
+
+def _chat_request():
+    """校验聊天请求，返回 (对话, 提供方, 用户消息, 错误信息)"""
+    data = request.get_json() or {}
+    conversation_id = data.get('conversation_id')
+    content = data.get('content') or data.get('message')
+    
+    if not conversation_id or not content:
+        return None, None, None, '缺少必要参数'
+    
+    conversation = ChatConversation.query.get_or_404(conversation_id)
+    if conversation.user_id != current_user.id:
+        return None, None, None, '无权访问此对话'
+    
+    # 获取用户的API配置
+    config = chat_providers.get_settings(current_user.id)
+    if not config or (chat_providers.requires_api_key(config) and not config.api_key):
+        return None, None, None, '请先配置API设置'
+    try:
+        provider = chat_providers.get_provider(config)
+    except chat_providers.ProviderError as e:
+        return None, None, None, str(e)
+    return conversation, provider, content, None
+
+def _save_user_message(conversation, content):
+    db.session.add(ChatMessage(
+        conversation_id=conversation.id,
+        role='user',
+        content=content
+    ))
+    conversation.updated_at = datetime.utcnow()
+    db.session.commit()
+    activity_log.record(conversation.user_id, 'chat_message')
+    return chat_context.build_context(
+        conversation,
+        max_messages=app.config['CHAT_CONTEXT_MESSAGES'],
+        token_budget=app.config['CHAT_CONTEXT_TOKENS'],
+        summarize=app.config['CHAT_CONTEXT_SUMMARY'])
+
+def _save_ai_message(conversation_id, content):
+    if not content:
+        return None
+    message = ChatMessage(
+        conversation_id=conversation_id,
+        role='assistant',
+        content=content
+    )
+    db.session.add(message)
+    ChatConversation.query.filter_by(id=conversation_id)\
+        .update({'updated_at': datetime.utcnow()})
+    db.session.commit()
+    return message.id
+
 @app.route('/api/chat/message', methods=['POST'])
 @login_required
 def send_message():
     try:
-        data = request.get_json()
-        conversation_id = data.get('conversation_id')
-        content = data.get('content')
+        conversation, provider, content, error = _chat_request()
+        if error:
+            return jsonify({'success': False, 'message': error})
         
-        if not conversation_id or not content:
-            return jsonify({'success': False, 'message': '缺少必要参数'})
-        
-        conversation = ChatConversation.query.get_or_404(conversation_id)
-        if conversation.user_id != current_user.id:
-            return jsonify({'success': False, 'message': '无权访问此对话'})
-        
-        # 保存用户消息
-        user_message = ChatMessage(
-            conversation_id=conversation_id,
-            role='user',
-            content=content
-        )
-        db.session.add(user_message)
-        
-        # 获取用户的API配置
-        config = ChatConfig.query.filter_by(user_id=current_user.id).first()
-        if not config or not config.api_key:
-            return jsonify({'success': False, 'message': '请先配置API设置'})
-        
-        # TODO: 实现与AI API的交互
-        ai_response = "这是一个示例回复。实际使用时需要实现与AI API的交互。"
-        
-        # 保存AI回复
-        ai_message = ChatMessage(
-            conversation_id=conversation_id,
-            role='assistant',
-            content=ai_response
-        )
-        db.session.add(ai_message)
-        
-        # 更新对话时间
-        conversation.updated_at = datetime.utcnow()
-        db.session.commit()
+        history = _save_user_message(conversation, content)
+        ai_response = provider.complete(history)
+        _save_ai_message(conversation.id, ai_response)
         
         return jsonify({
             'success': True,
@@ -248,36 +411,79 @@ def send_message():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/chat/stream', methods=['POST'])
+@login_required
+def stream_message():
+    conversation, provider, content, error = _chat_request()
+    if error:
+        return jsonify({'success': False, 'message': error})
+    
+    history = _save_user_message(conversation, content)
+    conversation_id = conversation.id
+    stream_id, cancelled = chat_stream.register(current_user.id)
+    
+    def finish(reply, status):
+        try:
+            return _save_ai_message(conversation_id, reply)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('保存AI回复失败')
+            return None
+    
+    response = Response(
+        stream_with_context(chat_stream.relay(provider, history, stream_id, cancelled, finish)),
+        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/chat/stream/<stream_id>/cancel', methods=['POST'])
+@login_required
+def cancel_stream(stream_id):
+    return jsonify({'success': chat_stream.cancel(stream_id, current_user.id)})
+
 @app.route('/account')
 @login_required
 def account():
-    # 获取用户活动记录
-    activities = [
-        {
-            'icon': 'bi-person-check',
-            'text': get_text('login_activity'),
-            'time': datetime.now().strftime('%Y-%m-%d %H:%M')
-        },
-        {
-            'icon': 'bi-gear',
-            'text': get_text('profile_updated'),
-            'time': datetime.now().strftime('%Y-%m-%d %H:%M')
-        }
-    ]
+    # 获取用户活动记录；浏览文章的记录只存了文章 id，用一次查询换成标题
+    events = activity_log.recent(current_user.id)
+    viewed = {int(event['details']) for event in events
+              if event['action'] == 'article_view' and (event['details'] or '').isdigit()}
+    titles = {}
+    if viewed:
+        titles = {str(row.id): row.title for row in
+                  db.session.query(Article.id, Article.title).filter(Article.id.in_(viewed))}
+    activities = []
+    for event in events:
+        icon, label = ACTIVITY_ACTIONS.get(event['action'], ('bi-clock-history', event['action']))
+        text = get_text(label)
+        details = event['details']
+        if event['action'] == 'article_view':
+            details = titles.get(details, details)
+        if details:
+            text += '：' + details
+        activities.append({
+            'icon': icon,
+            'text': text,
+            'time': event['timestamp'].strftime('%Y-%m-%d %H:%M')
+        })
     
-    # 获取用户文章
-    articles = [
-        {
-            'id': 1,
-            'title': '示例文章',
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'views': 100
-        }
-    ]
+    # 统计数字取自 user_stats 汇总行，最近文章走 (author_id, created_at, id) 索引
+    stats = user_stats.get_stats(current_user.id)
+    recent = db.session.query(Article.id, Article.title, Article.created_at, Article.views)\
+        .filter(Article.author_id == current_user.id)\
+        .order_by(Article.created_at.desc(), Article.id.desc()).limit(10)
+    articles = [{
+        'id': row.id,
+        'title': row.title,
+        'date': row.created_at.strftime('%Y-%m-%d'),
+        'views': (row.views or 0) + view_counter.pending(row.id)
+    } for row in recent]
     
     return render_template('account.html', 
                          activities=activities,
                          articles=articles,
+                         stats=stats,
                          title=get_text('account_settings'))
 
 @app.route('/update_profile', methods=['POST'])
@@ -287,6 +493,7 @@ def update_profile():
         current_user.email = request.form.get('email')
         current_user.bio = request.form.get('bio')
         db.session.commit()
+        activity_log.record(current_user.id, 'profile_update')
         flash(get_text('profile_update_success'), 'success')
     return redirect(url_for('account'))
 
@@ -298,14 +505,23 @@ def update_password():
         new_password = request.form.get('newPassword')
         confirm_password = request.form.get('confirmPassword')
         
-        if not current_user.check_password(current_password):
-            flash(get_text('wrong_password'), 'error')
-        elif new_password != confirm_password:
-            flash(get_text('password_mismatch'), 'error')
-        else:
-            current_user.set_password(new_password)
-            db.session.commit()
-            flash(get_text('password_update_success'), 'success')
+        if passwords.throttled(current_user.username, request.remote_addr):
+            flash('登录失败次数过多，请稍后再试', 'error')
+            return redirect(url_for('account'))
+        
+        try:
+            if not current_user.check_password(current_password):
+                passwords.login_failed(current_user.username, request.remote_addr)
+                flash(get_text('wrong_password'), 'error')
+            elif new_password != confirm_password:
+                flash(get_text('password_mismatch'), 'error')
+            else:
+                current_user.set_password(new_password)
+                db.session.commit()
+                activity_log.record(current_user.id, 'password_update')
+                flash(get_text('password_update_success'), 'success')
+        except PasswordBusy as e:
+            flash(str(e), 'error')
     return redirect(url_for('account'))
 
 @app.route('/update_notifications', methods=['POST'])
@@ -318,33 +534,61 @@ def update_notifications():
     return redirect(url_for('account'))
 
 @app.route('/knowledge')
+@page_cache.cached_page('articles')
 def knowledge():
-    page = request.args.get('page', 1, type=int)
     category = request.args.get('category')
     tag = request.args.get('tag')
-    
-    query = Article.query.filter_by(published=True)
-    
-    if category:
-        query = query.filter_by(category=category)
-    if tag:
-        query = query.filter(Article.tags.contains(tag))
-        
-    articles = query.order_by(Article.created_at.desc()).paginate(
-        page=page, per_page=10, error_out=False)
+    articles = _published_articles(category, tag)
         
     return render_template('knowledge.html',
                          articles=articles,
                          category=category,
                          tag=tag,
+                         popular_tags=tagging.popular_tags(),
                          title=get_text('knowledge_base'))
 
+@app.route('/api/articles')
+def api_articles():
+    articles = _published_articles(request.args.get('category'), request.args.get('tag'))
+    return jsonify({'success': True, **articles.to_dict(lambda row: row.to_dict())})
+
+def _published_articles(category=None, tag=None, per_page=10):
+    query = article_list_query().filter(Article.published == True)
+    total = None
+    
+    if category:
+        query = query.filter(Article.category == category)
+    if tag:
+        tag_obj = tagging.find_tag(tag)
+        if tag_obj is None:
+            query = query.filter(db.false())
+            total = 0
+        else:
+            query = tagging.filter_by_tag(query, tag_obj)
+            if not category:
+                total = tagging.tag_article_count(tag_obj)
+        
+    return keyset_paginate(query, Article,
+                           after=request.args.get('after'),
+                           before=request.args.get('before'),
+                           per_page=per_page,
+                           count_key=('knowledge', category, tag),
+                           total=total,
+                           row_factory=to_rows)
+
 @app.route('/article/<int:id>')
 def article(id):
-    article = Article.query.get_or_404(id)
-    article.views += 1
-    db.session.commit()
-    return render_template('article.html', article=article)
+    def render():
+        # 页面使用保存时生成的 content_html，不需要读取原始正文
+        article = Article.query.options(defer(Article.content)).get_or_404(id)
+        return render_template('article.html', article=article,
+                               related=related_articles.get_related(id))
+
+    response = page_cache.cached_response(render, tags=('article:%d' % id,))
+    view_counter.increment(id)
+    if current_user.is_authenticated:
+        activity_log.record(current_user.id, 'article_view', str(id))
+    return response
 
 @app.route('/article/new', methods=['GET', 'POST'])
 @login_required
@@ -355,11 +599,12 @@ def new_article():
             content=request.form['content'],
             summary=request.form['summary'],
             category=request.form['category'],
-            tags=request.form['tags'],
             author=current_user
         )
+        tagging.set_article_tags(article, request.form.get('tags', ''))
         db.session.add(article)
         db.session.commit()
+        activity_log.record(current_user.id, 'article_create', article.title)
         flash(get_text('article_created'), 'success')
         return redirect(url_for('article', id=article.id))
     return render_template('edit_article.html', title=get_text('new_article'))
@@ -376,8 +621,10 @@ def edit_article(id):
         article.content = request.form['content']
         article.summary = request.form['summary']
         article.category = request.form['category']
-        article.tags = request.form['tags']
+        if 'tags' in request.form:
+            tagging.set_article_tags(article, request.form['tags'])
         db.session.commit()
+        activity_log.record(current_user.id, 'article_update', article.title)
         flash(get_text('article_updated'), 'success')
         return redirect(url_for('article', id=article.id))
         
@@ -391,6 +638,7 @@ def edit_article_new(id):
         article.title = request.form['title']
         article.content = request.form['content']
         db.session.commit()
+        activity_log.record(current_user.id, 'article_update', article.title)
         return redirect(url_for('articles'))
     return render_template('edit_article.html', article=article)
 
@@ -401,13 +649,22 @@ def admin():
         abort(403)
     return render_template('admin/index.html', title=get_text('admin_panel'))
 
+@app.route('/api/admin/view_counter')
+@login_required
+def view_counter_stats():
+    if not current_user.is_admin:
+        abort(403)
+    return jsonify({'success': True, **view_counter.stats()})
+
 @app.route('/admin/users')
 @login_required
 def admin_users():
     if not current_user.is_admin:
         abort(403)
-    page = request.args.get('page', 1, type=int)
-    users = User.query.paginate(page=page, per_page=20, error_out=False)
+    users = keyset_paginate(User.query, User,
+                            after=request.args.get('after'),
+                            before=request.args.get('before'),
+                            count_key=('admin_users',))
     return render_template('admin/users.html', users=users, title=get_text('user_management'))
 
 @app.route('/admin/articles')
@@ -415,18 +672,144 @@ def admin_users():
 def admin_articles():
     if not current_user.is_admin:
         abort(403)
-    page = request.args.get('page', 1, type=int)
-    articles = Article.query.paginate(page=page, per_page=20, error_out=False)
+    articles = keyset_paginate(article_list_query(), Article,
+                               after=request.args.get('after'),
+                               before=request.args.get('before'),
+                               count_key=('admin_articles',),
+                               row_factory=to_rows)
     return render_template('admin/articles.html', articles=articles, title=get_text('article_management'))
 
+@app.route('/admin/metrics')
+@login_required
+def admin_metrics():
+    if not current_user.is_admin:
+        abort(403)
+    return render_template('admin/metrics.html', metrics=metrics.snapshot(),
+                           title=get_text('performance_metrics'))
+
+@app.route('/admin/metrics/reset', methods=['POST'])
+@login_required
+def admin_metrics_reset():
+    if not current_user.is_admin:
+        abort(403)
+    metrics.reset()
+    return redirect(url_for('admin_metrics'))
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus 文本格式的性能统计，管理员或持有 METRICS_TOKEN 的抓取方可以访问"""
+    token = app.config.get('METRICS_TOKEN')
+    authorized = token and hmac.compare_digest(request.headers.get('Authorization', ''), 'Bearer ' + token)
+    if not authorized and not (current_user.is_authenticated and current_user.is_admin):
+        abort(403)
+    return Response(metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/body-map')
+def body_map_index():
+    """图谱总览：全部脏腑/部位、经络、症状和穴位的名称"""
+    return body_map.response()
+
+@app.route('/api/body-map/rank')
+def body_map_rank():
+    """按选中的症状（?symptom=耳鸣&symptom=眩晕）排序相关文章和穴位"""
+    symptoms = [name.strip() for name in request.args.getlist('symptom') if name.strip()]
+    limit = request.args.get('limit', 10, type=int)
+    return jsonify({'success': True, **symptom_ranking.rank(symptoms, limit)})
+
+@app.route('/api/body-map/<kind>/<name>')
+def body_map_detail(kind, name):
+    """kind 为 organs、symptoms 或 acupoints；脏腑的症状、经络和穴位一并返回"""
+    response = body_map.response(kind, name)
+    if response is None:
+        abort(404)
+    return response
+
+@app.route('/api/tags')
+def get_tags():
+    return jsonify(tagging.tag_tree())
+
+def _tag_response(action):
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': '您没有权限执行此操作'})
+    try:
+        action()
+        db.session.commit()
+        return jsonify({'success': True})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
+def _primary_tag(name):
+    tag = Tag.query.filter_by(name=name, parent_id=None).first()
+    if tag is None:
+        abort(404)
+    return tag
+
+def _secondary_tag(primary, name):
+    tag = Tag.query.filter_by(name=name, parent_id=_primary_tag(primary).id).first()
+    if tag is None:
+        abort(404)
+    return tag
+
+@app.route('/api/tags/primary', methods=['POST'])
+@login_required
+def create_primary_tag():
+    data = request.get_json()
+    return _tag_response(lambda: tagging.create_tag(data.get('tag')))
+
+@app.route('/api/tags/secondary', methods=['POST'])
+@login_required
+def create_secondary_tag():
+    data = request.get_json()
+    return _tag_response(lambda: tagging.create_tag(
+        data.get('secondaryTag'), parent=_primary_tag(data.get('primaryTag'))))
+
+@app.route('/api/tags/primary/<tag>', methods=['PUT', 'DELETE'])
+@login_required
+def update_primary_tag(tag):
+    if request.method == 'DELETE':
+        return _tag_response(lambda: tagging.delete_tag(_primary_tag(tag)))
+    data = request.get_json()
+    return _tag_response(lambda: tagging.rename_tag(_primary_tag(tag), data.get('newTag')))
+
+@app.route('/api/tags/secondary/<primary>/<tag>', methods=['PUT', 'DELETE'])
+@login_required
+def update_secondary_tag(primary, tag):
+    if request.method == 'DELETE':
+        return _tag_response(lambda: tagging.delete_tag(_secondary_tag(primary, tag)))
+    data = request.get_json()
+    return _tag_response(lambda: tagging.rename_tag(_secondary_tag(primary, tag), data.get('newTag')))
+
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
     return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
 
+@app.route('/media/<sha256>')
+@app.route('/media/<sha256>/<variant>')
+def upload_file(sha256, variant=None):
+    return upload_store.send(sha256, variant)
+
+@app.route('/api/profile/avatar', methods=['POST'])
+@login_required
+def update_avatar():
+    file = request.files.get('avatar')
+    if file is None:
+        return jsonify({'success': False, 'message': '请选择图片'})
+    try:
+        blob = upload_store.save(current_user.id, file, 'avatar')
+        current_user.avatar = blob.sha256
+        db.session.commit()
+    except UploadError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+    activity_log.record(current_user.id, 'profile_update')
+    return jsonify({'success': True, 'avatarUrl': avatar_url(current_user)})
+
 @app.route('/articles')
 @login_required
 def articles():
-    articles = Article.query.all()
+    articles = db.session.query(Article.id, Article.title)\
+        .order_by(Article.created_at.desc(), Article.id.desc()).all()
     return render_template('articles.html', articles=articles)
 
 # 语言切换路由
@@ -443,13 +826,25 @@ def search():
     if not query:
         return redirect(url_for('index'))
     
-    # 在这里实现搜索逻辑
-    # 例如：搜索知识库、文章等
-    search_results = []  # 这里添加实际的搜索逻辑
+    page = request.args.get('page', 1, type=int)
+    articles, total = article_search.search_articles(query, page=page)
+    search_results = [{
+        'url': url_for('article', id=a.id),
+        'title': article_search.highlight(a.title, query),
+        'excerpt': article_search.highlight(
+            a.summary or article_search.strip_html(a.content), query, length=160),
+        'icon': 'bi-journal-text',
+        'type': a.category or get_text('uncategorized'),
+        'date': a.created_at.strftime('%Y-%m-%d')
+    } for a in articles]
+    pages = (total + article_search.PER_PAGE - 1) // article_search.PER_PAGE
     
     return render_template('search.html', 
                          query=query, 
-                         results=search_results)
+                         results=search_results,
+                         total=total,
+                         page=page,
+                         pages=pages)
 
 @app.context_processor
 def utility_processor():
@@ -457,7 +852,15 @@ def utility_processor():
 
 def init_db():
     with app.app_context():
+        # 旧版数据库缺少后来加入的列，要先按顺序运行迁移脚本（见 README“数据库升级”），
+        # 否则首页等页面会出错；此时不建表也不写入默认数据，留给迁移脚本处理
+        pending = pending_migrations(db.engine)
+        if pending:
+            app.logger.error('数据库结构是旧版本，请按顺序运行以下迁移后再启动：%s',
+                             ' '.join('python migrations/' + script for script in pending))
+            return
         db.create_all()
+        article_search.ensure_index()
         
         # 检查是否已存在管理员用户
         admin_user = User.query.filter_by(username='admin').first()
@@ -472,6 +875,8 @@ def init_db():
             db.session.add(admin)
             db.session.commit()
 
+        seed_body_map()
+
 if __name__ == '__main__':
     init_db()
     app.run(debug=True)
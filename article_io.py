@@ -0,0 +1,359 @@
+"""
+文章批量导入导出
+
+    flask export-articles articles.jsonl
+    flask import-articles articles.csv --author admin
+
+格式按扩展名（.jsonl / .csv）判断，文件名为 - 时读写标准输入输出，需用 --format
+指定格式。每条记录的字段见 FIELDS；JSONL 中 tags 为列表，CSV 中为逗号分隔的字符串。
+
+导入时逐行读取，每 --batch-size 条在一个事务里处理：一次查询取出这批记录的作者
+（按用户名）、已有文章（有 slug 的按 slug 匹配，否则按 id）和标签，缺少的标签
+一并新建；已有文章更新，其余新建，新建的文章在 flush 时合并为多行 INSERT。
+全文索引、标签计数和用户统计由各自的会话事件在同一事务里增量更新，页面缓存在
+提交后失效。相关阅读逐批增量计算太慢，导入时关闭，import-articles 在全部导入后
+做一次全量计算。每批提交后清空会话，导出也按 id 分批读取逐行写出，内存占用与文章
+总数无关。
+"""
+
+import csv
+import json
+import sys
+from datetime import datetime, timezone
+
+import click
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+import related_articles
+import tagging
+from extensions import db
+from models import Article, User
+
+FIELDS = ('slug', 'id', 'title', 'summary', 'content', 'category', 'tags', 'published',
+          'author', 'views', 'created_at', 'updated_at')
+FORMATS = ('jsonl', 'csv')
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+BATCH_SIZE = 500
+
+_TRUE = {'1', 'true', 'yes', 'y', 't'}
+_FALSE = {'0', 'false', 'no', 'n', 'f'}
+
+
+class RecordError(ValueError):
+    pass
+
+
+def detect_format(filename, fmt=None):
+    if fmt:
+        return fmt
+    for name in FORMATS:
+        if filename.lower().endswith('.' + name):
+            return name
+    raise click.UsageError('无法从文件名判断格式，请用 --format 指定 jsonl 或 csv')
+
+
+# 读取与校验
+def read_records(stream, fmt):
+    """逐条产生 (行号, 记录)；JSON 无法解析的行以 RecordError 代替记录"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for lineno, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield lineno, json.loads(line)
+        except ValueError as e:
+            yield lineno, RecordError('JSON 格式错误：%s' % e)
+
+
+def _text(value, length=None):
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    return value[:length] if length else value
+
+
+def _int(value, name):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RecordError('%s 不是整数：%r' % (name, value))
+
+
+def _bool(value):
+    if value is None or value == '':
+        return True
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise RecordError('published 无法识别：%r' % value)
+
+
+def _datetime(value, name):
+    if value is None or value == '':
+        return None
+    try:
+        result = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        raise RecordError('%s 不是有效的时间：%r' % (name, value))
+    if result.tzinfo is not None:
+        result = result.astimezone(timezone.utc).replace(tzinfo=None)
+    return result
+
+
+def normalize(record):
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise RecordError('记录必须是对象')
+    title = _text(record.get('title'), 200)
+    content = record.get('content')
+    if not title or not content or not str(content).strip():
+        raise RecordError('缺少标题或正文')
+    tags = record.get('tags')
+    if isinstance(tags, (list, tuple)):
+        tags = ','.join(str(tag) for tag in tags)
+    return {
+        'slug': _text(record.get('slug'), 100),
+        'id': _int(record.get('id'), 'id'),
+        'title': title,
+        'summary': _text(record.get('summary'), 500),
+        'content': str(content),
+        'category': _text(record.get('category'), 50),
+        'tags': tagging.parse_tags(tags),
+        'published': _bool(record.get('published')),
+        'author': _text(record.get('author')),
+        'views': _int(record.get('views'), 'views') or 0,
+        'created_at': _datetime(record.get('created_at'), 'created_at'),
+        'updated_at': _datetime(record.get('updated_at'), 'updated_at'),
+    }
+
+
+# 导入
+def import_batch(records, default_author_id=None):
+    """在当前事务中写入一批 [(行号, 规范化的记录)]，返回 (新增数, 更新数, [(行号, 错误)])
+
+    本事务不增量计算相关阅读，导入完成后需调用 related_articles.rebuild_related()。
+    """
+    related_articles.skip_incremental(db.session)
+    usernames = {r['author'] for _, r in records if r['author']}
+    slugs = {r['slug'] for _, r in records if r['slug']}
+    ids = {r['id'] for _, r in records if r['id']}
+    names = sorted({name for _, r in records for name in r['tags']})
+
+    authors = dict(db.session.query(User.username, User.id).filter(User.username.in_(usernames))) \
+        if usernames else {}
+    by_slug = {}
+    by_id = {}
+    if slugs:
+        for article in Article.query.options(selectinload(Article.tag_list))\
+                .filter(Article.slug.in_(slugs)):
+            by_slug[article.slug] = article
+    if ids:
+        for article in Article.query.options(selectinload(Article.tag_list))\
+                .filter(Article.id.in_(ids)):
+            by_id[article.id] = article
+    tags = {tag.name: tag for tag in tagging.get_or_create_tags(names)}
+
+    created = updated = 0
+    errors = []
+    for lineno, r in records:
+        author_id = authors.get(r['author']) or default_author_id
+        if author_id is None:
+            errors.append((lineno, '作者不存在：%s' % (r['author'] or '（未指定）')))
+            continue
+
+        article = by_slug.get(r['slug']) if r['slug'] else by_id.get(r['id'])
+        if article is None:
+            article = Article(views=r['views'])
+            # 迁移到新库时保留原 id，文章地址不变；id 已被其他文章占用时重新分配
+            if r['id'] and r['id'] not in by_id:
+                article.id = r['id']
+                by_id[r['id']] = article
+            if r['slug']:
+                by_slug[r['slug']] = article
+            db.session.add(article)
+            created += 1
+        elif article in db.session.new:
+            # 同一批里重复出现的记录，以最后一条为准
+            pass
+        else:
+            updated += 1
+
+        article.title = r['title']
+        article.content = r['content']
+        article.summary = r['summary']
+        article.category = r['category']
+        article.published = r['published']
+        article.author_id = author_id
+        if r['slug']:
+            article.slug = r['slug']
+        if r['created_at']:
+            article.created_at = r['created_at']
+        if r['updated_at']:
+            article.updated_at = r['updated_at']
+        article.tag_list = [tags[name] for name in r['tags']]
+        article.tags = ','.join(r['tags'])
+    return created, updated, errors
+
+
+def import_articles(stream, fmt, default_author=None, batch_size=BATCH_SIZE, progress=None):
+    """从 stream 导入文章，返回 {'created', 'updated', 'skipped'} 计数
+
+    每批单独提交；progress(计数, 本批错误) 在每批提交后调用。
+    """
+    default_author_id = None
+    if default_author:
+        default_author_id = db.session.query(User.id).filter_by(username=default_author).scalar()
+        if default_author_id is None:
+            raise click.UsageError('用户不存在：%s' % default_author)
+
+    counts = {'created': 0, 'updated': 0, 'skipped': 0}
+
+    def flush_batch(batch, errors):
+        if batch:
+            created, updated, batch_errors = import_batch(batch, default_author_id)
+            db.session.commit()
+            db.session.expunge_all()
+            counts['created'] += created
+            counts['updated'] += updated
+            errors = errors + batch_errors
+        counts['skipped'] += len(errors)
+        if progress is not None:
+            progress(counts, errors)
+
+    batch = []
+    errors = []
+    for lineno, record in read_records(stream, fmt):
+        try:
+            batch.append((lineno, normalize(record)))
+        except RecordError as e:
+            errors.append((lineno, str(e)))
+        if len(batch) >= batch_size:
+            flush_batch(batch, errors)
+            batch = []
+            errors = []
+    if batch or errors:
+        flush_batch(batch, errors)
+    return counts
+
+
+# 导出
+def iter_articles(batch_size=BATCH_SIZE):
+    """按 id 分批读取，逐条产生导出记录"""
+    columns = (Article.id, Article.slug, Article.title, Article.summary, Article.content,
+               Article.category, Article.tags, Article.published, Article.views,
+               Article.created_at, Article.updated_at, User.username.label('author'))
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(*columns).join(User, User.id == Article.author_id)
+            .where(Article.id > last_id).order_by(Article.id).limit(batch_size)).all()
+        if not rows:
+            return
+        for row in rows:
+            yield {
+                'slug': row.slug,
+                'id': row.id,
+                'title': row.title,
+                'summary': row.summary,
+                'content': row.content,
+                'category': row.category,
+                'tags': tagging.parse_tags(row.tags),
+                'published': bool(row.published),
+                'author': row.author,
+                'views': row.views or 0,
+                'created_at': row.created_at.strftime(DATETIME_FORMAT) if row.created_at else None,
+                'updated_at': row.updated_at.strftime(DATETIME_FORMAT) if row.updated_at else None,
+            }
+        last_id = rows[-1].id
+
+
+def export_articles(stream, fmt, batch_size=BATCH_SIZE):
+    """把全部文章写入 stream，返回导出的条数"""
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        writer.writeheader()
+    count = 0
+    for record in iter_articles(batch_size):
+        if writer is not None:
+            record['tags'] = ','.join(record['tags'])
+            writer.writerow(record)
+        else:
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def _open(filename, mode):
+    if filename == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    return open(filename, mode, encoding='utf-8', newline='')
+
+
+@click.command('import-articles')
+@click.argument('filename')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='文件格式，默认按扩展名判断')
+@click.option('--author', help='记录未指定作者或作者不存在时使用的用户名')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True, help='每个事务处理的记录数')
+def import_articles_command(filename, fmt, author, batch_size):
+    """从 JSONL/CSV 文件导入文章，按 slug（或 id）更新已有文章。
+
+    导入时不增量计算相关阅读，完成后重新计算全部文章的相关阅读（同
+    rebuild-related-articles）；在第一次全量计算之前，文章的增量更新不会计算相关阅读。
+    """
+    fmt = detect_format(filename, fmt)
+    # 正文可能很长，放宽 csv 模块默认的 128 KB 字段上限
+    csv.field_size_limit(64 * 1024 * 1024)
+
+    def progress(counts, errors):
+        for lineno, message in errors:
+            click.echo('第 %d 行：%s' % (lineno, message), err=True)
+        click.echo('已处理 %d 条：新增 %d，更新 %d，跳过 %d' % (
+            sum(counts.values()), counts['created'], counts['updated'], counts['skipped']), err=True)
+
+    stream = _open(filename, 'r')
+    try:
+        counts = import_articles(stream, fmt, author, batch_size, progress)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    if counts['created'] or counts['updated']:
+        click.echo('正在计算相关阅读...', err=True)
+        count = related_articles.rebuild_related()
+        click.echo('已计算 %d 篇文章的相关阅读' % count, err=True)
+
+
+@click.command('export-articles')
+@click.argument('filename')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='文件格式，默认按扩展名判断')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True, help='每次读取的文章数')
+def export_articles_command(filename, fmt, batch_size):
+    """把全部文章导出为 JSONL/CSV 文件"""
+    fmt = detect_format(filename, fmt)
+    stream = _open(filename, 'w')
+    try:
+        count = export_articles(stream, fmt, batch_size)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    click.echo('已导出 %d 篇文章' % count, err=True)
+
+
+def init_app(app):
+    app.cli.add_command(import_articles_command)
+    app.cli.add_command(export_articles_command)
@@ -0,0 +1,257 @@
+"""
+文章正文渲染
+
+Article.content 保存编辑器提交的原始 HTML。保存时（会话 flush 前）只要正文有变化，
+就在这里处理一次，结果写入专门的列：
+
+    content_html   按白名单过滤后的 HTML，标题带上锚点 id
+    toc            目录，JSON 格式的 [{"level": 2, "id": "...", "text": "..."}]
+    excerpt        纯文本摘录，列表页在没有摘要时显示
+    reading_time   预计阅读分钟数
+
+文章页和列表页直接使用这些列，不再在每次请求时处理 HTML，列表查询也不必读取正文。
+过滤规则改动后运行 flask render-articles 重新生成全部文章。
+"""
+
+import html
+import json
+import math
+import re
+from html.parser import HTMLParser
+
+import click
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Article
+
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's', 'del', 'ins', 'sub', 'sup', 'mark', 'small',
+    'blockquote', 'pre', 'code', 'ul', 'ol', 'li', 'dl', 'dt', 'dd',
+    'a', 'img', 'figure', 'figcaption', 'span', 'div',
+    'table', 'caption', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'title', 'class'},
+    'a': {'href', 'target'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'ol': {'start'},
+    'th': {'colspan', 'rowspan'},
+    'td': {'colspan', 'rowspan'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'http', 'https', 'mailto'}
+VOID_TAGS = {'br', 'hr', 'img'}
+# 这些标签连同其中的内容一起丢弃
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript',
+                     'template', 'textarea', 'select', 'svg', 'math'}
+# 块级标签前后在纯文本中补一个空格，避免相邻段落的文字连在一起
+BLOCK_TAGS = {'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre',
+              'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'figure', 'figcaption', 'div',
+              'table', 'caption', 'tr', 'th', 'td'}
+# 列入目录并生成锚点的标题级别
+TOC_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4}
+
+EXCERPT_LENGTH = 200
+# 阅读速度：中文每分钟字数、其他文字每分钟词数
+CJK_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+
+_CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+_WORD_RE = re.compile(r'[0-9A-Za-z]+')
+_SPACE_RE = re.compile(r'\s+')
+_ANCHOR_RE = re.compile(r'[^\w-]+')
+_SCHEME_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+_CONTROL_RE = re.compile(r'[\x00-\x20\x7f]+')
+
+
+def safe_url(value):
+    """相对地址和白名单中协议的地址原样返回，其他（如 javascript:）返回 None"""
+    match = _SCHEME_RE.match(_CONTROL_RE.sub('', value or ''))
+    if match and match.group(1).lower() not in ALLOWED_SCHEMES:
+        return None
+    return value.strip()
+
+
+def make_anchor(text, used):
+    anchor = _ANCHOR_RE.sub('-', text.strip().lower()).strip('-')[:60] or 'section'
+    candidate = anchor
+    n = 2
+    while candidate in used:
+        candidate = '%s-%d' % (anchor, n)
+        n += 1
+    used.add(candidate)
+    return candidate
+
+
+class _Renderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.text = []
+        self.toc = []
+        self.anchors = set()
+        self.open_tags = []
+        self.skip = 0
+        # 正在处理的标题：(标签, 开始标签在 out 中的位置, 标题文字)
+        self.heading = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip:
+            if tag in DROP_CONTENT_TAGS:
+                self.skip += 1
+            return
+        if tag in DROP_CONTENT_TAGS:
+            self.skip = 1
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in ALLOWED_TAGS:
+            return
+
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        kept = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES:
+                value = safe_url(value)
+                if value is None:
+                    continue
+            if name == 'target' and value != '_blank':
+                continue
+            kept.append((name, value))
+        if tag == 'img' and not any(name == 'src' for name, _ in kept):
+            return
+        if tag == 'a' and any(name == 'href' and _SCHEME_RE.match(value) for name, value in kept):
+            kept.append(('rel', 'nofollow noopener noreferrer'))
+
+        if tag in TOC_LEVELS and self.heading is None:
+            self.heading = (tag, len(self.out), [])
+            self.out.append(kept)
+            self.open_tags.append(tag)
+            return
+        self.out.append(_start_tag(tag, kept))
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.skip:
+            if tag in DROP_CONTENT_TAGS:
+                self.skip -= 1
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in self.open_tags:
+            return
+        # 补齐没有闭合的内层标签
+        while self.open_tags:
+            current = self.open_tags.pop()
+            if self.heading is not None and current == self.heading[0]:
+                self._finish_heading()
+            self.out.append('</%s>' % current)
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        self.out.append(html.escape(data, quote=False))
+        self.text.append(data)
+        if self.heading is not None:
+            self.heading[2].append(data)
+
+    def _finish_heading(self):
+        tag, position, parts = self.heading
+        self.heading = None
+        text = _SPACE_RE.sub(' ', ''.join(parts)).strip()
+        attrs = self.out[position]
+        if text:
+            anchor = make_anchor(text, self.anchors)
+            attrs = [('id', anchor)] + attrs
+            self.toc.append({'level': TOC_LEVELS[tag], 'id': anchor, 'text': text})
+        self.out[position] = _start_tag(tag, attrs)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.handle_endtag(self.open_tags[-1])
+
+
+def _start_tag(tag, attrs):
+    return '<%s%s>' % (tag, ''.join(' %s="%s"' % (name, html.escape(value))
+                                    for name, value in attrs))
+
+
+def reading_time(text):
+    cjk = len(_CJK_RE.findall(text))
+    words = len(_WORD_RE.findall(text))
+    return max(1, math.ceil(cjk / CJK_PER_MINUTE + words / WORDS_PER_MINUTE))
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    return text[:length] + '...' if len(text) > length else text
+
+
+def render(content):
+    """处理正文，返回 {content_html, toc, excerpt, reading_time}"""
+    renderer = _Renderer()
+    renderer.feed(content or '')
+    renderer.close()
+    text = _SPACE_RE.sub(' ', ''.join(renderer.text)).strip()
+    return {
+        'content_html': ''.join(renderer.out),
+        'toc': json.dumps(renderer.toc, ensure_ascii=False),
+        'excerpt': make_excerpt(text),
+        'reading_time': reading_time(text),
+    }
+
+
+def render_article(article):
+    for name, value in render(article.content).items():
+        setattr(article, name, value)
+
+
+def render_all(batch_size=500):
+    """重新生成全部文章的渲染结果，返回处理的文章数"""
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Article.id, Article.content, Article.updated_at).where(Article.id > last_id)
+            .order_by(Article.id).limit(batch_size)).all()
+        if not rows:
+            break
+        # 原样写回 updated_at，重新渲染不算修改文章
+        db.session.execute(update(Article), [dict(render(row.content), id=row.id, updated_at=row.updated_at)
+                                             for row in rows])
+        db.session.commit()
+        count += len(rows)
+        last_id = rows[-1].id
+    return count
+
+
+def _before_flush(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Article) and inspect(obj).attrs.content.history.has_changes():
+            render_article(obj)
+
+
+@click.command('render-articles')
+@click.option('--batch-size', default=500, show_default=True, help='每个事务处理的文章数')
+def render_articles_command(batch_size):
+    """重新生成全部文章的 HTML、目录、摘录和阅读时间"""
+    count = render_all(batch_size)
+    click.echo('已处理 %d 篇文章' % count)
+
+
+def init_app(app):
+    event.listen(Session, 'before_flush', _before_flush)
+    app.cli.add_command(render_articles_command)
@@ -0,0 +1,231 @@
+"""
+静态资源构建与发布
+
+flask build-assets 把 static 下的 CSS/JS 等文件压缩（CSS 去注释和多余空白；安装了
+rcssmin/rjsmin 时改用它们）、按内容哈希重命名后写入 static/dist，同时生成 .gz
+和 .br（需要 brotli 模块）预压缩文件以及 manifest.json。CSS 中以相对路径引用的
+字体、图片也替换成带哈希的文件名。加 --vendor 参数时会先把 Bootstrap 等原本从
+CDN 加载的文件下载到 static/vendor，之后页面不再依赖外部 CDN。
+
+运行时 url_for('static', filename=...) 按 manifest 自动换成带哈希的地址，这些文件
+以 Cache-Control: immutable 和一年有效期发送，浏览器再次访问时不会重新请求；
+客户端支持时直接发送预压缩的 .br/.gz 文件。没有构建过时一切照旧。
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import urllib.request
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+MAX_AGE = 365 * 24 * 3600
+
+# static/vendor 下的文件名 -> CDN 地址；未下载时模板仍使用 CDN 地址
+VENDOR_ASSETS = {
+    'vendor/bootstrap/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap-icons/bootstrap-icons.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/fonts/bootstrap-icons.woff2',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/fonts/bootstrap-icons.woff',
+}
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+# CSS 引用的文件要先处理，才能把引用改写成带哈希的文件名
+BUILD_ORDER = {'.css': 1, '.js': 1}
+
+_CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+class AssetManifest:
+    def __init__(self):
+        self.static_folder = None
+        self.files = {}
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.load()
+        app.url_defaults(self._hashed_url)
+        app.view_functions['static'] = self.serve
+        app.jinja_env.globals.update(vendor_url=self.vendor_url)
+        app.cli.add_command(build_assets_command)
+
+    def load(self):
+        path = os.path.join(self.static_folder, DIST_DIR, MANIFEST)
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.files = json.load(f)
+        except (OSError, ValueError):
+            self.files = {}
+
+    def _hashed_url(self, endpoint, values):
+        if endpoint == 'static':
+            hashed = self.files.get(values.get('filename'))
+            if hashed is not None:
+                values['filename'] = hashed
+
+    def vendor_url(self, filename):
+        """已下载到 static/vendor 时返回本地地址，否则返回 CDN 地址"""
+        if filename in self.files or os.path.exists(os.path.join(self.static_folder, filename)):
+            return url_for('static', filename=filename)
+        return VENDOR_ASSETS[filename]
+
+    def serve(self, filename):
+        if not filename.startswith(DIST_DIR + '/'):
+            return send_from_directory(self.static_folder, filename)
+
+        accepted = request.accept_encodings
+        response = None
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if accepted[encoding] and os.path.exists(os.path.join(self.static_folder, filename + suffix)):
+                response = send_from_directory(self.static_folder, filename + suffix,
+                                               mimetype=_mimetype(filename))
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = send_from_directory(self.static_folder, filename)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'public, max-age=%d, immutable' % MAX_AGE
+        return response
+
+
+def _mimetype(filename):
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+def minify_css(source):
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+    # 没有 rjsmin 时只去掉行尾空白和空行，不冒险改动代码
+    lines = (line.rstrip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+def _rewrite_css_urls(source, name, files):
+    base = posixpath.dirname(name)
+    # 构建后的 CSS 位于 dist 下的同名目录中
+    built_dir = posixpath.join(DIST_DIR, base)
+
+    def replace(match):
+        quote, url = match.group(1), match.group(2)
+        if re.match(r'^(?:[a-z]+:|/|#)', url, re.I):
+            return match.group(0)
+        path, _, fragment = url.partition('#')
+        path = path.partition('?')[0]
+        hashed = files.get(posixpath.normpath(posixpath.join(base, path)))
+        if hashed is None:
+            return match.group(0)
+        relative = posixpath.relpath(hashed, built_dir)
+        return 'url(%s%s%s)' % (quote, relative + ('#' + fragment if fragment else ''), quote)
+
+    return _CSS_URL_RE.sub(replace, source)
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _hashed_name(name, data):
+    root, ext = posixpath.splitext(name)
+    return '%s/%s.%s%s' % (DIST_DIR, root, hashlib.sha256(data).hexdigest()[:12], ext)
+
+
+def build(static_folder):
+    """构建 static/dist，返回 {原文件名: 带哈希的文件名}
+
+    旧版本的文件不删除，部署期间仍引用旧地址的页面照常可用。
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+
+    names = []
+    for root, dirs, filenames in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist]
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            names.append(os.path.relpath(path, static_folder).replace(os.sep, '/'))
+    names.sort(key=lambda n: (BUILD_ORDER.get(posixpath.splitext(n)[1], 0), n))
+
+    files = {}
+    for name in names:
+        with open(os.path.join(static_folder, name), 'rb') as f:
+            data = f.read()
+        ext = posixpath.splitext(name)[1]
+        if ext == '.css':
+            source = data.decode('utf-8')
+            if not name.endswith('.min.css'):
+                source = minify_css(source)
+            data = _rewrite_css_urls(source, name, files).encode('utf-8')
+        elif ext == '.js' and not name.endswith('.min.js'):
+            data = minify_js(data.decode('utf-8')).encode('utf-8')
+
+        hashed = _hashed_name(name, data)
+        files[name] = hashed
+        target = os.path.join(static_folder, hashed)
+        _write(target, data)
+        if ext in COMPRESSIBLE:
+            _write(target + '.gz', gzip.compress(data, 9, mtime=0))
+            if brotli is not None:
+                _write(target + '.br', brotli.compress(data, quality=11))
+
+    _write(os.path.join(dist, MANIFEST),
+           json.dumps(files, indent=2, sort_keys=True).encode('utf-8'))
+    return files
+
+
+def download_vendor_assets(static_folder):
+    for name, url in VENDOR_ASSETS.items():
+        click.echo('下载 %s' % url)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            _write(os.path.join(static_folder, name), response.read())
+
+
+manifest = AssetManifest()
+
+
+@click.command('build-assets')
+@click.option('--vendor', is_flag=True, help='先把 CDN 上的 Bootstrap 等文件下载到 static/vendor')
+def build_assets_command(vendor):
+    """压缩静态文件、按内容哈希重命名并生成预压缩文件"""
+    if vendor:
+        download_vendor_assets(current_app.static_folder)
+    files = build(current_app.static_folder)
+    manifest.load()
+    click.echo('已构建 %d 个文件%s' % (len(files), '' if brotli else '（未安装 brotli，只生成 .gz）'))
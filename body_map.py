@@ -0,0 +1,224 @@
+"""
+人体图谱数据
+
+脏腑/部位（及其常见病症 organ_disease）、经络、症状和穴位保存在 organ / meridian /
+symptom / acupoint 及三张关联表中。第一次请求时用八条查询把全部数据读出，整理成
+只读快照：总览、每个脏腑、症状和穴位的完整内容都预先序列化为紧凑的 JSON 并算好
+ETag，请求时只做一次字典查找，点击人体图谱不会访问数据库。一个脏腑的症状、经络、
+病症及相关穴位在同一个响应里返回。
+
+管理员修改这些表并提交后，会话事件使快照失效，下次请求时重新载入；其他进程中的
+快照在 BODY_MAP_TTL 秒后重新载入。重新载入期间其他请求继续使用旧快照。
+
+早期版本的数据库里已有结构不同的 organ / symptom / acupoint（及 disease）表，
+create_all 不会改动它们，需要先运行 migrations/add_body_map.py 把旧表改名保留。
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+
+from flask import Response, request
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import (Acupoint, Meridian, Organ, OrganDisease, Symptom, organ_meridian, organ_symptom,
+                    symptom_acupoint)
+from page_cache import Reloader
+
+MODELS = (Organ, OrganDisease, Meridian, Symptom, Acupoint)
+TABLES = tuple(model.__table__ for model in MODELS) + (organ_meridian, organ_symptom, symptom_acupoint)
+KINDS = ('organs', 'symptoms', 'acupoints')
+
+
+def _encode(payload):
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha1(body).hexdigest()
+
+
+def _compact(payload):
+    return {key: value for key, value in payload.items() if value not in (None, '', [])}
+
+
+def _group(table, key, value):
+    groups = defaultdict(list)
+    for row in db.session.execute(select(table.c[key], table.c[value])):
+        groups[row[0]].append(row[1])
+    return groups
+
+
+class Snapshot:
+    """某一时刻的全部图谱数据；entries[kind][name] 为 (JSON 字节串, ETag)"""
+
+    def __init__(self, index, entries):
+        self.index = index
+        self.entries = entries
+
+    def get(self, kind, name):
+        return self.entries.get(kind, {}).get(name)
+
+
+def build_snapshot():
+    organs = db.session.execute(select(Organ.__table__).order_by(Organ.sort_order, Organ.name)).all()
+    meridians = {row.id: row for row in db.session.execute(select(Meridian.__table__).order_by(Meridian.name))}
+    symptoms = {row.id: row for row in db.session.execute(select(Symptom.__table__).order_by(Symptom.name))}
+    acupoints = {row.id: row for row in db.session.execute(select(Acupoint.__table__).order_by(Acupoint.name))}
+    organ_meridians = _group(organ_meridian, 'organ_id', 'meridian_id')
+    organ_symptoms = _group(organ_symptom, 'organ_id', 'symptom_id')
+    symptom_acupoints = _group(symptom_acupoint, 'symptom_id', 'acupoint_id')
+    organ_diseases = defaultdict(list)
+    for row in db.session.execute(select(OrganDisease.__table__)
+                                  .order_by(OrganDisease.sort_order, OrganDisease.id)):
+        organ_diseases[row.organ_id].append(_compact({
+            'name': row.name, 'type': row.pattern, 'symptoms': row.symptoms, 'treatment': row.treatment}))
+
+    symptom_organs = defaultdict(list)
+    for organ in organs:
+        for symptom_id in organ_symptoms[organ.id]:
+            symptom_organs[symptom_id].append(organ.name)
+    acupoint_symptoms = defaultdict(list)
+    for symptom_id, acupoint_ids in symptom_acupoints.items():
+        for acupoint_id in acupoint_ids:
+            acupoint_symptoms[acupoint_id].append(symptoms[symptom_id].name)
+    meridian_acupoints = defaultdict(list)
+    for acupoint in acupoints.values():
+        meridian_acupoints[acupoint.meridian_id].append(acupoint.name)
+
+    def by_name(rows, ids):
+        return sorted((rows[i] for i in ids if i in rows), key=lambda row: row.name)
+
+    def acupoint_ref(acupoint):
+        meridian = meridians.get(acupoint.meridian_id)
+        return _compact({'name': acupoint.name, 'code': acupoint.code,
+                         'meridian': meridian.name if meridian else None,
+                         'location': acupoint.location})
+
+    def symptom_payload(symptom):
+        return _compact({'name': symptom.name, 'description': symptom.description,
+                         'acupoints': [acupoint_ref(a) for a in by_name(acupoints, symptom_acupoints[symptom.id])]})
+
+    entries = {kind: {} for kind in KINDS}
+    for organ in organs:
+        entries['organs'][organ.name] = _encode(_compact({
+            'name': organ.name,
+            'category': organ.category,
+            'description': organ.description,
+            'diagnosis': organ.diagnosis,
+            'treatment': organ.treatment,
+            'advice': [line.strip() for line in (organ.advice or '').splitlines() if line.strip()],
+            'meridians': [_compact({'name': m.name, 'description': m.description,
+                                    'acupoints': meridian_acupoints[m.id]})
+                          for m in by_name(meridians, organ_meridians[organ.id])],
+            'symptoms': [symptom_payload(s) for s in by_name(symptoms, organ_symptoms[organ.id])],
+            'diseases': organ_diseases[organ.id],
+        }))
+    for symptom in symptoms.values():
+        entries['symptoms'][symptom.name] = _encode(
+            dict(symptom_payload(symptom), organs=symptom_organs[symptom.id]))
+    for acupoint in acupoints.values():
+        entries['acupoints'][acupoint.name] = _encode(_compact(dict(
+            acupoint_ref(acupoint), indications=acupoint.indications,
+            symptoms=acupoint_symptoms[acupoint.id])))
+
+    index = _encode({
+        'organs': [_compact({'name': organ.name, 'category': organ.category}) for organ in organs],
+        'meridians': [m.name for m in meridians.values()],
+        'symptoms': [s.name for s in symptoms.values()],
+        'acupoints': [a.name for a in acupoints.values()],
+    })
+    return Snapshot(index, entries)
+
+
+class BodyMap:
+    def __init__(self, ttl=300):
+        self._snapshots = Reloader(build_snapshot, ttl)
+
+    def init_app(self, app):
+        self._snapshots.interval = app.config.get('BODY_MAP_TTL', self._snapshots.interval)
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
+
+    def snapshot(self):
+        return self._snapshots.get()
+
+    def invalidate(self):
+        self._snapshots.invalidate()
+
+    def response(self, kind=None, name=None):
+        """返回总览（kind 为 None）或某一项的 JSON 响应，支持 If-None-Match；不存在时返回 None"""
+        snapshot = self.snapshot()
+        entry = snapshot.index if kind is None else snapshot.get(kind, name)
+        if entry is None:
+            return None
+        body, etag = entry
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response.make_conditional(request)
+
+
+body_map = BodyMap()
+
+
+def _after_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, MODELS):
+            session.info['body_map_changed'] = True
+            return
+
+
+def _after_commit(session):
+    if session.info.pop('body_map_changed', False):
+        body_map.invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop('body_map_changed', None)
+
+
+def incompatible_tables(bind):
+    """已存在但缺少当前模型中某些列的图谱表（旧版数据库遗留），返回表名列表"""
+    inspector = inspect(bind)
+    names = []
+    for table in TABLES:
+        if inspector.has_table(table.name):
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            if not set(table.columns.keys()) <= columns:
+                names.append(table.name)
+    return names
+
+
+def seed_defaults():
+    """图谱表为空时写入 body_map_data.py 中的默认数据，返回是否写入"""
+    from body_map_data import DEFAULT_ACUPOINTS, DEFAULT_MERIDIANS, DEFAULT_ORGANS, DEFAULT_SYMPTOMS
+
+    if db.session.query(Organ.id).first() is not None:
+        return False
+    meridians = {}
+    for item in DEFAULT_MERIDIANS:
+        meridians[item['name']] = Meridian(**item)
+    acupoints = {}
+    for item in DEFAULT_ACUPOINTS:
+        item = dict(item)
+        meridian = item.pop('meridian')
+        acupoints[item['name']] = Acupoint(meridian=meridians[meridian] if meridian else None, **item)
+    symptoms = {}
+    for item in DEFAULT_SYMPTOMS:
+        item = dict(item)
+        symptoms[item['name']] = Symptom(acupoints=[acupoints[name] for name in item.pop('acupoints')], **item)
+    for order, item in enumerate(DEFAULT_ORGANS):
+        item = dict(item)
+        db.session.add(Organ(
+            sort_order=order,
+            advice='\n'.join(item.pop('advice')),
+            meridians=[meridians[name] for name in item.pop('meridians')],
+            symptoms=[symptoms[name] for name in item.pop('symptoms')],
+            diseases=[OrganDisease(name=d['name'], pattern=d['type'], symptoms=d['symptoms'],
+                                   treatment=d['treatment'], sort_order=i)
+                      for i, d in enumerate(item.pop('diseases'))],
+            **item))
+    db.session.add_all(meridians.values())
+    db.session.commit()
+    return True
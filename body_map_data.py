@@ -0,0 +1,283 @@
+"""
+人体图谱的默认数据，数据库中还没有图谱数据时写入（见 body_map.seed_defaults）
+"""
+
+DEFAULT_MERIDIANS = [
+    {'name': '手太阴肺经', 'description': '起于中焦，下络大肠，属肺，主治咳喘、咽喉等肺系病症。'},
+    {'name': '手阳明大肠经', 'description': '起于食指末端，属大肠络肺，主治头面五官及肠胃病症。'},
+    {'name': '足阳明胃经', 'description': '起于鼻旁，属胃络脾，主治胃肠病、头面五官病及神志病。'},
+    {'name': '手少阴心经', 'description': '起于心中，属心络小肠，主治心、胸、神志病症。'},
+    {'name': '手太阳小肠经', 'description': '起于小指末端，属小肠络心，主治头面五官病、热病及神志病。'},
+    {'name': '足太阳膀胱经', 'description': '起于目内眦，属膀胱络肾，背部有各脏腑的背俞穴。'},
+    {'name': '足少阴肾经', 'description': '起于足小趾下，属肾络膀胱，主治妇科、前阴病及肾、肺、咽喉病症。'},
+    {'name': '手厥阴心包经', 'description': '起于胸中，属心包络三焦，主治心、胸、胃及神志病症。'},
+    {'name': '手少阳三焦经', 'description': '起于无名指末端，属三焦络心包，主治侧头、耳、目、咽喉病症。'},
+    {'name': '足厥阴肝经', 'description': '起于足大趾，属肝络胆，主治肝胆病、妇科病及前阴病。'},
+    {'name': '督脉', 'description': '行于脊背正中，总督一身之阳经，主治神志病、热病及腰骶、背、头项病症。'},
+    {'name': '任脉', 'description': '行于胸腹正中，总任一身之阴经，主治腹、胸、颈、头面局部病症。'},
+]
+
+# meridian 为空表示经外奇穴
+DEFAULT_ACUPOINTS = [
+    {'name': '听宫', 'code': 'SI19', 'meridian': '手太阳小肠经',
+     'location': '面部，耳屏正中与下颌骨髁突之间的凹陷中', 'indications': '耳鸣、耳聋、聤耳、齿痛'},
+    {'name': '翳风', 'code': 'TE17', 'meridian': '手少阳三焦经',
+     'location': '颈部，耳垂后方，乳突下端前方凹陷中', 'indications': '耳鸣、耳聋、口眼歪斜、颊肿'},
+    {'name': '耳门', 'code': 'TE21', 'meridian': '手少阳三焦经',
+     'location': '耳区，耳屏上切迹与下颌骨髁突之间的凹陷中', 'indications': '耳鸣、耳聋、聤耳、齿痛'},
+    {'name': '太溪', 'code': 'KI3', 'meridian': '足少阴肾经',
+     'location': '踝区，内踝尖与跟腱之间的凹陷中', 'indications': '耳鸣、耳聋、咽喉肿痛、失眠、腰痛'},
+    {'name': '太冲', 'code': 'LR3', 'meridian': '足厥阴肝经',
+     'location': '足背，第一、二跖骨间，跖骨底结合部前方凹陷中', 'indications': '头痛、眩晕、目赤肿痛、胁痛、急躁易怒'},
+    {'name': '期门', 'code': 'LR14', 'meridian': '足厥阴肝经',
+     'location': '胸部，第六肋间隙，前正中线旁开4寸', 'indications': '胸胁胀痛、呕吐、吞酸、腹胀'},
+    {'name': '内关', 'code': 'PC6', 'meridian': '手厥阴心包经',
+     'location': '前臂前区，腕掌侧远端横纹上2寸，掌长肌腱与桡侧腕屈肌腱之间', 'indications': '心痛、心悸、胸闷、胃痛、呕吐'},
+    {'name': '神门', 'code': 'HT7', 'meridian': '手少阴心经',
+     'location': '腕前区，腕掌侧远端横纹尺侧端，尺侧腕屈肌腱的桡侧缘', 'indications': '心悸、失眠、健忘、心烦'},
+    {'name': '心俞', 'code': 'BL15', 'meridian': '足太阳膀胱经',
+     'location': '脊柱区，第五胸椎棘突下，后正中线旁开1.5寸', 'indications': '心痛、心悸、失眠、盗汗'},
+    {'name': '肺俞', 'code': 'BL13', 'meridian': '足太阳膀胱经',
+     'location': '脊柱区，第三胸椎棘突下，后正中线旁开1.5寸', 'indications': '咳嗽、气喘、胸闷、骨蒸潮热'},
+    {'name': '睛明', 'code': 'BL1', 'meridian': '足太阳膀胱经',
+     'location': '面部，目内眦内上方眶内侧壁凹陷中', 'indications': '目赤肿痛、迎风流泪、视物不明、近视'},
+    {'name': '攒竹', 'code': 'BL2', 'meridian': '足太阳膀胱经',
+     'location': '面部，眉头凹陷中，额切迹处', 'indications': '头痛、眉棱骨痛、目视不明、目赤肿痛'},
+    {'name': '太阳', 'code': 'EX-HN5', 'meridian': None,
+     'location': '头部，眉梢与目外眦之间，向后约一横指的凹陷中', 'indications': '头痛、目疾、面瘫'},
+    {'name': '列缺', 'code': 'LU7', 'meridian': '手太阴肺经',
+     'location': '前臂，腕掌侧远端横纹上1.5寸，拇短伸肌腱与拇长展肌腱之间', 'indications': '咳嗽、气喘、咽喉肿痛、头痛'},
+    {'name': '少商', 'code': 'LU11', 'meridian': '手太阴肺经',
+     'location': '手指，拇指末节桡侧，指甲根角侧上方0.1寸', 'indications': '咽喉肿痛、咳嗽、鼻衄、发热'},
+    {'name': '合谷', 'code': 'LI4', 'meridian': '手阳明大肠经',
+     'location': '手背，第二掌骨桡侧的中点处', 'indications': '头痛、咽喉肿痛、齿痛、发热恶寒'},
+    {'name': '迎香', 'code': 'LI20', 'meridian': '手阳明大肠经',
+     'location': '面部，鼻翼外缘中点旁，鼻唇沟中', 'indications': '鼻塞、鼻衄、鼻渊、口歪'},
+    {'name': '上星', 'code': 'GV23', 'meridian': '督脉',
+     'location': '头部，前发际正中直上1寸', 'indications': '头痛、目痛、鼻渊、鼻衄'},
+    {'name': '内庭', 'code': 'ST44', 'meridian': '足阳明胃经',
+     'location': '足背，第二、三趾间，趾蹼缘后方赤白肉际处', 'indications': '齿痛、咽喉肿痛、口歪、胃痛吐酸'},
+    {'name': '中脘', 'code': 'CV12', 'meridian': '任脉',
+     'location': '上腹部，脐中上4寸，前正中线上', 'indications': '胃痛、腹胀、呕吐、吞酸、食欲不振'},
+    {'name': '足三里', 'code': 'ST36', 'meridian': '足阳明胃经',
+     'location': '小腿外侧，犊鼻下3寸，犊鼻与解溪连线上', 'indications': '胃痛、呕吐、腹胀、消化不良、虚劳'},
+]
+
+DEFAULT_SYMPTOMS = [
+    {'name': '耳鸣', 'description': '耳内鸣响，如蝉如潮，实证多因肝火上扰，虚证多因肾精不足。',
+     'acupoints': ['听宫', '翳风', '耳门', '太溪', '太冲']},
+    {'name': '听力减退', 'description': '听力逐渐下降，多与肾精亏虚、气血不足有关。',
+     'acupoints': ['听宫', '耳门', '太溪']},
+    {'name': '耳痛', 'description': '耳部疼痛，多因风热上扰或肝胆湿热。',
+     'acupoints': ['翳风', '听宫', '合谷']},
+    {'name': '耳内胀满', 'acupoints': ['耳门', '翳风']},
+    {'name': '分泌物异常', 'acupoints': ['翳风', '合谷']},
+    {'name': '眩晕', 'description': '头晕目眩，视物旋转，多与肝阳上亢或气血亏虚有关。',
+     'acupoints': ['太冲', '太溪', '足三里']},
+    {'name': '咽痛', 'description': '咽喉疼痛，实证多为风热或肺胃热盛，虚证多为阴虚火旺。',
+     'acupoints': ['少商', '合谷', '列缺', '太溪']},
+    {'name': '声音嘶哑', 'description': '发音不畅、声音沙哑，多与肺气失宣或肺肾阴虚有关。',
+     'acupoints': ['列缺', '太溪', '少商']},
+    {'name': '咳嗽', 'description': '肺失宣降，肺气上逆，有外感、内伤之分。',
+     'acupoints': ['肺俞', '列缺', '合谷']},
+    {'name': '痰多', 'acupoints': ['肺俞', '足三里', '中脘']},
+    {'name': '易感冒', 'description': '卫外不固，易感外邪，多为肺气虚弱。',
+     'acupoints': ['肺俞', '足三里']},
+    {'name': '视力模糊', 'description': '视物不清，多与肝血不足、肝肾亏虚有关。',
+     'acupoints': ['睛明', '攒竹', '太冲']},
+    {'name': '眼睛干涩', 'description': '目睛干涩少泪，多为肝阴不足。',
+     'acupoints': ['睛明', '太阳', '太溪']},
+    {'name': '眼疲劳', 'acupoints': ['攒竹', '太阳', '睛明']},
+    {'name': '畏光', 'acupoints': ['睛明', '太冲']},
+    {'name': '眼红', 'description': '白睛红赤，多为风热上攻或肝火上炎。',
+     'acupoints': ['太阳', '太冲', '合谷']},
+    {'name': '眼痒', 'acupoints': ['攒竹', '太阳']},
+    {'name': '鼻塞', 'description': '鼻窍不通，多因风寒袭肺或肺气虚弱。',
+     'acupoints': ['迎香', '上星', '合谷']},
+    {'name': '流涕', 'acupoints': ['迎香', '列缺']},
+    {'name': '打喷嚏', 'acupoints': ['迎香', '肺俞']},
+    {'name': '鼻痒', 'acupoints': ['迎香', '上星']},
+    {'name': '嗅觉减退', 'acupoints': ['迎香', '上星']},
+    {'name': '鼻出血', 'acupoints': ['上星', '少商', '合谷']},
+    {'name': '口腔溃疡', 'description': '口舌生疮，多因心火上炎或胃热熏蒸。',
+     'acupoints': ['合谷', '内庭']},
+    {'name': '牙龈出血', 'acupoints': ['内庭', '合谷']},
+    {'name': '口干', 'acupoints': ['太溪', '内庭']},
+    {'name': '口苦', 'description': '口中发苦，多为肝胆郁热。',
+     'acupoints': ['太冲', '期门']},
+    {'name': '口臭', 'acupoints': ['内庭', '中脘']},
+    {'name': '味觉改变', 'acupoints': ['足三里', '中脘']},
+    {'name': '心悸', 'description': '自觉心跳不安，多因心气不足、心血亏虚或痰火扰心。',
+     'acupoints': ['内关', '神门', '心俞']},
+    {'name': '胸闷', 'description': '胸部满闷不舒，多与心肺气机不畅有关。',
+     'acupoints': ['内关', '期门', '肺俞']},
+    {'name': '气短', 'description': '呼吸短促而不相接续，多为肺气虚或心气虚。',
+     'acupoints': ['肺俞', '足三里', '心俞']},
+    {'name': '失眠', 'description': '难以入睡或睡后易醒，多与心神不宁有关。',
+     'acupoints': ['神门', '内关', '太溪']},
+    {'name': '多汗', 'acupoints': ['心俞', '合谷']},
+    {'name': '心律不齐', 'acupoints': ['内关', '神门']},
+    {'name': '面色苍白', 'acupoints': ['足三里', '心俞']},
+    {'name': '胁肋胀痛', 'description': '两胁胀满疼痛，多因肝气郁结。',
+     'acupoints': ['期门', '太冲']},
+    {'name': '情志不畅', 'acupoints': ['太冲', '内关']},
+    {'name': '目赤', 'acupoints': ['太冲', '太阳']},
+    {'name': '头痛', 'description': '头部疼痛，外感多为风邪，内伤多与肝阳、气血有关。',
+     'acupoints': ['合谷', '太冲', '列缺', '太阳']},
+    {'name': '烦躁易怒', 'acupoints': ['太冲', '神门']},
+    {'name': '胃痛', 'description': '胃脘部疼痛，寒证喜温喜按，热证灼痛口干。',
+     'acupoints': ['中脘', '足三里', '内关']},
+    {'name': '消化不良', 'description': '食后脘腹胀满、嗳气，多为脾胃虚弱或饮食积滞。',
+     'acupoints': ['中脘', '足三里']},
+    {'name': '嗳气', 'acupoints': ['中脘', '内关']},
+    {'name': '反酸', 'acupoints': ['中脘', '内庭', '期门']},
+    {'name': '食欲不振', 'acupoints': ['足三里', '中脘']},
+    {'name': '恶心呕吐', 'description': '胃失和降，胃气上逆。',
+     'acupoints': ['内关', '中脘', '足三里']},
+]
+
+_EAR = {
+    'category': '官窍',
+    'diagnosis': '中医认为耳为肾之窍，耳部疾病多与肾精亏虚、肝火上扰有关。耳鸣可分为实证和虚证，实证多因肝火上扰，虚证多因肾精不足。',
+    'treatment': '1. 针灸治疗：\n- 取听宫、翳风、耳门等穴位\n- 配合太溪、太冲等补肾泻肝穴位\n\n2. 中药调理：\n- 肾虚型：六味地黄丸\n- 肝火型：知柏地黄丸\n- 气血虚型：补气养血汤',
+    'advice': ['保持作息规律，避免熬夜', '适当运动，增强体质', '控制音量，避免噪音环境',
+               '保持耳道清洁，预防感染', '戒烟限酒，清淡饮食'],
+    'meridians': ['足少阴肾经', '手少阳三焦经', '手太阳小肠经'],
+    'symptoms': ['耳鸣', '听力减退', '耳痛', '眩晕', '耳内胀满', '分泌物异常'],
+    'diseases': [
+        {'name': '耳鸣', 'type': '虚证', 'symptoms': '耳内持续或间歇性鸣响，疲劳后加重',
+         'treatment': '补肾养精，健脾益气。\n服用六味地黄丸、归脾丸等。'},
+        {'name': '中耳炎', 'type': '实证', 'symptoms': '耳痛剧烈，耳内胀满，可能有发热',
+         'treatment': '清热解毒，消炎止痛。\n服用银翘散、双黄连口服液等。'},
+    ],
+}
+
+DEFAULT_ORGANS = [
+    dict(_EAR, name='左耳', description='左耳是听觉器官，在中医理论中与肾经密切相关。'),
+    dict(_EAR, name='右耳', description='右耳是听觉器官，在中医理论中与肾经密切相关。'),
+    {
+        'name': '眼睛',
+        'category': '官窍',
+        'description': '目为肝之窍，五脏六腑之精气皆上注于目。',
+        'diagnosis': '中医认为眼睛为肝之窍，与肝的功能密切相关。眼部疾病多与肝血不足、肝火上炎有关。',
+        'treatment': '1. 中药调理：\n- 滋阴明目：杞菊地黄丸\n- 清肝明目：明目地黄丸\n\n2. 穴位按摩：\n- 攒竹、睛明、太阳等穴位\n- 每日按摩2-3次',
+        'advice': ['用眼卫生，经常眨眼', '注意用眼时间，每隔1小时休息10分钟', '保持良好的睡眠习惯',
+                   '多食用对眼睛有益的食物，如胡萝卜、蓝莓等', '避免长时间使用电子产品'],
+        'meridians': ['足厥阴肝经', '足太阳膀胱经'],
+        'symptoms': ['视力模糊', '眼睛干涩', '眼疲劳', '畏光', '眼红', '眼痒'],
+        'diseases': [
+            {'name': '干眼症', 'type': '阴虚证', 'symptoms': '眼睛干涩、异物感、易疲劳',
+             'treatment': '滋阴养肝，润目明目。\n服用杞菊地黄丸、知柏地黄丸等。'},
+            {'name': '结膜炎', 'type': '风热证', 'symptoms': '眼红、痒痛、多泪',
+             'treatment': '疏风清热，明目退翳。\n服用银翘散、蒺藜决明丸等。'},
+        ],
+    },
+    {
+        'name': '鼻子',
+        'category': '官窍',
+        'description': '鼻为肺之窍，是呼吸出入的门户。',
+        'diagnosis': '中医认为鼻为肺之窍，鼻部疾病与肺的功能密切相关。常见肺气虚弱、风寒侵袭等证候。',
+        'treatment': '1. 中药调理：\n- 补肺固表：玉屏风散\n- 通窍止涕：辛夷散\n\n2. 穴位按摩：\n- 迎香、上星等穴位\n- 配合蒸汽熏蒸',
+        'advice': ['保持室内空气清新', '避免接触过敏原', '适当运动，增强体质', '保暖防寒，预防感冒', '定期清洁鼻腔'],
+        'meridians': ['手太阴肺经', '手阳明大肠经', '督脉'],
+        'symptoms': ['鼻塞', '流涕', '打喷嚏', '鼻痒', '嗅觉减退', '鼻出血'],
+        'diseases': [
+            {'name': '过敏性鼻炎', 'type': '肺卫不固证', 'symptoms': '喷嚏连连，清涕如水，鼻痒',
+             'treatment': '补肺固表，祛风通窍。\n服用玉屏风散、辛夷清肺饮等。'},
+            {'name': '慢性鼻炎', 'type': '肺气虚弱证', 'symptoms': '鼻塞时轻时重，嗅觉减退',
+             'treatment': '温肺化饮，通窍止涕。\n服用苍耳子散、辛夷散等。'},
+        ],
+    },
+    {
+        'name': '口腔',
+        'category': '官窍',
+        'description': '脾开窍于口，舌为心之苗。',
+        'diagnosis': '中医认为口腔问题多与脾胃、心火有关。口腔溃疡多因心火上炎，口干多因阴虚火旺。',
+        'treatment': '1. 中药调理：\n- 清热解毒：黄连上清丸\n- 养阴生津：西瓜霜\n\n2. 穴位按摩：\n- 合谷、内庭等穴位\n- 每日漱口3-4次',
+        'advice': ['保持口腔卫生，早晚刷牙', '定期洗牙，预防牙周病', '避免食用过烫过冷的食物', '戒烟限酒', '适当补充维生素C'],
+        'meridians': ['足阳明胃经', '手阳明大肠经'],
+        'symptoms': ['口腔溃疡', '牙龈出血', '口干', '口苦', '口臭', '味觉改变'],
+        'diseases': [
+            {'name': '口腔溃疡', 'type': '心火上炎证', 'symptoms': '口腔疼痛，溃疡表面发白，周围红肿',
+             'treatment': '清心泻火，养阴生津。\n服用玄参地黄汤、黄连上清丸等。'},
+            {'name': '牙龈炎', 'type': '胃火上炎证', 'symptoms': '牙龈红肿出血，刷牙疼痛',
+             'treatment': '清胃泻火，凉血止血。\n服用银花泡腾片、牙痛消炎灵等。'},
+        ],
+    },
+    {
+        'name': '喉咙',
+        'category': '官窍',
+        'description': '喉咙是呼吸道的重要部分，与肺经相关。',
+        'diagnosis': '喉为肺之门户，咽喉病症多与肺胃热盛或肺肾阴虚有关。',
+        'treatment': '1. 穴位按摩：\n- 少商、合谷、列缺等穴位\n\n2. 中药调理：\n- 风热型：银翘散\n- 阴虚型：养阴清肺汤',
+        'advice': ['多饮温水，保持咽喉湿润', '少食辛辣刺激食物', '避免长时间大声说话', '戒烟限酒'],
+        'meridians': ['手太阴肺经', '足少阴肾经'],
+        'symptoms': ['咽痛', '声音嘶哑', '咳嗽'],
+        'diseases': [],
+    },
+    {
+        'name': '心脏',
+        'category': '五脏',
+        'description': '心主血脉，藏神，为五脏六腑之大主。',
+        'diagnosis': '心主血脉，心神所居。心气虚弱会导致血运不畅，心神不宁。常见心血虚、心气虚、心阴虚等证型。',
+        'treatment': '1. 中药调理：\n- 气虚型：服用归脾汤\n- 阴虚型：天王补心丹\n- 血虚型：养心汤\n\n2. 穴位按摩：\n- 内关、神门、心俞等穴位\n- 每日按摩2-3次，每次10分钟',
+        'advice': ['保持心情舒畅，避免情绪激动', '适量运动，避免过度劳累', '规律作息，保证充足睡眠',
+                   '清淡饮食，避免刺激性食物', '保持良好的生活习惯'],
+        'meridians': ['手少阴心经', '手厥阴心包经'],
+        'symptoms': ['心悸', '胸闷', '气短', '失眠', '多汗', '心律不齐', '面色苍白'],
+        'diseases': [
+            {'name': '心悸', 'type': '气虚证', 'symptoms': '心跳加快，气短乏力，自汗，疲劳',
+             'treatment': '益气养心，调节心律。\n服用归脾汤、酸枣仁汤等。'},
+            {'name': '胸痹', 'type': '血瘀证', 'symptoms': '胸痛，痛处固定，夜间加重',
+             'treatment': '活血化瘀，通络止痛。\n服用血府逐瘀汤、丹参滴丸等。'},
+        ],
+    },
+    {
+        'name': '肝脏',
+        'category': '五脏',
+        'description': '肝主疏泄，主藏血，在志为怒，开窍于目。',
+        'diagnosis': '肝主疏泄，藏血养筋。肝气郁结会导致气机不畅，情志不舒；肝血不足则会出现筋脉失养等症状。',
+        'treatment': '1. 中药调理：\n- 疏肝解郁：柴胡疏肝散\n- 养血柔肝：逍遥丸\n\n2. 穴位保健：\n- 期门、太冲等穴位\n- 配合艾灸调理',
+        'advice': ['保持情志舒畅，避免暴怒', '规律作息，不要熬夜', '适当运动，促进气血运行', '饮食有节，少食辛辣'],
+        'meridians': ['足厥阴肝经'],
+        'symptoms': ['胁肋胀痛', '情志不畅', '目赤', '头痛', '口苦', '烦躁易怒'],
+        'diseases': [
+            {'name': '肝郁气滞', 'type': '气滞证', 'symptoms': '胁肋胀痛，情志不畅，脘腹胀满',
+             'treatment': '疏肝解郁，理气和胃。\n服用柴胡疏肝散、逍遥散等。'},
+            {'name': '肝火上炎', 'type': '实热证', 'symptoms': '头痛眩晕，目赤肿痛，口苦咽干',
+             'treatment': '清肝泻火，平肝潜阳。\n服用龙胆泻肝汤、天麻钩藤饮等。'},
+        ],
+    },
+    {
+        'name': '肺',
+        'category': '五脏',
+        'description': '肺主气，司呼吸，主宣发肃降，开窍于鼻。',
+        'diagnosis': '肺主气，司呼吸。肺气虚弱易导致卫外不固，感受外邪；痰湿内阻则气机不畅。',
+        'treatment': '1. 中药调理：\n- 补肺益气：玉屏风散\n- 止咳化痰：二陈汤\n\n2. 穴位保健：\n- 肺俞、定喘等穴位\n- 配合艾灸调理',
+        'advice': ['注意保暖，预防感冒', '适当运动，增强肺功能', '保持室内空气流通', '戒烟限酒，避免刺激'],
+        'meridians': ['手太阴肺经'],
+        'symptoms': ['咳嗽', '气短', '胸闷', '痰多', '声音嘶哑', '易感冒'],
+        'diseases': [
+            {'name': '感冒', 'type': '风寒证', 'symptoms': '恶寒发热，鼻塞流涕，咳嗽',
+             'treatment': '疏风散寒，宣肺止咳。\n服用桑菊饮、银翘散等。'},
+            {'name': '肺虚', 'type': '气虚证', 'symptoms': '气短乏力，声音低弱，易感冒',
+             'treatment': '补肺益气，固表止汗。\n服用玉屏风散、生脉散等。'},
+        ],
+    },
+    {
+        'name': '胃',
+        'category': '六腑',
+        'description': '胃主受纳、腐熟水谷，以通降为顺。',
+        'diagnosis': '胃主受纳腐熟，和降为顺。胃气虚弱会导致消化功能减退，气机失和则会出现胃痛等症状。',
+        'treatment': '1. 中药调理：\n- 健脾和胃：香砂六君子汤\n- 消化不良：保和丸\n\n2. 穴位保健：\n- 中脘、足三里等穴位\n- 配合艾灸调理',
+        'advice': ['规律饮食，细嚼慢咽', '不要暴饮暴食', '避免过冷过热食物', '保持心情愉悦', '适当运动，促进消化'],
+        'meridians': ['足阳明胃经', '任脉'],
+        'symptoms': ['胃痛', '消化不良', '嗳气', '反酸', '食欲不振', '恶心呕吐'],
+        'diseases': [
+            {'name': '胃痛', 'type': '寒证', 'symptoms': '胃部疼痛，喜温喜按，得食则缓解',
+             'treatment': '温中散寒，和胃止痛。\n服用良姜散、吴茱萸汤等。'},
+            {'name': '胃炎', 'type': '热证', 'symptoms': '胃脘灼痛，口干口苦，大便干结',
+             'treatment': '清胃降火，和中止痛。\n服用清胃散、竹叶石膏汤等。'},
+        ],
+    },
+]
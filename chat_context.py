@@ -0,0 +1,102 @@
+"""
+对话上下文组装
+
+发给模型的上下文只取最近的若干条消息（CHAT_CONTEXT_MESSAGES），并按估算的
+token 数（CHAT_CONTEXT_TOKENS）从最早的一条开始裁剪，查询走
+(conversation_id, created_at, id) 索引，只读取需要的行。
+
+窗口之外的更早消息可以折叠成一段滚动摘要，保存在 ChatConversation.summary，
+summary_until_id 记录摘要已经覆盖到的消息 id。每次只把新滑出窗口的几条消息
+并入摘要，所以对话再长，每条消息的数据库开销和上下文大小也基本不变。
+"""
+
+import re
+
+from extensions import db
+from models import ChatMessage
+from pagination import keyset_paginate
+
+MAX_MESSAGES = 20
+TOKEN_BUDGET = 3000
+SUMMARY_MAX_CHARS = 800
+SUMMARY_LINE_CHARS = 60
+
+_CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+
+def estimate_tokens(text):
+    """粗略估算 token 数：中文约一字一个 token，其余约四个字符一个 token"""
+    text = text or ''
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4 + 4
+
+
+def recent_messages(conversation_id, limit):
+    rows = ChatMessage.query.filter_by(conversation_id=conversation_id)\
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())\
+        .limit(limit).all()
+    rows.reverse()
+    return rows
+
+
+def _summary_line(message):
+    speaker = '用户' if message.role == 'user' else '助手'
+    content = ' '.join((message.content or '').split())
+    if len(content) > SUMMARY_LINE_CHARS:
+        content = content[:SUMMARY_LINE_CHARS] + '…'
+    return '%s：%s' % (speaker, content)
+
+
+def update_summary(conversation, window_start_id):
+    """把 summary_until_id 之后、窗口之前的消息并入滚动摘要"""
+    query = ChatMessage.query.filter(ChatMessage.conversation_id == conversation.id,
+                                     ChatMessage.id < window_start_id)
+    if conversation.summary_until_id:
+        query = query.filter(ChatMessage.id > conversation.summary_until_id)
+    dropped = query.order_by(ChatMessage.id).all()
+    if not dropped:
+        return False
+    lines = [conversation.summary] if conversation.summary else []
+    lines.extend(_summary_line(m) for m in dropped)
+    summary = '\n'.join(lines)
+    if len(summary) > SUMMARY_MAX_CHARS:
+        summary = summary[-SUMMARY_MAX_CHARS:]
+        summary = summary[summary.find('\n') + 1:] if '\n' in summary else summary
+    conversation.summary = summary
+    conversation.summary_until_id = dropped[-1].id
+    return True
+
+
+def build_context(conversation, max_messages=MAX_MESSAGES, token_budget=TOKEN_BUDGET,
+                  summarize=True):
+    """返回发给模型的 [{'role', 'content'}] 列表"""
+    rows = recent_messages(conversation.id, max_messages)
+
+    budget = token_budget
+    if summarize and conversation.summary:
+        budget -= estimate_tokens(conversation.summary)
+    kept = []
+    for message in reversed(rows):
+        cost = estimate_tokens(message.content)
+        if kept and cost > budget:
+            break
+        kept.append(message)
+        budget -= cost
+    kept.reverse()
+
+    messages = [{'role': m.role, 'content': m.content} for m in kept]
+    if summarize and kept:
+        if update_summary(conversation, kept[0].id):
+            db.session.commit()
+        if conversation.summary:
+            messages.insert(0, {
+                'role': 'system',
+                'content': '以下是此前对话的摘要，供参考：\n' + conversation.summary
+            })
+    return messages
+
+
+def history_page(conversation_id, before=None, limit=30):
+    """按时间倒序分页读取历史消息，before 为上一页返回的游标"""
+    query = ChatMessage.query.filter_by(conversation_id=conversation_id)
+    return keyset_paginate(query, ChatMessage, after=before, per_page=limit)
@@ -0,0 +1,180 @@
+"""
+AI 问答服务提供方
+
+按 ChatConfig.api_type 选择提供方，每个提供方实现 stream(messages)，逐段产出模型
+生成的文本。OpenAI、Azure OpenAI 和自定义（OpenAI 兼容）接口都使用
+stream=true 的 Chat Completions，从返回的 SSE 中取出 delta.content；
+mock 提供方不访问网络，直接在本地生成回复，便于开发和测试。
+
+HTTP 请求通过 http_clients 中按接口地址和密钥复用的连接池发出。用户的 ChatConfig
+以只读快照的形式缓存在内存中（get_settings），保存设置时失效。
+
+本地也可以运行 fake_llm_server.py 模拟一个 OpenAI 兼容接口，
+把 api_type 设为 custom、api_endpoint 指向它即可。
+"""
+
+import json
+import time
+from collections import namedtuple
+
+from http_clients import PoolTimeout, clients
+from page_cache import LRUCache
+
+
+class ProviderError(Exception):
+    pass
+
+
+def iter_sse(lines):
+    """把 SSE 文本行解析为每个事件的 data 字符串"""
+    data = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.rstrip('\r\n')
+        if not line:
+            if data:
+                yield '\n'.join(data)
+                data = []
+        elif line.startswith('data:'):
+            data.append(line[5:].lstrip(' '))
+    if data:
+        yield '\n'.join(data)
+
+
+class ChatProvider:
+    def __init__(self, config):
+        self.api_key = config.api_key or ''
+        self.endpoint = (config.api_endpoint or '').rstrip('/')
+        self.model = config.model
+
+    def stream(self, messages):
+        raise NotImplementedError
+
+    def complete(self, messages):
+        return ''.join(self.stream(messages))
+
+
+class OpenAIProvider(ChatProvider):
+    default_endpoint = 'https://api.openai.com/v1'
+    default_model = 'gpt-3.5-turbo'
+
+    def url(self):
+        return (self.endpoint or self.default_endpoint) + '/chat/completions'
+
+    def headers(self):
+        return {'Authorization': 'Bearer ' + self.api_key}
+
+    def payload(self, messages):
+        return {'model': self.model or self.default_model, 'messages': messages, 'stream': True}
+
+    def open(self, messages):
+        headers = {'Content-Type': 'application/json', 'Accept': 'text/event-stream'}
+        headers.update(self.headers())
+        body = json.dumps(self.payload(messages)).encode('utf-8')
+        try:
+            response = clients.request('POST', self.url(), body=body, headers=headers,
+                                       api_key=self.api_key)
+        except PoolTimeout:
+            raise ProviderError('AI 服务繁忙，请稍后再试')
+        except OSError as e:
+            raise ProviderError('无法连接 AI 服务: %s' % e)
+        if response.status >= 400:
+            detail = response.read().decode('utf-8', 'replace')[:200]
+            raise ProviderError('AI 服务返回错误 %s: %s' % (response.status, detail))
+        return response
+
+    def stream(self, messages):
+        response = self.open(messages)
+        try:
+            for data in iter_sse(response.iter_lines()):
+                if data == '[DONE]':
+                    response.drain()
+                    break
+                try:
+                    choices = json.loads(data).get('choices') or [{}]
+                except ValueError:
+                    continue
+                delta = (choices[0].get('delta') or {}).get('content')
+                if delta:
+                    yield delta
+        except OSError as e:
+            raise ProviderError('AI 服务连接中断: %s' % e)
+        finally:
+            response.close()
+
+
+class AzureOpenAIProvider(OpenAIProvider):
+    api_version = '2024-02-01'
+    default_model = 'gpt-35-turbo'
+
+    def url(self):
+        if not self.endpoint:
+            raise ProviderError('请填写 Azure OpenAI 的接口地址')
+        return '%s/openai/deployments/%s/chat/completions?api-version=%s' % (
+            self.endpoint, self.model or self.default_model, self.api_version)
+
+    def headers(self):
+        return {'api-key': self.api_key}
+
+
+class CustomProvider(OpenAIProvider):
+    def url(self):
+        if not self.endpoint:
+            raise ProviderError('请填写自定义接口地址')
+        return self.endpoint + '/chat/completions'
+
+
+class MockProvider(ChatProvider):
+    delay = 0.02
+
+    def stream(self, messages):
+        question = messages[-1]['content'] if messages else ''
+        reply = '（本地模拟回复）您的问题是：“%s”。实际使用时请在设置中配置 AI 服务。' % question
+        for char in reply:
+            if self.delay:
+                time.sleep(self.delay)
+            yield char
+
+
+PROVIDERS = {
+    'openai': OpenAIProvider,
+    'azure': AzureOpenAIProvider,
+    'custom': CustomProvider,
+    'mock': MockProvider,
+}
+
+
+ChatSettings = namedtuple('ChatSettings', 'api_type api_key api_endpoint model model_list')
+
+settings_cache = LRUCache(maxsize=1024, ttl=60)
+
+
+def get_settings(user_id):
+    """返回用户 AI 设置的快照，没有设置时返回 None；结果缓存，保存设置时调用 invalidate_settings"""
+    from models import ChatConfig
+
+    settings = settings_cache.get(user_id)
+    if settings is None:
+        config = ChatConfig.query.filter_by(user_id=user_id).first()
+        if config is None:
+            return None
+        settings = ChatSettings(config.api_type, config.api_key, config.api_endpoint,
+                                config.model, config.model_list)
+        settings_cache.set(user_id, settings)
+    return settings
+
+
+def invalidate_settings(user_id):
+    settings_cache.delete(user_id)
+
+
+def requires_api_key(config):
+    return config.api_type != 'mock'
+
+
+def get_provider(config):
+    provider_class = PROVIDERS.get(config.api_type or 'openai')
+    if provider_class is None:
+        raise ProviderError('不支持的 API 类型: %s' % config.api_type)
+    return provider_class(config)
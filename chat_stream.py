@@ -0,0 +1,85 @@
+"""
+AI 回复的 SSE 流式转发
+
+relay() 是一个生成器：从提供方逐段读取回复，立刻以 text/event-stream 事件转发给浏览器，
+结束时调用一次 on_finish 保存完整回复。事件格式：
+
+    event: start   data: {"stream_id": ...}
+    event: delta   data: {"content": "..."}
+    event: done    data: {"message_id": ..., "status": "done" | "cancelled"}
+    event: error   data: {"message": "..."}
+
+用户可以通过取消接口（见 cancel()）中止生成，浏览器断开连接时生成器被关闭，
+上游连接随之关闭，已生成的部分照常保存。使用 gevent/eventlet 等协程 worker 时，
+读取上游的 socket 操作会让出执行权，一个进程可以同时转发许多对话。
+"""
+
+import json
+import threading
+import uuid
+
+from chat_providers import ProviderError
+
+_active = {}
+_active_lock = threading.Lock()
+
+
+def register(user_id):
+    stream_id = uuid.uuid4().hex
+    cancelled = threading.Event()
+    with _active_lock:
+        _active[stream_id] = (user_id, cancelled)
+    return stream_id, cancelled
+
+
+def cancel(stream_id, user_id):
+    with _active_lock:
+        entry = _active.get(stream_id)
+    if entry is None or entry[0] != user_id:
+        return False
+    entry[1].set()
+    return True
+
+
+def active_count():
+    with _active_lock:
+        return len(_active)
+
+
+def _release(stream_id):
+    with _active_lock:
+        _active.pop(stream_id, None)
+
+
+def sse(event, data):
+    return 'event: %s\ndata: %s\n\n' % (event, json.dumps(data, ensure_ascii=False))
+
+
+def relay(provider, messages, stream_id, cancelled, on_finish):
+    """on_finish(content, status) 在结束时调用一次，返回保存的消息 id（可为 None）"""
+    parts = []
+    status = 'done'
+    error = None
+    tokens = provider.stream(messages)
+    try:
+        yield sse('start', {'stream_id': stream_id})
+        for delta in tokens:
+            if cancelled.is_set():
+                status = 'cancelled'
+                break
+            parts.append(delta)
+            yield sse('delta', {'content': delta})
+    except GeneratorExit:
+        status = 'disconnected'
+        raise
+    except ProviderError as e:
+        status = 'error'
+        error = str(e)
+    finally:
+        tokens.close()
+        _release(stream_id)
+        message_id = on_finish(''.join(parts), status)
+
+    if error:
+        yield sse('error', {'message': error})
+    yield sse('done', {'message_id': message_id, 'status': status})
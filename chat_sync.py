@@ -0,0 +1,121 @@
+"""
+对话列表的分页与增量同步
+
+侧边栏只需要对话的 id、标题和时间，这里只查询这几列，查询走
+(user_id, updated_at, id) 复合索引。首次加载按 updated_at 倒序分页；之后客户端带上
+上次返回的 sync_token 轮询，只取此后更新过的对话和删除记录（ChatConversationTombstone）。
+
+list_version() 只用一条走索引的聚合查询算出列表版本，用作 ETag，
+列表没有变化时接口直接返回 304，不再查询和序列化任何对话。
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, tuple_
+
+from extensions import db
+from models import ChatConversation, ChatConversationTombstone
+from pagination import decode_cursor, encode_cursor
+
+PAGE_SIZE = 50
+DELTA_LIMIT = 200
+TOMBSTONE_DAYS = 30
+
+LIST_COLUMNS = (
+    ChatConversation.id,
+    ChatConversation.title,
+    ChatConversation.created_at,
+    ChatConversation.updated_at,
+)
+
+
+def _to_dict(row):
+    return {
+        'id': row.id,
+        'title': row.title,
+        'created_at': row.created_at.isoformat(),
+        'updated_at': row.updated_at.isoformat()
+    }
+
+
+def _key(row):
+    return row.updated_at, row.id
+
+
+def list_version(user_id):
+    """对话数和最近更新时间；新建、更新、删除都会改变它"""
+    count, latest = db.session.query(func.count(ChatConversation.id),
+                                     func.max(ChatConversation.updated_at))\
+        .filter(ChatConversation.user_id == user_id).one()
+    return '%d-%s' % (count, latest.isoformat() if latest else '')
+
+
+def _latest_token(user_id):
+    row = db.session.query(ChatConversation.updated_at, ChatConversation.id)\
+        .filter(ChatConversation.user_id == user_id)\
+        .order_by(ChatConversation.updated_at.desc(), ChatConversation.id.desc()).first()
+    return encode_cursor(*row) if row else encode_cursor(datetime.utcnow(), 0)
+
+
+def list_page(user_id, cursor=None, limit=PAGE_SIZE):
+    """按最近更新倒序返回一页对话；第一页同时返回用于后续增量同步的 sync_token"""
+    limit = max(1, min(limit, DELTA_LIMIT))
+    query = db.session.query(*LIST_COLUMNS).filter(ChatConversation.user_id == user_id)
+    after = decode_cursor(cursor)
+    if after is not None:
+        query = query.filter(tuple_(ChatConversation.updated_at, ChatConversation.id) < after)
+    rows = query.order_by(ChatConversation.updated_at.desc(), ChatConversation.id.desc())\
+        .limit(limit + 1).all()
+    items = rows[:limit]
+    result = {
+        'conversations': [_to_dict(row) for row in items],
+        'next_cursor': encode_cursor(*_key(items[-1])) if len(rows) > limit else None,
+    }
+    if after is None:
+        result['sync_token'] = encode_cursor(*_key(items[0])) if items else _latest_token(user_id)
+    return result
+
+
+def changes_since(user_id, token, limit=DELTA_LIMIT):
+    """返回 token 之后更新的对话和删除的对话 id；token 过旧或无效时返回 reset，客户端应重新全量加载"""
+    since = decode_cursor(token)
+    if since is None or since[0] < datetime.utcnow() - timedelta(days=TOMBSTONE_DAYS):
+        return {'reset': True}
+    limit = max(1, min(limit, DELTA_LIMIT))
+
+    rows = db.session.query(*LIST_COLUMNS)\
+        .filter(ChatConversation.user_id == user_id,
+                tuple_(ChatConversation.updated_at, ChatConversation.id) > since)\
+        .order_by(ChatConversation.updated_at.asc(), ChatConversation.id.asc())\
+        .limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    deleted = db.session.query(ChatConversationTombstone.conversation_id,
+                               ChatConversationTombstone.deleted_at)\
+        .filter(ChatConversationTombstone.user_id == user_id,
+                ChatConversationTombstone.deleted_at > since[0]).all()
+
+    latest = _key(rows[-1]) if rows else since
+    if not has_more and deleted:
+        last_deleted = max(d.deleted_at for d in deleted)
+        if last_deleted > latest[0]:
+            latest = (last_deleted, 0)
+    return {
+        'conversations': [_to_dict(row) for row in rows],
+        'deleted': [d.conversation_id for d in deleted],
+        'sync_token': encode_cursor(*latest),
+        'has_more': has_more,
+    }
+
+
+def record_deletion(conversation):
+    """删除对话时调用（在同一事务中），同时清理过期的删除记录"""
+    now = datetime.utcnow()
+    db.session.add(ChatConversationTombstone(user_id=conversation.user_id,
+                                             conversation_id=conversation.id,
+                                             deleted_at=now))
+    ChatConversationTombstone.query.filter(
+        ChatConversationTombstone.user_id == conversation.user_id,
+        ChatConversationTombstone.deleted_at < now - timedelta(days=TOMBSTONE_DAYS)
+    ).delete(synchronize_session=False)
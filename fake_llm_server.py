@@ -0,0 +1,108 @@
+"""
+本地模拟的 OpenAI 兼容接口，用于开发、测试和压测 AI 问答
+
+    python fake_llm_server.py --port 8001 --delay 0.05
+
+然后在 AI 问答设置中选择“自定义”，接口地址填 http://127.0.0.1:8001/v1。
+支持 POST /v1/chat/completions（stream 为 true 时按 SSE 逐字返回）和 GET /v1/models。
+使用 HTTP/1.1 keep-alive 和分块传输，行为与真实服务一致。
+"""
+
+import argparse
+import json
+import socket
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = ('中医认为，人体是一个有机的整体，脏腑经络相互联系。'
+         '调理时应当辨证施治，结合饮食起居、情志和运动综合调养。')
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    delay = 0.05
+    reply = REPLY
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'fake-model', 'object': 'model'}]})
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send_json(400, {'error': {'message': 'invalid json'}})
+        if not self.path.split('?')[0].endswith('/chat/completions'):
+            return self._send_json(404, {'error': {'message': 'not found'}})
+
+        completion_id = 'chatcmpl-' + uuid.uuid4().hex[:12]
+        model = request.get('model') or 'fake-model'
+        if not request.get('stream'):
+            return self._send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': self.reply}}],
+            })
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for char in self.reply:
+                if self.delay:
+                    time.sleep(self.delay)
+                chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'model': model,
+                         'choices': [{'index': 0, 'delta': {'content': char}, 'finish_reason': None}]}
+                self._write_chunk('data: %s\n\n' % json.dumps(chunk, ensure_ascii=False))
+            self._write_chunk('data: [DONE]\n\n')
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端取消了生成
+            self.close_connection = True
+
+
+def make_server(host='127.0.0.1', port=8001, delay=0.05):
+    handler = type('Handler', (FakeLLMHandler,), {'delay': delay})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='本地模拟 OpenAI 兼容接口')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0.05, help='每个字之间的延迟（秒）')
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.delay)
+    print(f"Fake LLM server listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,320 @@
+"""
+AI 服务的 HTTP 连接池
+
+每个 (接口地址, api_key) 对应一个连接池，连接保持 keep-alive 复用，省去每条消息
+重新建立 TCP/TLS 连接的开销。接口地址和 api_key 都来自用户设置，连接池本身放在
+有上限的 LRU 缓存里（最多 CHAT_MAX_POOLS 个，创建 CHAT_POOL_TTL 秒后过期重建），被淘汰的
+连接池在手上的请求结束后关闭全部连接。连接池限制同时进行的请求数，超过时排队等待，
+等待超时则报错；遇到 429 和 5xx 按指数退避（优先遵循 Retry-After）重试。
+
+安装了 httpx（以及 h2）时改用 httpx.Client，可以走 HTTP/2；否则使用标准库
+http.client 实现的 HTTP/1.1 连接池。
+"""
+
+import http.client
+import random
+import socket
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+from page_cache import LRUCache
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledResponse:
+    """对上游响应的统一包装：status、read()、iter_lines()、close()"""
+
+    def __init__(self, response, release):
+        self._response = response
+        self._release = release
+        self.status = response.status
+        self.headers = response.headers
+
+    def read(self):
+        try:
+            return self._response.read()
+        finally:
+            self.close()
+
+    def iter_lines(self):
+        while True:
+            line = self._response.readline()
+            if not line:
+                break
+            yield line
+
+    def drain(self, limit=65536):
+        """读完剩余的少量数据（如分块结束标记）再关闭，使连接可以放回池中复用"""
+        try:
+            self._response.read(limit)
+        except OSError:
+            pass
+        self.close()
+
+    def close(self):
+        if self._release is not None:
+            release, self._release = self._release, None
+            release(self._response)
+
+
+class ConnectionPool:
+    """标准库实现的 HTTP/1.1 keep-alive 连接池"""
+
+    def __init__(self, scheme, host, port, maxsize=10, connect_timeout=10,
+                 read_timeout=60, pool_timeout=30, keepalive_expiry=60):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_timeout = pool_timeout
+        self.keepalive_expiry = keepalive_expiry
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxsize)
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+
+    def _new_connection(self):
+        self.created += 1
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.connect_timeout,
+                                               context=ssl.create_default_context())
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout)
+
+    def _checkout(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, idle_since = self._idle.pop()
+                if now - idle_since < self.keepalive_expiry:
+                    self.reused += 1
+                    return conn, True
+                conn.close()
+        return self._new_connection(), False
+
+    def _checkin(self, conn, response):
+        with self._lock:
+            reuse = response.isclosed() and not response.will_close and not self._closed
+            if reuse:
+                self._idle.append((conn, time.monotonic()))
+        if not reuse:
+            conn.close()
+        self._slots.release()
+
+    def request(self, method, path, body=None, headers=None):
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise PoolTimeout('连接池已满，等待超时')
+        try:
+            conn, reused = self._checkout()
+            try:
+                response = self._send(conn, method, path, body, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # 复用的连接可能已被服务端关闭，换一条新连接重试一次
+                conn.close()
+                if not reused:
+                    raise
+                conn = self._new_connection()
+                response = self._send(conn, method, path, body, headers)
+        except BaseException:
+            self._slots.release()
+            raise
+        return PooledResponse(response, lambda resp: self._checkin(conn, resp))
+
+    def _send(self, conn, method, path, body, headers):
+        conn.timeout = self.connect_timeout
+        if conn.sock is None:
+            conn.connect()
+            # 流式响应由大量小包组成，关闭 Nagle 算法避免与延迟确认叠加产生额外等待
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.sock.settimeout(self.read_timeout)
+        conn.request(method, path, body=body, headers=headers or {})
+        return conn.getresponse()
+
+    def close(self):
+        """关闭空闲连接；正在使用的连接在用完放回时关闭"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            idle = len(self._idle)
+        return {'idle': idle, 'created': self.created, 'reused': self.reused}
+
+
+class HttpxPool:
+    """httpx 实现，支持 HTTP/2"""
+
+    def __init__(self, scheme, host, port, maxsize=10, connect_timeout=10,
+                 read_timeout=60, pool_timeout=30, keepalive_expiry=60):
+        self.base_url = '%s://%s:%s' % (scheme, host, port)
+        self._active = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._client = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=maxsize, max_keepalive_connections=maxsize,
+                                keepalive_expiry=keepalive_expiry),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=pool_timeout))
+
+    def request(self, method, path, body=None, headers=None):
+        request = self._client.build_request(method, self.base_url + path,
+                                             content=body, headers=headers)
+        with self._lock:
+            # 从缓存取出后恰好被淘汰并关闭的连接池
+            if self._client.is_closed:
+                raise OSError('连接池已关闭')
+            self._active += 1
+        try:
+            response = self._client.send(request, stream=True)
+        except BaseException as e:
+            self._release()
+            if isinstance(e, httpx.PoolTimeout):
+                raise PoolTimeout('连接池已满，等待超时')
+            if isinstance(e, httpx.TransportError):
+                raise OSError(str(e))
+            raise
+        return _HttpxResponse(response, self._release)
+
+    def _release(self):
+        with self._lock:
+            self._active -= 1
+            close = self._closed and not self._active
+        if close:
+            self._client.close()
+
+    def close(self):
+        """没有进行中的请求时立即关闭，否则等最后一个响应关闭后再关闭"""
+        with self._lock:
+            self._closed = True
+            close = not self._active
+        if close:
+            self._client.close()
+
+    def stats(self):
+        return {'http2': HTTP2_AVAILABLE}
+
+
+class _HttpxResponse(PooledResponse):
+    def __init__(self, response, release):
+        self._response = response
+        self._release = release
+        self.status = response.status_code
+        self.headers = response.headers
+
+    def read(self):
+        try:
+            return self._response.read()
+        finally:
+            self.close()
+
+    def iter_lines(self):
+        for line in self._response.iter_lines():
+            yield line + '\n'
+
+    def drain(self, limit=65536):
+        self.close()
+
+    def close(self):
+        self._response.close()
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+def _close_pool(pool):
+    pool.close()
+
+
+class ClientManager:
+    def __init__(self):
+        self.maxsize = 10
+        self.connect_timeout = 10
+        self.read_timeout = 60
+        self.pool_timeout = 30
+        self.max_retries = 3
+        self.backoff = 0.5
+        self._pools = LRUCache(maxsize=64, ttl=600, on_evict=_close_pool)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('CHAT_POOL_SIZE', self.maxsize)
+        self.connect_timeout = app.config.get('CHAT_CONNECT_TIMEOUT', self.connect_timeout)
+        self.read_timeout = app.config.get('CHAT_READ_TIMEOUT', self.read_timeout)
+        self.max_retries = app.config.get('CHAT_MAX_RETRIES', self.max_retries)
+        self._pools.maxsize = app.config.get('CHAT_MAX_POOLS', self._pools.maxsize)
+        self._pools.ttl = app.config.get('CHAT_POOL_TTL', self._pools.ttl)
+
+    def pool_for(self, url, api_key=''):
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'https'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port, api_key)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool_class = HttpxPool if httpx is not None else ConnectionPool
+                pool = pool_class(scheme, parts.hostname, port, maxsize=self.maxsize,
+                                  connect_timeout=self.connect_timeout,
+                                  read_timeout=self.read_timeout,
+                                  pool_timeout=self.pool_timeout)
+                self._pools.set(key, pool)
+        return pool
+
+    def request(self, method, url, body=None, headers=None, api_key=''):
+        """发送请求，429/5xx 时退避重试；返回的响应用完后必须 close()"""
+        pool = self.pool_for(url, api_key)
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        attempt = 0
+        while True:
+            response = pool.request(method, path, body=body, headers=headers)
+            if response.status not in RETRY_STATUSES or attempt >= self.max_retries:
+                return response
+            delay = self._retry_delay(response, attempt)
+            response.read()
+            time.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, response, attempt):
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(float(retry_after), 30)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) * (1 + random.random() / 2)
+
+    def close(self):
+        self._pools.clear()
+
+    def stats(self):
+        pools = self._pools.items()
+        return [dict(pool.stats(), url='%s://%s:%s' % key[:3]) for key, pool in pools]
+
+
+clients = ClientManager()
@@ -0,0 +1,75 @@
+"""
+界面翻译
+
+启动时把 translations.py 中的词条编译成每种语言一个只读目录：缺少的词条用默认语言
+（中文）补齐，复数词条按语言的复数规则整理好。每个请求只在第一次取词时读取一次
+会话中的语言，之后的 get_text 都是一次字典查找。
+
+词条的值可以是字符串，也可以是按复数形式排列的元组（gettext 的 ngettext 规则，
+如英文 ('{} result found', '{} results found')）。字符串中的 {} 占位符用
+str.format 填充：
+
+    get_text('results_count')                 # 原样返回
+    ngettext('results_count', 3)              # 按数量选形式并把 3 填入 {}
+"""
+
+from types import MappingProxyType
+
+from flask import g, has_request_context, session
+
+from translations import translations
+
+DEFAULT_LANGUAGE = 'zh'
+
+# 语言 -> 根据数量返回复数形式下标的函数
+PLURAL_RULES = {
+    'zh': lambda n: 0,
+    'en': lambda n: 0 if n == 1 else 1,
+}
+
+
+def compile_catalogs(source, default=DEFAULT_LANGUAGE):
+    base = source.get(default, {})
+    catalogs = {}
+    for lang, entries in source.items():
+        merged = dict(base)
+        merged.update(entries)
+        catalogs[lang] = MappingProxyType({
+            key: tuple(value) if isinstance(value, (list, tuple)) else value
+            for key, value in merged.items()
+        })
+    return MappingProxyType(catalogs)
+
+
+catalogs = compile_catalogs(translations)
+
+
+def current_language():
+    if not has_request_context():
+        return DEFAULT_LANGUAGE
+    lang = g.get('language')
+    if lang is None:
+        # 切换语言时写入的是 session['language']，兼容早期的 session['lang']
+        lang = session.get('language') or session.get('lang') or DEFAULT_LANGUAGE
+        if lang not in catalogs:
+            lang = DEFAULT_LANGUAGE
+        g.language = lang
+    return lang
+
+
+def get_text(key, lang=None):
+    value = catalogs[lang or current_language()].get(key, key)
+    return value[0] if isinstance(value, tuple) else value
+
+
+def ngettext(key, n, lang=None, **kwargs):
+    lang = lang or current_language()
+    value = catalogs[lang].get(key, key)
+    if isinstance(value, tuple):
+        index = PLURAL_RULES.get(lang, PLURAL_RULES['en'])(n)
+        value = value[min(index, len(value) - 1)]
+    return value.format(n, **kwargs)
+
+
+def init_app(app):
+    app.jinja_env.globals.update(get_text=get_text, ngettext=ngettext)
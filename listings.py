@@ -0,0 +1,81 @@
+"""
+文章列表查询
+
+列表页只需要标题、摘要、作者名等少数几列。这里用一条 JOIN 查询把作者名一起取出，
+只选列表需要的列（没有摘要时显示保存时生成的 excerpt，见 article_render.py），
+结果包装成轻量的 ArticleRow，避免为每篇文章单独查询作者、也不读取正文。
+
+ArticleRow 的属性名与 Article 保持一致（包括 article.author.username），
+模板可以不加修改地使用。
+"""
+
+from collections import namedtuple
+
+from extensions import db
+from models import Article, User
+
+AuthorRef = namedtuple('AuthorRef', 'id username')
+
+LIST_COLUMNS = (
+    Article.id,
+    Article.title,
+    Article.summary,
+    Article.excerpt,
+    Article.reading_time,
+    Article.category,
+    Article.tags,
+    Article.views,
+    Article.created_at,
+    Article.updated_at,
+    Article.published,
+    Article.author_id,
+    User.username.label('author_name'),
+)
+
+
+class ArticleRow:
+    __slots__ = ('id', 'title', 'summary', 'excerpt', 'reading_time', 'category', 'tags', 'views',
+                 'created_at', 'updated_at', 'published', 'author')
+
+    def __init__(self, row):
+        self.id = row.id
+        self.title = row.title
+        self.summary = row.summary
+        self.excerpt = row.excerpt or ''
+        self.reading_time = row.reading_time
+        self.category = row.category
+        self.tags = row.tags
+        self.views = row.views
+        self.created_at = row.created_at
+        self.updated_at = row.updated_at
+        self.published = row.published
+        self.author = AuthorRef(row.author_id, row.author_name)
+
+    @property
+    def author_id(self):
+        return self.author.id
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'summary': self.summary,
+            'excerpt': self.excerpt,
+            'reading_time': self.reading_time,
+            'category': self.category,
+            'tags': self.tags.split(',') if self.tags else [],
+            'views': self.views,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'published': self.published,
+            'author': self.author.username
+        }
+
+
+def article_list_query():
+    """返回只含列表列的查询，作者通过 JOIN 一并取出；筛选条件请用 Article.xxx 表达式"""
+    return db.session.query(*LIST_COLUMNS).join(User, Article.author_id == User.id)
+
+
+def to_rows(rows):
+    return [ArticleRow(row) for row in rows]
@@ -0,0 +1,257 @@
+"""
+请求性能统计
+
+每个请求结束时按端点（视图函数名）记录：
+
+    耗时直方图      Prometheus 风格的固定分桶计数，另保留最近 RECENT_SIZE 次耗时算分位数
+    SQL 次数和耗时  通过 Engine 的 before/after_cursor_execute 事件累加到当前请求
+    模板渲染耗时    取 templating.py 累加在 g.render_time 上的值（需开启 RENDER_TIMING）
+
+超过 METRICS_SLOW_QUERY_MS 毫秒的 SQL 连同发起它的端点记入慢查询日志（不记录参数），
+后台线程中的查询端点为空。按 METRICS_PROFILE_RATE 的比例抽样对请求做 cProfile，
+保留累计耗时最多的若干个函数。慢查询和抽样结果都放在固定长度的环形缓冲区里，
+全部数据只在进程内存中，重启后清零；多个 worker 各自统计。
+
+管理员在 /admin/metrics 查看，/metrics 以 Prometheus 文本格式输出。
+"""
+
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 直方图分桶上限（秒）
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SIZE = 200
+STATEMENT_LENGTH = 500
+PROFILE_LINES = 25
+
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.recent = deque(maxlen=RECENT_SIZE)
+
+    def add(self, duration, status, sql_count, sql_time, render_time):
+        self.count += 1
+        if status >= 500:
+            self.errors += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.sql_count += sql_count
+        self.sql_time += sql_time
+        self.render_time += render_time
+        self.recent.append(duration)
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    def __init__(self):
+        self.slow_query_ms = 100
+        self.profile_rate = 0.0
+        self.started_at = datetime.utcnow()
+        self.slow_queries = deque(maxlen=200)
+        self.profiles = deque(maxlen=20)
+        self.slow_query_total = 0
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.slow_query_ms = app.config.get('METRICS_SLOW_QUERY_MS', self.slow_query_ms)
+        self.profile_rate = app.config.get('METRICS_PROFILE_RATE', self.profile_rate)
+        self.slow_queries = deque(maxlen=app.config.get('METRICS_SLOW_QUERY_LOG', self.slow_queries.maxlen))
+        self.profiles = deque(maxlen=app.config.get('METRICS_PROFILE_LOG', self.profiles.maxlen))
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+    # 请求
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        # 同一时间只抽样一个请求，避免多个线程的 profiler 互相干扰
+        if self.profile_rate and random.random() < self.profile_rate \
+                and self._profile_lock.acquire(blocking=False):
+            g.metrics_profiler = cProfile.Profile()
+            g.metrics_profiler.enable()
+
+    def _after_request(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _teardown_request(self, exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        status = 500 if exc is not None else g.get('metrics_status', 200)
+        profiler = g.pop('metrics_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self._profile_lock.release()
+            self._save_profile(profiler, endpoint, duration)
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.add(duration, status, g.get('sql_count', 0), g.get('sql_time', 0.0),
+                      g.get('render_time', 0.0))
+
+    def _save_profile(self, profiler, endpoint, duration):
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        self.profiles.append({
+            'time': datetime.utcnow(),
+            'endpoint': endpoint,
+            'path': request.full_path.rstrip('?'),
+            'duration': duration,
+            'stats': out.getvalue().strip(),
+        })
+
+    # SQL
+    def record_query(self, statement, duration):
+        in_request = has_request_context() and 'metrics_started' in g
+        if in_request:
+            g.sql_count += 1
+            g.sql_time += duration
+        if duration * 1000 >= self.slow_query_ms:
+            self.slow_query_total += 1
+            self.slow_queries.append({
+                'time': datetime.utcnow(),
+                'endpoint': request.endpoint if in_request else None,
+                'duration': duration,
+                'statement': ' '.join(statement.split())[:STATEMENT_LENGTH],
+            })
+
+    # 输出
+    def snapshot(self):
+        """返回按总耗时排序的各端点统计，供管理页面显示"""
+        with self._lock:
+            items = [(name, stats, sorted(stats.recent)) for name, stats in self._endpoints.items()]
+        rows = []
+        for name, stats, recent in items:
+            count = stats.count or 1
+            rows.append({
+                'endpoint': name,
+                'count': stats.count,
+                'errors': stats.errors,
+                'total': stats.total,
+                'avg': stats.total / count,
+                'p50': _percentile(recent, 0.5),
+                'p95': _percentile(recent, 0.95),
+                'max': stats.max,
+                'sql_count': stats.sql_count / count,
+                'sql_time': stats.sql_time / count,
+                'render_time': stats.render_time / count,
+            })
+        rows.sort(key=lambda row: row['total'], reverse=True)
+        return {
+            'started_at': self.started_at,
+            'endpoints': rows,
+            'slow_queries': list(reversed(self.slow_queries)),
+            'profiles': list(reversed(self.profiles)),
+            'slow_query_ms': self.slow_query_ms,
+            'profile_rate': self.profile_rate,
+        }
+
+    def prometheus(self):
+        with self._lock:
+            items = sorted((name, stats.count, stats.errors, stats.total, list(stats.buckets),
+                            stats.sql_count, stats.sql_time, stats.render_time)
+                           for name, stats in self._endpoints.items())
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by endpoint.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for name, count, _, total, buckets, _, _, _ in items:
+            label = _label(name)
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                lines.append('http_request_duration_seconds_bucket{endpoint="%s",le="%s"} %d'
+                             % (label, bound, cumulative))
+            lines.append('http_request_duration_seconds_bucket{endpoint="%s",le="+Inf"} %d' % (label, count))
+            lines.append('http_request_duration_seconds_sum{endpoint="%s"} %.6f' % (label, total))
+            lines.append('http_request_duration_seconds_count{endpoint="%s"} %d' % (label, count))
+        counters = (
+            ('http_request_errors_total', 'Requests that ended with a 5xx status.', 2, '%d'),
+            ('db_queries_total', 'SQL statements executed while handling requests.', 5, '%d'),
+            ('db_query_duration_seconds_total', 'Time spent in SQL while handling requests.', 6, '%.6f'),
+            ('template_render_seconds_total', 'Time spent rendering templates.', 7, '%.6f'),
+        )
+        for metric, help_text, column, fmt in counters:
+            lines.append('# HELP %s %s' % (metric, help_text))
+            lines.append('# TYPE %s counter' % metric)
+            for item in items:
+                lines.append(('%s{endpoint="%s"} ' + fmt) % (metric, _label(item[0]), item[column]))
+        lines += [
+            '# HELP db_slow_queries_total SQL statements slower than the slow query threshold.',
+            '# TYPE db_slow_queries_total counter',
+            'db_slow_queries_total %d' % self.slow_query_total,
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+        self.slow_queries.clear()
+        self.profiles.clear()
+        self.slow_query_total = 0
+        self.started_at = datetime.utcnow()
+
+
+metrics = Metrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_query_started')
+    if started:
+        metrics.record_query(statement, time.perf_counter() - started.pop())
+
+
+def _handle_error(context):
+    started = context.connection.info.get('metrics_query_started') if context.connection else None
+    if started:
+        started.pop()
@@ -0,0 +1,29 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app import app, db
+from models import AboutSection, AboutVersion
+
+def upgrade_database():
+    # 关于页面章节增加版本号，并创建记录当前版本的 about_version 表
+    with app.app_context():
+        columns = [c['name'] for c in inspect(db.engine).get_columns('about_section')] \
+            if inspect(db.engine).has_table('about_section') else None
+        if columns is not None and 'version' not in columns:
+            with db.engine.begin() as conn:
+                conn.execute(text('ALTER TABLE about_section ADD COLUMN version INTEGER NOT NULL DEFAULT 1'))
+        db.create_all()
+        for index in AboutSection.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+        if db.session.get(AboutVersion, 1) is None:
+            # 已有的章节作为第 1 版
+            has_sections = db.session.query(AboutSection.id).first() is not None
+            db.session.add(AboutVersion(id=1, version=1 if has_sections else 0))
+            db.session.commit()
+        print("About section versions added.")
+
+if __name__ == '__main__':
+    upgrade_database()
@@ -0,0 +1,29 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app import app, db
+from article_render import render_all
+
+COLUMNS = (
+    ('content_html', 'TEXT'),
+    ('toc', 'TEXT'),
+    ('excerpt', 'VARCHAR(300)'),
+    ('reading_time', 'INTEGER'),
+)
+
+def upgrade_database():
+    # 为文章补建保存时生成的 HTML、目录、摘录和阅读时间字段，并处理现有文章
+    with app.app_context():
+        columns = {c['name'] for c in inspect(db.engine).get_columns('article')}
+        with db.engine.begin() as conn:
+            for name, type_ in COLUMNS:
+                if name not in columns:
+                    conn.execute(text('ALTER TABLE article ADD COLUMN %s %s' % (name, type_)))
+        count = render_all()
+        print(f"Rendered {count} articles.")
+
+if __name__ == '__main__':
+    upgrade_database()
@@ -0,0 +1,23 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app import app, db
+from models import Article
+
+def upgrade_database():
+    # 为文章补建批量导入导出使用的 slug 字段及唯一索引
+    with app.app_context():
+        columns = {c['name'] for c in inspect(db.engine).get_columns('article')}
+        if 'slug' not in columns:
+            with db.engine.begin() as conn:
+                conn.execute(text('ALTER TABLE article ADD COLUMN slug VARCHAR(100)'))
+        for index in Article.__table__.indexes:
+            if index.name == 'ix_article_slug':
+                index.create(bind=db.engine, checkfirst=True)
+        print("Article slug column added successfully!")
+
+if __name__ == '__main__':
+    upgrade_database()
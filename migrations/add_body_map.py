@@ -0,0 +1,97 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app import app, db
+from body_map import TABLES, incompatible_tables, seed_defaults
+from models import Acupoint, Organ, OrganDisease
+
+# 早期版本的图谱表，结构与现在的模型不同
+LEGACY_TABLES = ('organ', 'disease', 'acupoint', 'symptom')
+
+def rename_legacy_tables():
+    """把旧结构的图谱表改名为 legacy_*，返回改名的表"""
+    if not incompatible_tables(db.engine):
+        return []
+    existing = set(inspect(db.engine).get_table_names())
+    renamed = []
+    with db.engine.begin() as conn:
+        for name in LEGACY_TABLES:
+            if name in existing and 'legacy_' + name not in existing:
+                conn.execute(text('ALTER TABLE "%s" RENAME TO "legacy_%s"' % (name, name)))
+                renamed.append(name)
+        # init_db 可能已在旧表旁建好了 organ_disease 等新表，改名后它们的外键也跟着
+        # 指向了 legacy_* 表；这些表还没有写入过数据，删掉后由 create_all 重建
+        inspector = inspect(conn)
+        for table in TABLES:
+            if table.name not in existing or table.name in renamed:
+                continue
+            referred = {fk['referred_table'] for fk in inspector.get_foreign_keys(table.name)}
+            if any(name.startswith('legacy_') for name in referred) and \
+                    conn.execute(text('SELECT 1 FROM "%s" LIMIT 1' % table.name)).first() is None:
+                conn.execute(text('DROP TABLE "%s"' % table.name))
+    return renamed
+
+def _rows(table, columns):
+    if not inspect(db.engine).has_table(table):
+        return []
+    return db.session.execute(text('SELECT %s FROM %s ORDER BY id' % (columns, table))).mappings().all()
+
+def import_legacy_data():
+    """把旧表中默认数据里没有的脏腑、病症和穴位补进新表，旧表原样保留"""
+    organs = {organ.name: organ for organ in Organ.query}
+    legacy_organs = {}
+    for row in _rows('legacy_organ', 'id, name, description'):
+        name = row['name'][:50]
+        if name not in organs:
+            organs[name] = Organ(name=name, description=row['description'], sort_order=len(organs))
+            db.session.add(organs[name])
+        legacy_organs[row['id']] = organs[name]
+
+    symptoms = {}
+    for row in _rows('legacy_symptom', 'disease_id, description, treatment'):
+        entry = symptoms.setdefault(row['disease_id'], ([], []))
+        entry[0].append(row['description'])
+        if row['treatment']:
+            entry[1].append(row['treatment'])
+    for row in _rows('legacy_disease', 'id, name, description, organ_id'):
+        organ = legacy_organs.get(row['organ_id'])
+        if organ is None or any(d.name == row['name'] for d in organ.diseases):
+            continue
+        descriptions, treatments = symptoms.get(row['id'], ([], []))
+        organ.diseases.append(OrganDisease(
+            name=row['name'][:50],
+            symptoms='\n'.join(descriptions) or row['description'],
+            treatment='\n'.join(treatments) or None,
+            sort_order=len(organ.diseases)))
+
+    acupoints = {name for (name,) in db.session.query(Acupoint.name)}
+    for row in _rows('legacy_acupoint', 'name, location, function, massage_method'):
+        name = row['name'][:50]
+        if name in acupoints:
+            continue
+        acupoints.add(name)
+        indications = '\n'.join(part for part in (row['function'], row['massage_method']) if part)
+        db.session.add(Acupoint(name=name, location=row['location'], indications=indications or None))
+    db.session.commit()
+
+def upgrade_database():
+    # 旧版图谱表改名保留，创建人体图谱的脏腑、经络、症状、穴位表并写入默认数据，
+    # 再补入旧表中的数据
+    with app.app_context():
+        renamed = rename_legacy_tables()
+        if renamed:
+            print("Legacy tables renamed: " + ', '.join('legacy_' + name for name in renamed))
+        db.create_all()
+        if seed_defaults():
+            print("Body map tables created and seeded.")
+        else:
+            print("Body map tables already contain data.")
+        if inspect(db.engine).has_table('legacy_organ'):
+            import_legacy_data()
+            print("Legacy body map data imported.")
+
+if __name__ == '__main__':
+    upgrade_database()
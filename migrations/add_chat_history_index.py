@@ -0,0 +1,25 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app import app, db
+from models import ChatMessage
+
+def upgrade_database():
+    # 为聊天记录补建 (conversation_id, created_at, id) 索引和滚动摘要字段
+    with app.app_context():
+        db.create_all()
+        columns = {c['name'] for c in inspect(db.engine).get_columns('chat_conversation')}
+        with db.engine.begin() as conn:
+            if 'summary' not in columns:
+                conn.execute(text('ALTER TABLE chat_conversation ADD COLUMN summary TEXT'))
+            if 'summary_until_id' not in columns:
+                conn.execute(text('ALTER TABLE chat_conversation ADD COLUMN summary_until_id INTEGER'))
+        for index in ChatMessage.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+        print("Chat history schema upgraded successfully!")
+
+if __name__ == '__main__':
+    upgrade_database()
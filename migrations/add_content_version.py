@@ -0,0 +1,14 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+
+def upgrade_database():
+    # 创建 content_version 表，症状检索按其中的版本号判断索引是否过期
+    with app.app_context():
+        db.create_all()
+        print("Content version table ready.")
+
+if __name__ == '__main__':
+    upgrade_database()
@@ -0,0 +1,17 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import ChatConversation
+
+def upgrade_database():
+    # 补建对话列表的 (user_id, updated_at, id) 索引和删除记录表
+    with app.app_context():
+        db.create_all()
+        for index in ChatConversation.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+            print(f"Index {index.name} ready.")
+
+if __name__ == '__main__':
+    upgrade_database()
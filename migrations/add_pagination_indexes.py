@@ -0,0 +1,25 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import User, Article
+
+# 只建这里列出的索引，模型上后来增加的索引由各自的迁移负责（所需的列可能还不存在）
+INDEXES = {
+    User: ('ix_user_created_at_id',),
+    Article: ('ix_article_created_at_id', 'ix_article_published_created_at_id',
+              'ix_article_category_created_at_id'),
+}
+
+def upgrade_database():
+    # 为已有数据库补建键集分页用的 (created_at, id) 复合索引
+    with app.app_context():
+        for model, names in INDEXES.items():
+            for index in model.__table__.indexes:
+                if index.name in names:
+                    index.create(bind=db.engine, checkfirst=True)
+                    print(f"Index {index.name} ready.")
+
+if __name__ == '__main__':
+    upgrade_database()
@@ -0,0 +1,16 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from related_articles import rebuild_related
+
+def upgrade_database():
+    # 创建相关阅读使用的词向量、idf 和相似文章表，并对现有文章做一次全量计算
+    with app.app_context():
+        db.create_all()
+        count = rebuild_related()
+        print(f"Related articles computed for {count} articles.")
+
+if __name__ == '__main__':
+    upgrade_database()
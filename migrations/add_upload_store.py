@@ -0,0 +1,14 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+
+def upgrade_database():
+    # 创建内容寻址上传所需的 upload_blob 和 user_upload 表
+    with app.app_context():
+        db.create_all()
+        print("Upload tables ready.")
+
+if __name__ == '__main__':
+    upgrade_database()
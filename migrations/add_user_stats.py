@@ -0,0 +1,21 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import Article
+from user_stats import rebuild_user_stats
+
+def upgrade_database():
+    # 创建 user_stats 汇总表并按现有数据统计一次
+    with app.app_context():
+        db.create_all()
+        # 只建按作者分页的索引，模型上其他索引所需的列可能还不存在
+        for index in Article.__table__.indexes:
+            if index.name == 'ix_article_author_created_at_id':
+                index.create(bind=db.engine, checkfirst=True)
+        count = rebuild_user_stats()
+        print(f"User stats rebuilt for {count} users.")
+
+if __name__ == '__main__':
+    upgrade_database()
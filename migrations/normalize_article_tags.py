@@ -0,0 +1,20 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+import tagging
+
+def upgrade_database():
+    # 建立 tag / article_tag 表，并把 Article.tags 中的逗号分隔标签回填进去
+    with app.app_context():
+        db.create_all()
+        try:
+            count = tagging.rebuild_tag_index()
+            print(f"Tag index rebuilt: {count} tags.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error during tag backfill: {str(e)}")
+
+if __name__ == '__main__':
+    upgrade_database()
@@ -0,0 +1,44 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app import app, db
+from models import ChatMessage
+
+def upgrade_database():
+    # 旧版 chat_config 缺少 model_list；旧版 chat_message 按 user_id + 字符串 conversation_id
+    # 保存，改为引用 chat_conversation.id 的整数外键
+    with app.app_context():
+        db.create_all()
+        inspector = inspect(db.engine)
+        config_columns = {c['name'] for c in inspector.get_columns('chat_config')}
+        message_columns = {c['name']: c for c in inspector.get_columns('chat_message')}
+        with db.engine.begin() as conn:
+            if 'model_list' not in config_columns:
+                conn.execute(text('ALTER TABLE chat_config ADD COLUMN model_list TEXT'))
+            # 每个用户只保留最新的一条配置
+            conn.execute(text('DELETE FROM chat_config WHERE id NOT IN '
+                              '(SELECT max(id) FROM chat_config GROUP BY user_id)'))
+            conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ix_chat_config_user_id '
+                              'ON chat_config (user_id)'))
+
+            if 'user_id' in message_columns or \
+                    'INT' not in str(message_columns['conversation_id']['type']).upper():
+                for index in inspector.get_indexes('chat_message'):
+                    conn.execute(text('DROP INDEX IF EXISTS %s' % index['name']))
+                conn.execute(text('ALTER TABLE chat_message RENAME TO chat_message_old'))
+                ChatMessage.__table__.create(bind=conn)
+                # 对应的对话已不存在的消息无法归属，不再保留
+                result = conn.execute(text(
+                    'INSERT INTO chat_message (id, conversation_id, role, content, created_at) '
+                    'SELECT m.id, CAST(m.conversation_id AS INTEGER), m.role, m.content, m.created_at '
+                    'FROM chat_message_old m JOIN chat_conversation c '
+                    'ON c.id = CAST(m.conversation_id AS INTEGER)'))
+                conn.execute(text('DROP TABLE chat_message_old'))
+                print(f"chat_message rebuilt, {result.rowcount} messages kept.")
+        print("Chat tables upgraded successfully!")
+
+if __name__ == '__main__':
+    upgrade_database()
@@ -1,7 +1,8 @@
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+import json
 from extensions import db
+from passwords import passwords
 
 class UserGroup(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -17,7 +18,7 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
     bio = db.Column(db.Text)
     avatar = db.Column(db.String(200))
     email_notifications = db.Column(db.Boolean, default=True)
@@ -28,11 +29,15 @@ class User(UserMixin, db.Model):
     activities = db.relationship('Activity', backref='user', lazy='dynamic')
     comments = db.relationship('Comment', backref='author', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+    )
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify(self.password_hash, password)
 
     def can_post(self):
         return self.is_admin or (self.group and self.group.can_post)
@@ -47,6 +52,33 @@ class User(UserMixin, db.Model):
     def is_active(self):
         return True
 
+article_tag = db.Table(
+    'article_tag',
+    db.Column('article_id', db.Integer, db.ForeignKey('article.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True),
+    # 按标签查文章走这个索引；按文章查标签走主键
+    db.Index('ix_article_tag_tag_id_article_id', 'tag_id', 'article_id'),
+)
+
+class Tag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    # 为空表示一级标签，否则为所属一级标签
+    parent_id = db.Column(db.Integer, db.ForeignKey('tag.id'), index=True)
+    # 关联文章数，由 tagging.py 在增删关联时维护
+    article_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    children = db.relationship('Tag', backref=db.backref('parent', remote_side=[id]),
+                               lazy='dynamic', order_by='Tag.name')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'parent': self.parent.name if self.parent_id else None,
+            'article_count': self.article_count
+        }
+
 class Article(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -59,7 +91,29 @@ class Article(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     published = db.Column(db.Boolean, default=True)
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # 以下四列由 article_render.py 在保存时根据 content 生成
+    content_html = db.Column(db.Text)
+    toc = db.Column(db.Text)
+    excerpt = db.Column(db.String(300))
+    reading_time = db.Column(db.Integer)
+    # 稳定标识，批量导入导出时用来匹配同一篇文章（见 article_io.py）
+    slug = db.Column(db.String(100), unique=True, index=True)
     comments = db.relationship('Comment', backref='article', lazy='dynamic', cascade='all, delete-orphan')
+    # tags 列保留逗号分隔的原文供表单编辑和全文索引，筛选和展示使用 tag_list
+    tag_list = db.relationship('Tag', secondary=article_tag, order_by='Tag.name',
+                               backref=db.backref('articles', lazy='dynamic'))
+
+    # 键集分页按 (created_at, id) 排序，见 pagination.py
+    __table_args__ = (
+        db.Index('ix_article_created_at_id', 'created_at', 'id'),
+        db.Index('ix_article_published_created_at_id', 'published', 'created_at', 'id'),
+        db.Index('ix_article_category_created_at_id', 'category', 'created_at', 'id'),
+        db.Index('ix_article_author_created_at_id', 'author_id', 'created_at', 'id'),
+    )
+
+    @property
+    def toc_entries(self):
+        return json.loads(self.toc) if self.toc else []
 
     def to_dict(self):
         return {
@@ -67,8 +121,11 @@ class Article(db.Model):
             'title': self.title,
             'content': self.content,
             'summary': self.summary,
+            'excerpt': self.excerpt,
+            'reading_time': self.reading_time,
+            'toc': self.toc_entries,
             'category': self.category,
-            'tags': self.tags.split(',') if self.tags else [],
+            'tags': [tag.name for tag in self.tag_list],
             'views': self.views,
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
@@ -83,9 +140,250 @@ class Comment(db.Model):
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     article_id = db.Column(db.Integer, db.ForeignKey('article.id'), nullable=False)
 
+class UserStats(db.Model):
+    """用户的文章数、总浏览量和评论数汇总，由 user_stats.py 增量维护"""
+    __tablename__ = 'user_stats'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    article_count = db.Column(db.Integer, nullable=False, default=0)
+    total_views = db.Column(db.Integer, nullable=False, default=0)
+    comment_count = db.Column(db.Integer, nullable=False, default=0)
+
+class ArticleTerm(db.Model):
+    """文章的 TF-IDF 向量（权重最高的若干词条，已归一化），由 related_articles.py 维护"""
+    __tablename__ = 'article_term'
+    article_id = db.Column(db.Integer, db.ForeignKey('article.id', ondelete='CASCADE'), primary_key=True)
+    term = db.Column(db.String(50), primary_key=True)
+    weight = db.Column(db.Float, nullable=False)
+
+    # 按词条取出权重最高的若干篇文章，不必回表
+    __table_args__ = (
+        db.Index('ix_article_term_term_weight', 'term', 'weight', 'article_id'),
+    )
+
+class RelatedVocabulary(db.Model):
+    """词条的 idf，由 flask rebuild-related-articles 按全部已发布文章统计"""
+    __tablename__ = 'related_vocabulary'
+    term = db.Column(db.String(50), primary_key=True)
+    idf = db.Column(db.Float, nullable=False)
+
+class ArticleNeighbor(db.Model):
+    """每篇文章最相似的几篇文章（相关阅读），由 related_articles.py 维护"""
+    __tablename__ = 'article_neighbor'
+    article_id = db.Column(db.Integer, db.ForeignKey('article.id', ondelete='CASCADE'), primary_key=True)
+    neighbor_id = db.Column(db.Integer, db.ForeignKey('article.id', ondelete='CASCADE'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_article_neighbor_neighbor_id', 'neighbor_id'),
+    )
+
+class AboutSection(db.Model):
+    """关于页面的章节；同一次保存的章节版本号相同，about_version 指向当前使用的版本"""
+    __tablename__ = 'about_section'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    title = db.Column(db.String(200), nullable=False)
+    content = db.Column(db.Text)
+    order = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_about_section_version_order', 'version', 'order'),
+    )
+
+class AboutVersion(db.Model):
+    """关于页面的当前版本号，只有 id 为 1 的一行"""
+    __tablename__ = 'about_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ContentVersion(db.Model):
+    """按名称记录的内容版本号，每次相关数据变化的提交加一，进程据此判断内存中的索引是否过期"""
+    __tablename__ = 'content_version'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 class Activity(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     action = db.Column(db.String(100), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     details = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('ix_activity_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_activity_timestamp', 'timestamp'),
+    )
+
+class ActivityDaily(db.Model):
+    """超过保留期的活动明细按天汇总后的计数，见 activity_log.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.String(10), nullable=False)
+    action = db.Column(db.String(100), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', 'action', name='uq_activity_daily_user_day_action'),
+    )
+
+class ChatConfig(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
+    # openai / azure / custom（OpenAI 兼容接口）/ mock（本地模拟，不访问网络）
+    api_type = db.Column(db.String(50), default='openai')
+    api_key = db.Column(db.String(200))
+    api_endpoint = db.Column(db.String(200))
+    model = db.Column(db.String(50))
+    model_list = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ChatConversation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    title = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # 上下文窗口之外的早期消息的滚动摘要，见 chat_context.py
+    summary = db.Column(db.Text)
+    summary_until_id = db.Column(db.Integer)
+    messages = db.relationship('ChatMessage', backref='conversation', lazy='dynamic',
+                               cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_chat_conversation_user_updated_at_id', 'user_id', 'updated_at', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+class ChatConversationTombstone(db.Model):
+    """已删除对话的记录，供增量同步告知客户端删除了哪些对话"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    conversation_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_chat_conversation_tombstone_user_deleted_at', 'user_id', 'deleted_at'),
+    )
+
+class ChatMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('chat_conversation.id'), nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_chat_message_conversation_created_at_id', 'conversation_id', 'created_at', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'role': self.role,
+            'content': self.content,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+class UploadBlob(db.Model):
+    """按内容哈希保存的上传文件，见 uploads.py"""
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    ext = db.Column(db.String(10), nullable=False)
+    content_type = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class UserUpload(db.Model):
+    """用户对上传文件的引用，用于配额统计和清理无引用的文件"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    sha256 = db.Column(db.String(64), db.ForeignKey('upload_blob.sha256'), nullable=False)
+    purpose = db.Column(db.String(32), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_user_upload_user_purpose', 'user_id', 'purpose'),
+        db.Index('ix_user_upload_sha256', 'sha256'),
+    )
+
+# 人体图谱：脏腑/部位、经络、症状、穴位，由 body_map.py 载入内存对外提供
+organ_meridian = db.Table(
+    'organ_meridian',
+    db.Column('organ_id', db.Integer, db.ForeignKey('organ.id'), primary_key=True),
+    db.Column('meridian_id', db.Integer, db.ForeignKey('meridian.id'), primary_key=True),
+)
+
+organ_symptom = db.Table(
+    'organ_symptom',
+    db.Column('organ_id', db.Integer, db.ForeignKey('organ.id'), primary_key=True),
+    db.Column('symptom_id', db.Integer, db.ForeignKey('symptom.id'), primary_key=True),
+)
+
+symptom_acupoint = db.Table(
+    'symptom_acupoint',
+    db.Column('symptom_id', db.Integer, db.ForeignKey('symptom.id'), primary_key=True),
+    db.Column('acupoint_id', db.Integer, db.ForeignKey('acupoint.id'), primary_key=True),
+)
+
+class Organ(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    # 分类，如 五脏、六腑、官窍
+    category = db.Column(db.String(50))
+    description = db.Column(db.Text)
+    diagnosis = db.Column(db.Text)
+    treatment = db.Column(db.Text)
+    # 养生建议，每行一条
+    advice = db.Column(db.Text)
+    sort_order = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    meridians = db.relationship('Meridian', secondary=organ_meridian, order_by='Meridian.name',
+                                backref=db.backref('organs', lazy='dynamic'))
+    symptoms = db.relationship('Symptom', secondary=organ_symptom, order_by='Symptom.name',
+                               backref=db.backref('organs', lazy='dynamic'))
+    diseases = db.relationship('OrganDisease', backref='organ', order_by='OrganDisease.sort_order',
+                               cascade='all, delete-orphan')
+
+class OrganDisease(db.Model):
+    """脏腑/部位的常见病症及证型"""
+    id = db.Column(db.Integer, primary_key=True)
+    organ_id = db.Column(db.Integer, db.ForeignKey('organ.id'), nullable=False, index=True)
+    name = db.Column(db.String(50), nullable=False)
+    # 证型，如 气虚证
+    pattern = db.Column(db.String(50))
+    symptoms = db.Column(db.Text)
+    treatment = db.Column(db.Text)
+    sort_order = db.Column(db.Integer, default=0, nullable=False)
+
+class Meridian(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    description = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    acupoints = db.relationship('Acupoint', backref='meridian', lazy='dynamic', order_by='Acupoint.name')
+
+class Symptom(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    description = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    acupoints = db.relationship('Acupoint', secondary=symptom_acupoint, order_by='Acupoint.name',
+                                backref=db.backref('symptoms', lazy='dynamic'))
+
+class Acupoint(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    # 国际代码，如 KI3
+    code = db.Column(db.String(10))
+    meridian_id = db.Column(db.Integer, db.ForeignKey('meridian.id'), index=True)
+    location = db.Column(db.Text)
+    indications = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
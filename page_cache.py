@@ -0,0 +1,320 @@
+"""
+页面渲染结果缓存
+
+首页、知识库和文章页的 HTML 在进程内按 LRU + TTL 缓存，键由请求路径、查询参数、
+语言和访问者身份组成：匿名访问共用一份，登录用户按用户 id 各自缓存，这样
+base.html 中的导航栏头像/登录状态不会串号。带有闪现消息的请求不读也不写缓存。
+
+每个条目登记若干依赖标签（如 'articles'、'article:12'）。文章提交后，会话事件
+按改动的文章使相关标签失效；其他进程中的副本依靠 TTL 过期。
+
+Reloader 是进程内只读快照（人体图谱、症状检索索引、关于页面）共用的载入逻辑。
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, session
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# 这些字段的变化不影响页面内容，不触发失效
+IGNORED_FIELDS = {'views'}
+
+
+class LRUCache:
+    """on_evict(value) 在条目被淘汰、过期、删除或替换后调用（不持有锁）"""
+
+    def __init__(self, maxsize=512, ttl=60, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        removed = []
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires, tags = entry
+            if expires < time.monotonic():
+                removed.append(self._remove(key))
+                self.misses += 1
+                value = None
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        self._evicted(removed)
+        return value
+
+    def set(self, key, value, tags=()):
+        removed = []
+        with self._lock:
+            if key in self._data:
+                removed.append(self._remove(key))
+            self._data[key] = (value, time.monotonic() + self.ttl, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                removed.append(self._remove(next(iter(self._data))))
+        self._evicted(removed)
+
+    def delete(self, key):
+        with self._lock:
+            removed = [self._remove(key)]
+        self._evicted(removed)
+
+    def invalidate(self, *tags):
+        removed = []
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    removed.append(self._remove(key))
+        self._evicted(removed)
+
+    def clear(self):
+        with self._lock:
+            removed = [value for value, _, _ in self._data.values()]
+            self._data.clear()
+            self._tags.clear()
+        self._evicted(removed)
+
+    def items(self):
+        """未过期的 (键, 值) 列表，不影响 LRU 顺序和命中统计"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._data.items() if entry[1] >= now]
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return None
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return entry[0]
+
+    def _evicted(self, values):
+        if self.on_evict is None:
+            return
+        for value in values:
+            if value is not None:
+                self.on_evict(value)
+
+
+class Reloader:
+    """整体替换的进程内只读快照。
+
+    载入后 interval 秒内直接返回当前值；过期时如果给了 is_current(value)，先做这个
+    廉价检查，仍是最新的只刷新检查时间，否则调用 load() 重新载入。还没有值时所有
+    线程等待第一次载入；已有值时只让一个线程载入，其他线程照常使用旧值。载入期间
+    set() 或 invalidate() 过的，载入结果不保存。
+
+    background 为 True 时检查和载入都放在后台线程里，get() 从不等待：还没有值时
+    返回 None，invalidate() 也保留旧值直到新值载入完成。load 和 is_current 在后台
+    线程中调用，需要自己准备应用上下文；载入失败时记录日志，interval 秒后再试。
+    """
+
+    def __init__(self, load, interval=300, is_current=None, background=False):
+        self.load = load
+        self.interval = interval
+        self.is_current = is_current
+        self.background = background
+        self._value = None
+        self._checked_at = 0
+        self._version = 0
+        self._stale = False
+        self._thread = None
+        self._retry_at = 0
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    @property
+    def value(self):
+        """当前值，不检查是否过期，没有时为 None"""
+        return self._value
+
+    def _fresh(self):
+        value = self._value
+        if value is not None and time.monotonic() - self._checked_at < self.interval:
+            return value
+        return None
+
+    def get(self):
+        value = self._fresh()
+        if value is not None:
+            return value
+        stale = self._value
+        if self.background:
+            self._start()
+            return stale
+        if not self._lock.acquire(blocking=stale is None):
+            return stale
+        try:
+            # 等锁期间其他线程已经载入过
+            value = self._fresh()
+            if value is None:
+                value = self._refresh()
+            return value
+        finally:
+            self._lock.release()
+
+    def _refresh(self):
+        version = self._version
+        current = self._value
+        if current is not None and not self._stale and self.is_current is not None \
+                and self.is_current(current):
+            value = current
+        else:
+            value = self.load()
+        with self._state_lock:
+            if version == self._version:
+                self._value = value
+                self._checked_at = time.monotonic()
+                self._stale = False
+        return value
+
+    def _start(self):
+        with self._state_lock:
+            if self._thread is not None or time.monotonic() < self._retry_at:
+                return
+            thread = self._thread = threading.Thread(target=self._run, name='reloader', daemon=True)
+        thread.start()
+
+    def _run(self):
+        try:
+            self._refresh()
+        except Exception:
+            logging.getLogger(__name__).exception('后台载入失败')
+            self._retry_at = time.monotonic() + self.interval
+        finally:
+            with self._state_lock:
+                self._thread = None
+
+    def set(self, value):
+        """直接换成新值（如本进程刚保存的内容），正在进行的载入作废"""
+        with self._state_lock:
+            self._version += 1
+            self._value = value
+            self._checked_at = time.monotonic()
+            self._stale = False
+
+    def invalidate(self):
+        """丢弃当前值（后台模式下保留旧值），下次 get() 重新载入，正在进行的载入作废"""
+        with self._state_lock:
+            self._version += 1
+            self._checked_at = 0
+            self._retry_at = 0
+            self._stale = True
+            if not self.background:
+                self._value = None
+
+
+cache = LRUCache()
+
+
+def _cache_key():
+    if '_flashes' in session:
+        return None
+    if current_user.is_authenticated:
+        audience = 'user:%s' % current_user.get_id()
+    else:
+        audience = 'anon'
+    lang = (session.get('lang'), session.get('language'))
+    args = tuple(sorted(request.args.items(multi=True)))
+    return (request.path, args, lang, audience)
+
+
+def cached_response(render, tags=()):
+    """render() 返回响应或字符串；命中缓存时直接返回缓存的 HTML"""
+    if not current_app.config.get('PAGE_CACHE_ENABLED', True):
+        return render()
+    key = _cache_key()
+    if key is None:
+        return render()
+    body = cache.get(key)
+    if body is not None:
+        response = current_app.response_class(body, mimetype='text/html')
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    response = current_app.make_response(render())
+    if response.status_code == 200 and not response.direct_passthrough:
+        entry_tags = list(tags)
+        if key[3] != 'anon':
+            entry_tags.append(key[3])
+        cache.set(key, response.get_data(), entry_tags)
+    response.headers['X-Cache'] = 'MISS'
+    return response
+
+
+def cached_page(*tags):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return cached_response(lambda: view(*args, **kwargs), tags)
+        return wrapper
+    return decorator
+
+
+def _changed_article_tags(session):
+    from models import Article
+
+    tags = session.info.setdefault('page_cache_tags', set())
+    for obj in session.new:
+        if isinstance(obj, Article):
+            tags.add('articles')
+    for obj in session.deleted:
+        if isinstance(obj, Article):
+            tags.update(('articles', 'article:%s' % obj.id))
+    for obj in session.dirty:
+        if not isinstance(obj, Article):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[prop.key].history.has_changes()
+               for prop in state.mapper.column_attrs if prop.key not in IGNORED_FIELDS):
+            tags.update(('articles', 'article:%s' % obj.id))
+
+
+def invalidate_on_commit(session, *tags):
+    """session 提交后使带这些标签的页面失效，回滚则不处理"""
+    session.info.setdefault('page_cache_tags', set()).update(tags)
+
+
+def _after_flush(session, flush_context):
+    _changed_article_tags(session)
+
+
+def _after_commit(session):
+    tags = session.info.pop('page_cache_tags', None)
+    if tags:
+        cache.invalidate(*tags)
+
+
+def _after_rollback(session):
+    session.info.pop('page_cache_tags', None)
+
+
+def init_app(app):
+    cache.maxsize = app.config.get('PAGE_CACHE_SIZE', cache.maxsize)
+    cache.ttl = app.config.get('PAGE_CACHE_TTL', cache.ttl)
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'after_commit', _after_commit)
+    event.listen(Session, 'after_rollback', _after_rollback)
@@ -0,0 +1,121 @@
+"""
+键集（游标）分页
+
+按 (created_at, id) 倒序翻页：下一页取 (created_at, id) 小于当前页最后一行的记录，
+上一页取大于第一行的记录，借助复合索引直接定位，不需要 OFFSET，页码再深也一样快。
+游标是对这两个值做 base64 编码后的字符串，模板和 JSON 接口原样传回即可。
+
+总数只做估计：同一个查询的 COUNT(*) 结果在进程内缓存一段时间，不再每次请求都统计。
+缓存键含有请求参数（分类、标签），因此用有条目上限的 LRU 缓存，随意构造的参数
+只会挤掉较早的条目。
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from page_cache import LRUCache
+
+COUNT_CACHE_SIZE = 256
+COUNT_CACHE_TTL = 300
+
+_counts = LRUCache(maxsize=COUNT_CACHE_SIZE, ttl=COUNT_CACHE_TTL)
+
+
+def encode_cursor(created_at, id):
+    raw = json.dumps([created_at.isoformat() if created_at else None, id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """解析游标，格式不对时返回 None（当作第一页处理）"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def to_dict(self, serialize=None):
+        return {
+            'items': [serialize(item) if serialize else item for item in self.items],
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'total_estimate': self.total,
+        }
+
+
+def keyset_paginate(query, model, after=None, before=None, per_page=20, count_key=None, total=None,
+                    row_factory=None):
+    """按 (created_at, id) 倒序分页；after/before 为游标字符串，二选一。
+
+    已知总数（如标签的 article_count）时可直接传入 total，否则按 count_key 缓存估计。
+    row_factory 用于把查询结果行包装成列表对象（见 listings.to_rows）。
+    """
+    base_query = query
+    key = (model.created_at, model.id)
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before) if after_key is None else None
+
+    if before_key is not None:
+        rows = query.filter(tuple_(*key) > before_key)\
+            .order_by(model.created_at.asc(), model.id.asc())\
+            .limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_newer, has_older = has_more, True
+    else:
+        if after_key is not None:
+            query = query.filter(tuple_(*key) < after_key)
+        rows = query.order_by(model.created_at.desc(), model.id.desc())\
+            .limit(per_page + 1).all()
+        items = rows[:per_page]
+        has_newer, has_older = after_key is not None, len(rows) > per_page
+
+    next_cursor = prev_cursor = None
+    if items and has_older:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    if items and has_newer:
+        prev_cursor = encode_cursor(items[0].created_at, items[0].id)
+
+    if row_factory is not None:
+        items = row_factory(items)
+    if total is None and count_key is not None:
+        total = estimate_count(base_query, count_key)
+    return KeysetPage(items, per_page, next_cursor, prev_cursor, total)
+
+
+def estimate_count(query, key):
+    """返回缓存的 COUNT(*)；过期后重新统计一次"""
+    count = _counts.get(key)
+    if count is None:
+        count = query.order_by(None).count()
+        _counts.set(key, count)
+    return count
@@ -0,0 +1,159 @@
+"""
+密码哈希服务
+
+密码哈希（scrypt / pbkdf2）是故意设计得很慢的 CPU 计算。这里把哈希和校验交给一个
+固定大小的线程池（hashlib 计算期间会释放 GIL），同一时间最多只有
+PASSWORD_HASH_WORKERS 个哈希在计算，一波集中登录不会把 CPU 全部占满。请求线程
+仍然要等待结果：排队的任务数有上限，超过时直接返回“繁忙”；等待超过 timeout 秒
+也按“繁忙”处理，请求线程不会无限期地等下去，还在排队的任务随之取消。
+
+登录失败按账号和 IP 分别计数，在时间窗口内超过次数就暂时拒绝，被拒绝的请求
+不再计算哈希。哈希参数由 PASSWORD_HASH_METHOD 配置；登录成功时如果发现已存的
+哈希使用的是旧参数，会用新参数重新计算并保存，调整参数后用户无感知地逐步迁移。
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordBusy(Exception):
+    pass
+
+
+class Throttle:
+    """滑动窗口内的失败次数计数"""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def blocked(self, key):
+        with self._lock:
+            failures = self._recent(key, time.monotonic())
+            return failures is not None and len(failures) >= self.limit
+
+    def fail(self, key):
+        now = time.monotonic()
+        with self._lock:
+            failures = self._recent(key, now)
+            if failures is None:
+                failures = self._failures[key] = deque()
+            failures.append(now)
+            # 防止被大量不同的 key 撑大
+            if len(self._failures) > 10000:
+                for stale in [k for k in self._failures if self._failures[k][-1] <= now - self.window]:
+                    del self._failures[stale]
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+class PasswordService:
+    def __init__(self, method='scrypt', workers=2, max_pending=32, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.account_throttle = Throttle(limit=5, window=300)
+        self.ip_throttle = Throttle(limit=20, window=300)
+        self._executor = None
+        self._slots = None
+        self._prefix = None
+        self._lock = threading.Lock()
+        self.hashed = 0
+        self.verified = 0
+        self.rejected = 0
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.max_pending)
+        self.account_throttle.limit = app.config.get('LOGIN_FAILURES_PER_ACCOUNT', self.account_throttle.limit)
+        self.ip_throttle.limit = app.config.get('LOGIN_FAILURES_PER_IP', self.ip_throttle.limit)
+        window = app.config.get('LOGIN_FAILURE_WINDOW', self.account_throttle.window)
+        self.account_throttle.window = self.ip_throttle.window = window
+        self.shutdown()
+        self._prefix = None
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='password-hash')
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+            executor, slots = self._executor, self._slots
+        if not slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordBusy('服务器繁忙，请稍后再试')
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # 名额在任务真正结束（完成或被取消）时才归还，超时放弃等待的任务仍占着名额
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # 还在排队的任务直接取消；已经开始计算的无法中断，算完后归还名额
+            future.cancel()
+            self.rejected += 1
+            raise PasswordBusy('服务器繁忙，请稍后再试')
+
+    def hash(self, password):
+        self.hashed += 1
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        if not password_hash or password is None:
+            return False
+        self.verified += 1
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """已存哈希的算法或参数与当前配置不同时返回 True"""
+        if self._prefix is None:
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return not password_hash or password_hash.split('$', 1)[0] != self._prefix
+
+    # 登录失败限流
+    def throttled(self, account, ip):
+        return self.account_throttle.blocked(account) or self.ip_throttle.blocked(ip)
+
+    def login_failed(self, account, ip):
+        self.account_throttle.fail(account)
+        self.ip_throttle.fail(ip)
+
+    def login_succeeded(self, account):
+        self.account_throttle.reset(account)
+
+    def stats(self):
+        return {'method': self.method, 'workers': self.workers, 'max_pending': self.max_pending,
+                'hashed': self.hashed, 'verified': self.verified, 'rejected': self.rejected}
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+passwords = PasswordService()
@@ -0,0 +1,316 @@
+"""
+相关阅读
+
+已发布文章的标题、标签、摘要和正文切分为词条（中文按字二元组，见 search.tokenize），
+按字段加权的词频乘以 idf 得到 TF-IDF 向量，只保留权重最高的 TERMS_PER_ARTICLE 个
+词条并归一化后存入 article_term，两篇文章的余弦相似度就是共有词条的权重乘积之和。
+每篇文章最相似的 NEIGHBORS 篇存入 article_neighbor，文章页按主键一次查出。
+
+    flask rebuild-related-articles
+
+重新统计 idf（related_vocabulary）并计算全部文章的向量和相似文章，可以定期运行。
+为控制计算量，相似度只按每篇文章权重最高的 QUERY_TERMS 个词条计算，且每个词条
+只在该词条权重最高的 CANDIDATES_PER_TERM 篇文章中找候选。
+
+文章新增、修改、撤下或删除时，会话事件在同一事务里只重新计算这些文章，以及相似
+文章中原本包含它们或现在应当加入它们的文章；新出现的词条要等下次全量计算才会
+计入 idf。还没有做过全量计算时不做增量计算。批量导入用 skip_incremental() 关闭
+本事务的增量计算，全部导入后做一次全量计算。
+"""
+
+import heapq
+import math
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+import click
+from sqlalchemy import delete, event, inspect, insert, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+import page_cache
+from extensions import db
+from models import Article, ArticleNeighbor, ArticleTerm, RelatedVocabulary
+from search import strip_html, tokenize
+
+# 字段权重：标题 > 标签 > 摘要 > 正文
+FIELD_WEIGHTS = (('title', 3.0), ('tags', 2.0), ('summary', 1.5), ('content', 1.0))
+INDEXED_FIELDS = ('title', 'tags', 'summary', 'content', 'published')
+TERMS_PER_ARTICLE = 32
+NEIGHBORS = 6
+# 找相似文章时只用权重最高的 QUERY_TERMS 个词条，每个词条只看该词条权重最高的
+# CANDIDATES_PER_TERM 篇文章
+QUERY_TERMS = 12
+CANDIDATES_PER_TERM = 100
+# 一篇文章修改后，最多检查与它最相似的多少篇文章是否应把它加入相似文章
+REVERSE_CANDIDATES = 50
+# 只出现在一篇文章中、或出现在超过一半文章中的词条不参与计算
+MIN_DF = 2
+MAX_DF = 0.5
+MAX_TERM_LENGTH = 50
+BATCH_SIZE = 500
+CHUNK_SIZE = 500
+
+terms = ArticleTerm.__table__
+neighbors = ArticleNeighbor.__table__
+vocabulary = RelatedVocabulary.__table__
+
+
+def term_counts(title, tags, summary, content):
+    fields = {
+        'title': title,
+        'tags': (tags or '').replace(',', ' '),
+        'summary': summary,
+        'content': strip_html(content),
+    }
+    counts = {}
+    for field, weight in FIELD_WEIGHTS:
+        for term, n in Counter(tokenize(fields[field]).split()).items():
+            if len(term) <= MAX_TERM_LENGTH:
+                counts[term] = counts.get(term, 0) + n * weight
+    return counts
+
+
+def make_vector(counts, idf):
+    """返回归一化的 {词条: 权重}，idf 中没有的词条不计入"""
+    weights = {}
+    for term, count in counts.items():
+        if term in idf:
+            weights[term] = (1 + math.log(count)) * idf[term]
+    top = heapq.nlargest(TERMS_PER_ARTICLE, weights.items(), key=itemgetter(1))
+    norm = math.sqrt(sum(weight * weight for _, weight in top))
+    return {term: weight / norm for term, weight in top} if norm else {}
+
+
+def get_related(article_id, limit=NEIGHBORS):
+    """文章页的相关阅读：按相似度排序的已发布文章"""
+    return db.session.execute(
+        select(Article.id, Article.title, Article.summary, Article.excerpt)
+        .join(neighbors, neighbors.c.neighbor_id == Article.id)
+        .where(neighbors.c.article_id == article_id, Article.published == True)
+        .order_by(neighbors.c.score.desc()).limit(limit)).all()
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _published_articles(batch_size):
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Article.id, Article.title, Article.tags, Article.summary, Article.content)
+            .where(Article.id > last_id, Article.published == True)
+            .order_by(Article.id).limit(batch_size)).all()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+
+
+def _query_terms(vector):
+    return heapq.nlargest(QUERY_TERMS, vector.items(), key=itemgetter(1))
+
+
+def _top(scores, exclude):
+    return heapq.nlargest(NEIGHBORS, ((score, other) for other, score in scores.items()
+                                      if other != exclude))
+
+
+# 全量计算
+def rebuild_related(batch_size=BATCH_SIZE):
+    """重新统计 idf，计算全部已发布文章的向量和相似文章，返回有向量的文章数"""
+    df = Counter()
+    total = 0
+    for row in _published_articles(batch_size):
+        df.update(term_counts(row.title, row.tags, row.summary, row.content).keys())
+        total += 1
+    max_df = max(MAX_DF * total, MIN_DF)
+    idf = {term: math.log(total / n) for term, n in df.items() if MIN_DF <= n <= max_df}
+    del df
+
+    db.session.execute(delete(neighbors))
+    db.session.execute(delete(terms))
+    db.session.execute(delete(vocabulary))
+    for chunk in _chunks(idf.items()):
+        db.session.execute(insert(vocabulary), [{'term': t, 'idf': v} for t, v in chunk])
+
+    vectors = {}
+    postings = defaultdict(list)
+    for row in _published_articles(batch_size):
+        vector = make_vector(term_counts(row.title, row.tags, row.summary, row.content), idf)
+        if not vector:
+            continue
+        vectors[row.id] = vector
+        for term, weight in vector.items():
+            postings[term].append((weight, row.id))
+    for chunk in _chunks(vectors.items(), CHUNK_SIZE // 10):
+        db.session.execute(insert(terms), [{'article_id': i, 'term': t, 'weight': w}
+                                           for i, vector in chunk for t, w in vector.items()])
+
+    candidates = {term: heapq.nlargest(CANDIDATES_PER_TERM, entries)
+                  for term, entries in postings.items()}
+    del postings
+    rows = []
+    for article_id, vector in vectors.items():
+        scores = defaultdict(float)
+        for term, weight in _query_terms(vector):
+            for other_weight, other in candidates[term]:
+                scores[other] += weight * other_weight
+        rows.extend({'article_id': article_id, 'neighbor_id': other, 'score': score}
+                    for score, other in _top(scores, article_id))
+        if len(rows) >= CHUNK_SIZE:
+            db.session.execute(insert(neighbors), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(neighbors), rows)
+    db.session.commit()
+    return len(vectors)
+
+
+# 增量计算
+def _scores(conn, article_id, vector):
+    """与候选文章的相似度，取候选的方式与全量计算相同"""
+    query = dict(_query_terms(vector))
+    candidates = union_all(*(
+        select(terms.c.article_id, terms.c.term, terms.c.weight).where(terms.c.term == term)
+        .order_by(terms.c.weight.desc()).limit(CANDIDATES_PER_TERM).subquery().select()
+        for term in query))
+    scores = defaultdict(float)
+    for other, term, weight in conn.execute(candidates):
+        scores[other] += query[term] * weight
+    scores.pop(article_id, None)
+    return scores
+
+
+def _load_vectors(conn, ids):
+    vectors = defaultdict(dict)
+    for chunk in _chunks(ids):
+        for article_id, term, weight in conn.execute(
+                select(terms.c.article_id, terms.c.term, terms.c.weight)
+                .where(terms.c.article_id.in_(chunk))):
+            vectors[article_id][term] = weight
+    return vectors
+
+
+def update_related(conn, changed):
+    """changed 为 {文章 id: (title, tags, summary, content)，撤下或删除的为 None}，
+    返回相似文章有变化的文章 id"""
+    if conn.execute(select(vocabulary.c.term).limit(1)).first() is None:
+        # 还没有做过全量计算
+        return set()
+    ids = list(changed)
+    # 原本把这些文章列为相似文章的，整体重新计算
+    affected = set()
+    for chunk in _chunks(ids):
+        affected.update(conn.execute(
+            select(neighbors.c.article_id).where(neighbors.c.neighbor_id.in_(chunk))).scalars())
+    affected -= changed.keys()
+    for chunk in _chunks(ids):
+        conn.execute(delete(terms).where(terms.c.article_id.in_(chunk)))
+        conn.execute(delete(neighbors).where(neighbors.c.article_id.in_(chunk)
+                                             | neighbors.c.neighbor_id.in_(chunk)))
+
+    counts = {i: term_counts(*fields) for i, fields in changed.items() if fields}
+    idf = {}
+    for chunk in _chunks({term for c in counts.values() for term in c}):
+        idf.update(conn.execute(select(vocabulary.c.term, vocabulary.c.idf)
+                                .where(vocabulary.c.term.in_(chunk))).all())
+    vectors = {}
+    for article_id, c in counts.items():
+        vector = make_vector(c, idf)
+        if vector:
+            vectors[article_id] = vector
+    for chunk in _chunks(vectors.items(), CHUNK_SIZE // 10):
+        conn.execute(insert(terms), [{'article_id': i, 'term': t, 'weight': w}
+                                     for i, vector in chunk for t, w in vector.items()])
+
+    rows = []
+    offers = defaultdict(list)
+    for article_id, vector in vectors.items():
+        scores = _scores(conn, article_id, vector)
+        rows.extend((article_id, other, score) for score, other in _top(scores, article_id))
+        for other, score in heapq.nlargest(REVERSE_CANDIDATES, scores.items(), key=itemgetter(1)):
+            if other not in changed and other not in affected:
+                offers[other].append((score, article_id))
+
+    # 相似度超过对方现有相似文章中最低的一篇（或对方还不满 NEIGHBORS 篇）时加入对方
+    touched = set(changed) | affected
+    current = defaultdict(list)
+    for chunk in _chunks(offers):
+        for row in conn.execute(select(neighbors).where(neighbors.c.article_id.in_(chunk))):
+            current[row.article_id].append((row.score, row.neighbor_id))
+    dropped = []
+    for other, items in offers.items():
+        kept = {n for _, n in heapq.nlargest(NEIGHBORS, current[other] + items)}
+        added = [(other, n, score) for score, n in items if n in kept]
+        if added:
+            rows.extend(added)
+            dropped.extend((other, n) for _, n in current[other] if n not in kept)
+            touched.add(other)
+    for chunk in _chunks(dropped):
+        conn.execute(delete(neighbors).where(
+            tuple_(neighbors.c.article_id, neighbors.c.neighbor_id).in_(chunk)))
+
+    if affected:
+        for chunk in _chunks(affected):
+            conn.execute(delete(neighbors).where(neighbors.c.article_id.in_(chunk)))
+        for article_id, vector in _load_vectors(conn, affected).items():
+            rows.extend((article_id, other, score)
+                        for score, other in _top(_scores(conn, article_id, vector), article_id))
+
+    for chunk in _chunks(rows):
+        conn.execute(insert(neighbors), [{'article_id': a, 'neighbor_id': n, 'score': s}
+                                         for a, n, s in chunk])
+    return touched
+
+
+def skip_incremental(session):
+    """本事务中不做增量计算，提交或回滚后恢复"""
+    session.info['related_articles_skip'] = True
+
+
+def _after_flush(session, flush_context):
+    if session.info.get('related_articles_skip'):
+        return
+    changed = {}
+    for obj in session.new:
+        if isinstance(obj, Article):
+            changed[obj.id] = obj
+    for obj in session.dirty:
+        if isinstance(obj, Article) and any(inspect(obj).attrs[f].history.has_changes()
+                                            for f in INDEXED_FIELDS):
+            changed[obj.id] = obj
+    for obj in session.deleted:
+        if isinstance(obj, Article):
+            changed[obj.id] = None
+    if not changed:
+        return
+    fields = {i: (obj.title, obj.tags, obj.summary, obj.content) if obj is not None and obj.published else None
+              for i, obj in changed.items()}
+    touched = update_related(session.connection(), fields)
+    # 相似文章变化的文章页缓存在提交后失效
+    page_cache.invalidate_on_commit(session, *('article:%d' % i for i in touched))
+
+
+def _after_transaction(session):
+    session.info.pop('related_articles_skip', None)
+
+
+@click.command('rebuild-related-articles')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True, help='每次读取的文章数')
+def rebuild_related_command(batch_size):
+    """重新统计 idf 并计算全部文章的相关阅读。
+
+    第一次运行之前，文章的新增和修改不会增量计算相关阅读。
+    """
+    count = rebuild_related(batch_size)
+    click.echo('已计算 %d 篇文章的相关阅读' % count)
+
+
+def init_app(app):
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'after_commit', _after_transaction)
+    event.listen(Session, 'after_rollback', _after_transaction)
+    app.cli.add_command(rebuild_related_command)
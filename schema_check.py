@@ -0,0 +1,69 @@
+"""
+数据库结构检查
+
+旧版数据库（包括仓库里带的 instance/tcm.db）缺少后来加入的表和列，直接启动时
+create_all 只会补建缺少的表，不会给已有的表加列，也不会回填数据，访问首页等页面
+就会因为缺列报错。init_db 在 create_all 之前调用 pending_migrations()，按顺序列出
+还需要运行的 migrations/ 脚本，提示运维先升级数据库。
+"""
+
+from sqlalchemy import inspect
+
+from extensions import db
+
+# 迁移脚本（按运行顺序）-> 它新建或补列的表
+MIGRATIONS = (
+    ('add_pagination_indexes.py', ()),
+    ('normalize_article_tags.py', ('tag', 'article_tag')),
+    ('upgrade_chat_tables.py', ('chat_config', 'chat_message')),
+    ('add_chat_history_index.py', ('chat_conversation',)),
+    ('add_conversation_sync.py', ('chat_conversation_tombstone',)),
+    ('add_activity_indexes.py', ('activity_daily',)),
+    ('add_user_stats.py', ('user_stats',)),
+    ('add_upload_store.py', ('upload_blob', 'user_upload')),
+    ('add_article_slug.py', ('article',)),
+    ('add_article_rendering.py', ('article',)),
+    ('add_body_map.py', ('organ', 'symptom', 'acupoint', 'meridian', 'organ_disease',
+                         'organ_meridian', 'organ_symptom', 'symptom_acupoint')),
+    ('add_related_articles.py', ('article_term', 'related_vocabulary', 'article_neighbor')),
+    ('add_about_versions.py', ('about_section', 'about_version')),
+    ('add_content_version.py', ('content_version',)),
+)
+
+# 同一张表由多个脚本补列时，按列区分
+COLUMN_MIGRATIONS = {
+    ('article', 'slug'): 'add_article_slug.py',
+    ('article', 'content_html'): 'add_article_rendering.py',
+    ('article', 'toc'): 'add_article_rendering.py',
+    ('article', 'excerpt'): 'add_article_rendering.py',
+    ('article', 'reading_time'): 'add_article_rendering.py',
+}
+
+# 旧版表特有的列，存在时说明对应的迁移还没有运行
+LEGACY_COLUMNS = {
+    'chat_message': ('user_id',),
+}
+
+
+def pending_migrations(bind):
+    """按运行顺序返回还需要运行的迁移脚本名；全新的空数据库返回空列表。
+
+    表缺失也算作未迁移，所以要在 create_all 之前调用。
+    """
+    inspector = inspect(bind)
+    existing = set(inspector.get_table_names())
+    if 'article' not in existing:
+        return []
+    tables = db.metadata.tables
+    pending = set()
+    for script, names in MIGRATIONS:
+        for name in names:
+            if name not in existing:
+                pending.add(script)
+                continue
+            columns = {column['name'] for column in inspector.get_columns(name)}
+            for column in set(tables[name].columns.keys()) - columns:
+                pending.add(COLUMN_MIGRATIONS.get((name, column), script))
+            if columns & set(LEGACY_COLUMNS.get(name, ())):
+                pending.add(script)
+    return [script for script, _ in MIGRATIONS if script in pending]
@@ -0,0 +1,256 @@
+"""
+文章全文检索
+
+基于 SQLite FTS5 的倒排索引。中文按字切分为二元组（bigram），每段中文的最后
+一个字额外作为单字词条写入，这样单字查询可以用前缀匹配命中所有位置；
+英文和数字按词切分并转为小写。排序使用 FTS5 自带的 BM25，高亮和摘要在
+Python 中对原文处理。
+
+索引随 Article 的增删改在同一个事务里增量更新（见 init_app 注册的会话事件）。
+"""
+
+import html
+import re
+
+import click
+from markupsafe import Markup, escape
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from extensions import db
+
+FTS_TABLE = 'article_fts'
+INDEXED_FIELDS = ('title', 'summary', 'content', 'tags')
+# BM25 列权重：标题 > 标签 > 摘要 > 正文
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0, 6.0)
+PER_PAGE = 10
+
+_CJK = r'㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(r'[%s]+|[0-9A-Za-z]+' % _CJK)
+_CJK_RE = re.compile(r'[%s]' % _CJK)
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+_ready = False
+
+
+def strip_html(value):
+    if not value:
+        return ''
+    return _SPACE_RE.sub(' ', html.unescape(_TAG_RE.sub(' ', value))).strip()
+
+
+def tokenize(value):
+    """把文本切分为索引词条，返回以空格分隔的字符串"""
+    tokens = []
+    for run in _TOKEN_RE.findall(value or ''):
+        if _CJK_RE.match(run):
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            tokens.append(run[-1])
+        else:
+            tokens.append(run.lower())
+    return ' '.join(tokens)
+
+
+def _query_terms(query):
+    return _TOKEN_RE.findall(query or '')
+
+
+def build_match(query):
+    """把用户输入转换为 FTS5 MATCH 表达式，无有效词条时返回 None"""
+    clauses = []
+    for run in _query_terms(query):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                clauses.append('"%s" *' % run)
+            else:
+                bigrams = ' '.join(run[i:i + 2] for i in range(len(run) - 1))
+                clauses.append('"%s"' % bigrams)
+        else:
+            clauses.append('"%s"' % run.lower())
+    return ' AND '.join(clauses) or None
+
+
+def highlight(value, query, length=None):
+    """转义文本并用 <mark> 标出查询词；给定 length 时截取第一个命中附近的片段"""
+    value = value or ''
+    terms = sorted({t.lower() for t in _query_terms(query)}, key=len, reverse=True)
+    if not terms:
+        return escape(value[:length] if length else value)
+    pattern = re.compile('|'.join(re.escape(t) for t in terms), re.IGNORECASE)
+
+    prefix = suffix = ''
+    if length and len(value) > length:
+        match = pattern.search(value)
+        start = max(0, match.start() - length // 4) if match else 0
+        end = start + length
+        prefix = '…' if start > 0 else ''
+        suffix = '…' if end < len(value) else ''
+        value = value[start:end]
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(value):
+        parts.append(escape(value[last:match.start()]))
+        parts.append(Markup('<mark>%s</mark>') % match.group(0))
+        last = match.end()
+    parts.append(escape(value[last:]))
+    return Markup(prefix) + Markup('').join(parts) + Markup(suffix)
+
+
+def _is_sqlite(bind):
+    return bind.dialect.name == 'sqlite'
+
+
+def _ensure_table(conn):
+    """建立 FTS 表；新建的空表会从文章表做一次全量重建，返回是否做了重建"""
+    global _ready
+    if _ready:
+        return False
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5("
+        "title, summary, content, tags, tokenize='unicode61', prefix='1')"
+        % FTS_TABLE))
+    rebuilt = False
+    if not conn.execute(text('SELECT count(*) FROM %s' % FTS_TABLE)).scalar():
+        _rebuild(conn)
+        rebuilt = True
+    _ready = True
+    return rebuilt
+
+
+def ensure_index():
+    if _ready or not _is_sqlite(db.engine):
+        return
+    with db.engine.begin() as conn:
+        _ensure_table(conn)
+
+
+def rebuild_index():
+    """全量重建全文索引，返回索引的文章数；非 SQLite 数据库不使用全文索引，返回 None"""
+    if not _is_sqlite(db.engine):
+        return None
+    with db.engine.begin() as conn:
+        if not _ensure_table(conn):
+            _rebuild(conn)
+        return conn.execute(text('SELECT count(*) FROM %s' % FTS_TABLE)).scalar()
+
+
+def _rebuild(conn):
+    conn.execute(text('DELETE FROM %s' % FTS_TABLE))
+    rows = conn.execute(text('SELECT id, title, summary, content, tags FROM article'))
+    batch = []
+    for row in rows:
+        batch.append(_index_params(row.id, row))
+        if len(batch) >= 500:
+            _insert(conn, batch)
+            batch = []
+    if batch:
+        _insert(conn, batch)
+
+
+def _index_params(article_id, source):
+    return {
+        'rowid': article_id,
+        'title': tokenize(source.title),
+        'summary': tokenize(source.summary),
+        'content': tokenize(strip_html(source.content)),
+        'tags': tokenize((source.tags or '').replace(',', ' ')),
+    }
+
+
+def _insert(conn, params):
+    conn.execute(text(
+        'INSERT INTO %s (rowid, title, summary, content, tags) '
+        'VALUES (:rowid, :title, :summary, :content, :tags)' % FTS_TABLE), params)
+
+
+def _delete(conn, ids):
+    conn.execute(text('DELETE FROM %s WHERE rowid = :rowid' % FTS_TABLE),
+                 [{'rowid': i} for i in ids])
+
+
+def _needs_reindex(obj):
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in INDEXED_FIELDS)
+
+
+def _after_flush(session, flush_context):
+    from models import Article
+
+    if not _is_sqlite(session.get_bind()):
+        return
+    stale = set()
+    fresh = []
+    for obj in session.new:
+        if isinstance(obj, Article):
+            fresh.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Article) and _needs_reindex(obj):
+            stale.add(obj.id)
+            fresh.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Article):
+            stale.add(obj.id)
+    if not stale and not fresh:
+        return
+    conn = session.connection()
+    if _ensure_table(conn):
+        # 全量重建已包含本次刷新的数据
+        return
+    if stale:
+        _delete(conn, stale)
+    if fresh:
+        _insert(conn, [_index_params(obj.id, obj) for obj in fresh])
+
+
+def search_articles(query, page=1, per_page=PER_PAGE):
+    """按 BM25 排序检索已发布文章，返回 (文章列表, 总数)"""
+    from models import Article
+
+    match = build_match(query)
+    if not match:
+        return [], 0
+    page = max(page, 1)
+    if not _is_sqlite(db.engine):
+        return _search_like(Article, query, page, per_page)
+    ensure_index()
+
+    where = ('FROM %s f JOIN article a ON a.id = f.rowid '
+             'WHERE %s MATCH :match AND a.published = 1' % (FTS_TABLE, FTS_TABLE))
+    total = db.session.execute(text('SELECT count(*) ' + where),
+                               {'match': match}).scalar()
+    if not total:
+        return [], 0
+    ids = db.session.execute(text(
+        'SELECT f.rowid ' + where +
+        ' ORDER BY bm25(%s, %s) LIMIT :limit OFFSET :offset'
+        % (FTS_TABLE, ', '.join(str(w) for w in COLUMN_WEIGHTS))),
+        {'match': match, 'limit': per_page, 'offset': (page - 1) * per_page}).scalars().all()
+    articles = {a.id: a for a in Article.query.filter(Article.id.in_(ids))}
+    return [articles[i] for i in ids if i in articles], total
+
+
+def _search_like(Article, query, page, per_page):
+    # 非 SQLite 后端没有 FTS5，退化为 LIKE 查询
+    q = Article.query.filter_by(published=True)
+    for term in _query_terms(query):
+        like = '%' + term + '%'
+        q = q.filter(Article.title.ilike(like) | Article.summary.ilike(like)
+                     | Article.content.ilike(like) | Article.tags.ilike(like))
+    result = q.order_by(Article.created_at.desc()).paginate(
+        page=page, per_page=per_page, error_out=False)
+    return result.items, result.total
+
+
+def init_app(app):
+    event.listen(Session, 'after_flush', _after_flush)
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """全量重建文章全文索引"""
+        count = rebuild_index()
+        if count is None:
+            click.echo('当前数据库不是 SQLite，不使用全文索引')
+        else:
+            click.echo('已重建 %d 篇文章的全文索引' % count)
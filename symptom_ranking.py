@@ -0,0 +1,306 @@
+"""
+症状检索
+
+根据人体图谱上选中的几个症状，给出相关文章和穴位的排序。第一次查询时建立两张
+按症状存放的稀疏权重表：
+
+    症状 × 文章   症状名在标题、标签、摘要、正文中的出现次数按字段加权后取对数
+    症状 × 穴位   symptom_acupoint 中的关联，主治症状越多的穴位权重越低
+
+查询时每个选中的症状乘以 idf，沿它那一行累加到得分上，相当于一次稀疏矩阵乘向量，
+只访问选中症状的几行，不再对文章做 LIKE 查询；最后只为排在前面的文章查一次标题。
+
+索引在后台线程中建立，查询从不等待：进程启动后的第一个请求开始建立索引，建好
+之前 rank() 返回 ready 为 False 的空结果；之后重建期间继续使用旧索引。
+
+文章增删改或症状、穴位数据变化的事务把 content_version 中 symptom_ranking 的版本号
+加一。索引记下建立时读到的版本号，查询时最多每 SYMPTOM_RANKING_CHECK_INTERVAL 秒
+按主键查一次当前版本号，不一致（其他进程有修改）时才在后台重建。本进程提交的文章
+改动在提交后直接写入索引，版本号随之前进；重建期间提交的改动先记下，新索引建好后
+补上。症状或穴位数据变化后索引整体重建。
+"""
+
+import heapq
+import math
+import threading
+from collections import defaultdict
+from operator import itemgetter
+
+from sqlalchemy import event, inspect, insert, select, update
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Acupoint, Article, ContentVersion, Meridian, Symptom, symptom_acupoint
+from page_cache import Reloader
+from search import strip_html
+
+# 字段权重：标题 > 标签 > 摘要 > 正文
+FIELD_WEIGHTS = (('title', 4.0), ('tags', 3.0), ('summary', 2.0), ('content', 1.0))
+INDEXED_FIELDS = ('title', 'tags', 'summary', 'content', 'published')
+BODY_MAP_MODELS = (Symptom, Acupoint, Meridian)
+BATCH_SIZE = 1000
+LIMIT = 10
+MAX_LIMIT = 50
+VERSION_NAME = 'symptom_ranking'
+# 重建期间最多记下多少次提交，超过后新索引建好时版本号对不上，会再重建一次
+PENDING_LIMIT = 1000
+
+version_table = ContentVersion.__table__
+
+
+def current_version():
+    return db.session.execute(
+        select(ContentVersion.version).where(ContentVersion.name == VERSION_NAME)).scalar() or 0
+
+
+def bump_version(conn):
+    """在当前事务中把版本号加一，返回新的版本号"""
+    where = version_table.c.name == VERSION_NAME
+    if not conn.execute(update(version_table).where(where)
+                        .values(version=version_table.c.version + 1)).rowcount:
+        conn.execute(insert(version_table).values(name=VERSION_NAME, version=1))
+    return conn.execute(select(version_table.c.version).where(where)).scalar()
+
+
+def article_weights(symptoms, title, tags, summary, content):
+    """返回 {症状名: 权重}，只包含出现过的症状"""
+    fields = {
+        'title': title or '',
+        'tags': (tags or '').replace(',', ' '),
+        'summary': summary or '',
+        'content': strip_html(content),
+    }
+    weights = {}
+    for name in symptoms:
+        tf = sum(weight * fields[field].count(name) for field, weight in FIELD_WEIGHTS)
+        if tf:
+            weights[name] = 1 + math.log(tf)
+    return weights
+
+
+class Index:
+    """articles[症状名] = {文章 id: 权重}；rows[文章 id] 为该文章的 {症状名: 权重}；
+    version 为索引对应的数据版本号"""
+
+    def __init__(self, symptoms, acupoints, acupoint_info, version=0):
+        self.symptoms = symptoms
+        self.acupoints = acupoints
+        self.acupoint_info = acupoint_info
+        self.version = version
+        self.articles = {name: {} for name in symptoms}
+        self.rows = {}
+
+    def set_article(self, article_id, weights):
+        # 读请求可能正在遍历某一行，这里换成新的字典而不是原地修改
+        old = self.rows.pop(article_id, {})
+        for name in set(old) | set(weights or ()):
+            posting = dict(self.articles[name])
+            posting.pop(article_id, None)
+            if weights and name in weights:
+                posting[article_id] = weights[name]
+            self.articles[name] = posting
+        if weights:
+            self.rows[article_id] = weights
+
+    def apply(self, version, changes):
+        """写入一次提交中变动的文章，changes 为 {文章 id: (title, tags, summary, content)，
+        撤下或删除的为 None}，version 为该提交的版本号"""
+        for article_id, fields in changes.items():
+            self.set_article(article_id, article_weights(self.symptoms, *fields) if fields else None)
+        # 中间夹着其他进程的提交时版本号不前进，下次检查时重建
+        if version == self.version + 1:
+            self.version = version
+
+
+def build_index(batch_size=BATCH_SIZE):
+    # 先读版本号：之后的查询在同一个读事务里，看到的正是这个版本的数据
+    version = current_version()
+    symptoms = frozenset(db.session.execute(select(Symptom.name)).scalars())
+    acupoint_info = {}
+    for row in db.session.execute(
+            select(Acupoint.id, Acupoint.name, Acupoint.code, Acupoint.location,
+                   Meridian.name.label('meridian'))
+            .outerjoin(Meridian, Meridian.id == Acupoint.meridian_id)):
+        acupoint_info[row.id] = {'name': row.name, 'code': row.code,
+                                 'meridian': row.meridian, 'location': row.location}
+    links = db.session.execute(
+        select(Symptom.name, symptom_acupoint.c.acupoint_id)
+        .join(symptom_acupoint, symptom_acupoint.c.symptom_id == Symptom.id)).all()
+    linked = defaultdict(int)
+    for _, acupoint_id in links:
+        linked[acupoint_id] += 1
+    acupoints = defaultdict(dict)
+    for name, acupoint_id in links:
+        acupoints[name][acupoint_id] = math.log(1 + len(symptoms) / linked[acupoint_id])
+
+    index = Index(symptoms, dict(acupoints), acupoint_info, version)
+    articles = defaultdict(dict)
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Article.id, Article.title, Article.tags, Article.summary, Article.content)
+            .where(Article.id > last_id, Article.published == True)
+            .order_by(Article.id).limit(batch_size)).all()
+        if not rows:
+            break
+        for row in rows:
+            weights = article_weights(symptoms, row.title, row.tags, row.summary, row.content)
+            if weights:
+                index.rows[row.id] = weights
+                for name, weight in weights.items():
+                    articles[name][row.id] = weight
+        last_id = rows[-1].id
+    index.articles.update(articles)
+    return index
+
+
+def _top(rows, names, idf, limit):
+    scores = {}
+    get = scores.get
+    for name in names:
+        weight = idf(name)
+        for key, value in rows.get(name, {}).items():
+            scores[key] = get(key, 0.0) + weight * value
+    return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+
+class SymptomRanking:
+    def __init__(self, check_interval=5):
+        self.app = None
+        self._indexes = Reloader(self._build, check_interval, is_current=self._is_current,
+                                 background=True)
+        self._write_lock = threading.Lock()
+        # 重建期间提交的改动 [(版本号, changes)]，没有在重建时为 None
+        self._pending = None
+
+    def init_app(self, app):
+        self.app = app
+        self._indexes.interval = app.config.get('SYMPTOM_RANKING_CHECK_INTERVAL', self._indexes.interval)
+        app.before_request(self._warm_up)
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
+
+    def _warm_up(self):
+        if self._indexes.value is None:
+            self._indexes.get()
+
+    def _is_current(self, index):
+        with self.app.app_context():
+            return current_version() == index.version
+
+    def _build(self):
+        with self._write_lock:
+            self._pending = []
+        try:
+            with self.app.app_context():
+                index = build_index()
+        except Exception:
+            with self._write_lock:
+                self._pending = None
+            raise
+        with self._write_lock:
+            pending, self._pending = self._pending, None
+            for version, changes in pending:
+                if version > index.version:
+                    index.apply(version, changes)
+        return index
+
+    def index(self):
+        """当前索引，还没有建好时为 None；过期时在后台重建，不等待"""
+        return self._indexes.get()
+
+    def invalidate(self):
+        self._indexes.invalidate()
+
+    def apply(self, version, changes):
+        """把一次提交（版本号为 version）中变动的文章写入当前索引和正在重建的索引"""
+        with self._write_lock:
+            if self._pending is not None and len(self._pending) < PENDING_LIMIT:
+                self._pending.append((version, changes))
+            index = self._indexes.value
+            if index is not None:
+                index.apply(version, changes)
+
+    def rank(self, symptoms, limit=LIMIT):
+        """返回 {'ready': 索引是否已建好, 'symptoms': 识别出的症状, 'articles': [...], 'acupoints': [...]}"""
+        index = self.index()
+        if index is None:
+            return {'ready': False, 'symptoms': [], 'articles': [], 'acupoints': []}
+        names = [name for name in dict.fromkeys(symptoms) if name in index.symptoms]
+        limit = max(1, min(limit, MAX_LIMIT))
+        total = len(index.rows) or 1
+        top_articles = _top(index.articles, names,
+                            lambda name: math.log(1 + total / (len(index.articles[name]) or 1)), limit)
+        top_acupoints = _top(index.acupoints, names, lambda name: 1.0, limit)
+
+        found = {}
+        if top_articles:
+            # 不在 SQL 里过滤 published，否则 SQLite 会改用 published 上的索引扫描
+            for row in db.session.execute(
+                    select(Article.id, Article.title, Article.summary, Article.excerpt,
+                           Article.category, Article.reading_time, Article.published)
+                    .where(Article.id.in_([i for i, _ in top_articles]))):
+                found[row.id] = row
+        articles = []
+        for article_id, score in top_articles:
+            row = found.get(article_id)
+            # 其他进程刚删除或撤下的文章
+            if row is None or not row.published:
+                continue
+            articles.append({
+                'id': row.id,
+                'title': row.title,
+                'summary': row.summary or row.excerpt,
+                'category': row.category,
+                'reading_time': row.reading_time,
+                'score': round(score, 4),
+                'symptoms': [name for name in names if article_id in index.articles[name]],
+            })
+        acupoints = [dict(index.acupoint_info[acupoint_id], score=round(score, 4),
+                          symptoms=[name for name in names
+                                    if acupoint_id in index.acupoints.get(name, {})])
+                     for acupoint_id, score in top_acupoints]
+        return {'ready': True, 'symptoms': names, 'articles': articles, 'acupoints': acupoints}
+
+
+symptom_ranking = SymptomRanking()
+
+
+def _after_flush(session, flush_context):
+    changes = {}
+    stale = False
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, BODY_MAP_MODELS):
+            stale = True
+        elif isinstance(obj, Article):
+            if obj in session.dirty and not any(inspect(obj).attrs[f].history.has_changes()
+                                                for f in INDEXED_FIELDS):
+                continue
+            if obj in session.deleted or not obj.published:
+                changes[obj.id] = None
+            else:
+                changes[obj.id] = (obj.title, obj.tags, obj.summary, obj.content)
+    if not changes and not stale:
+        return
+    if stale:
+        session.info['symptom_ranking_stale'] = True
+    # 每个事务只加一次版本号
+    if 'symptom_ranking_version' not in session.info:
+        session.info['symptom_ranking_version'] = bump_version(session.connection())
+    session.info.setdefault('symptom_ranking', {}).update(changes)
+
+
+def _after_commit(session):
+    changes = session.info.pop('symptom_ranking', None)
+    version = session.info.pop('symptom_ranking_version', None)
+    if session.info.pop('symptom_ranking_stale', False):
+        symptom_ranking.invalidate()
+    elif changes:
+        symptom_ranking.apply(version, changes)
+
+
+def _after_rollback(session):
+    session.info.pop('symptom_ranking', None)
+    session.info.pop('symptom_ranking_version', None)
+    session.info.pop('symptom_ranking_stale', None)
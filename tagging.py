@@ -0,0 +1,211 @@
+"""
+文章标签
+
+标签存放在 tag / article_tag 两张表里：一级标签 parent_id 为空，二级标签挂在某个
+一级标签下。Article.tags 仍保存逗号分隔的原文（表单回显、全文索引用），由
+set_article_tags 与关联表同步。
+
+每个标签的 article_count 在刷新时根据 Article.tag_list 的增删记录用
+UPDATE ... SET article_count = article_count + n 增量维护，用于标签分面计数。
+"""
+
+import re
+from collections import Counter
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Article, Tag, article_tag
+
+_SEPARATORS = re.compile(r'[,，、;；\s]+')
+MAX_TAG_LENGTH = 50
+
+
+def parse_tags(raw):
+    names = []
+    for name in _SEPARATORS.split(raw or ''):
+        name = name.strip()[:MAX_TAG_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_tags(names):
+    """一次查询取出已有标签，缺少的新建为一级标签，按 names 的顺序返回"""
+    if not names:
+        return []
+    with db.session.no_autoflush:
+        existing = {tag.name: tag for tag in Tag.query.filter(Tag.name.in_(names))}
+    result = []
+    for name in names:
+        tag = existing.get(name)
+        if tag is None:
+            tag = Tag(name=name, article_count=0)
+            db.session.add(tag)
+            existing[name] = tag
+        result.append(tag)
+    return result
+
+
+def set_article_tags(article, raw):
+    names = parse_tags(raw)
+    article.tag_list = get_or_create_tags(names)
+    article.tags = ','.join(names)
+
+
+def _sync_tag_string(article):
+    article.tags = ','.join(tag.name for tag in article.tag_list)
+
+
+def find_tag(name):
+    return Tag.query.filter_by(name=name).first() if name else None
+
+
+def filter_by_tag(query, tag):
+    """筛选带有该标签的文章；一级标签同时包含其下所有二级标签的文章"""
+    tag_ids = [tag.id]
+    if tag.parent_id is None:
+        tag_ids.extend(child_id for child_id, in
+                       db.session.query(Tag.id).filter(Tag.parent_id == tag.id))
+    article_ids = select(article_tag.c.article_id).where(article_tag.c.tag_id.in_(tag_ids))
+    return query.filter(Article.id.in_(article_ids))
+
+
+def tag_article_count(tag):
+    if tag.parent_id is not None:
+        return tag.article_count
+    children = db.session.query(db.func.sum(Tag.article_count))\
+        .filter(Tag.parent_id == tag.id).scalar()
+    return tag.article_count + (children or 0)
+
+
+def tag_tree():
+    """返回 main.js 使用的 {primary: [...], secondary: {一级: [二级...]}} 结构和计数"""
+    tags = Tag.query.order_by(Tag.name).all()
+    names = {tag.id: tag.name for tag in tags}
+    tree = {'primary': [], 'secondary': {}, 'counts': {}}
+    for tag in tags:
+        tree['counts'][tag.name] = tag.article_count
+        if tag.parent_id is None:
+            tree['primary'].append(tag.name)
+            tree['secondary'].setdefault(tag.name, [])
+        else:
+            tree['secondary'].setdefault(names[tag.parent_id], []).append(tag.name)
+    return tree
+
+
+def popular_tags(limit=20):
+    return Tag.query.filter(Tag.article_count > 0)\
+        .order_by(Tag.article_count.desc(), Tag.name).limit(limit).all()
+
+
+def create_tag(name, parent=None):
+    """新建标签；同名标签已存在且层级相同时原样返回。
+
+    文章里出现过的标签都先作为一级标签建立，这类没有下级的一级标签可以归到 parent
+    下面；已属于其他一级标签、或已有下级的标签不会被移动。
+    """
+    name = (name or '').strip()[:MAX_TAG_LENGTH]
+    if not name:
+        raise ValueError('标签名不能为空')
+    if parent is not None and (parent.name == name or parent.parent_id is not None):
+        raise ValueError('上级必须是其他一级标签')
+    tag = find_tag(name)
+    if tag is None:
+        tag = Tag(name=name, article_count=0, parent=parent)
+        db.session.add(tag)
+    elif tag.parent_id != (parent.id if parent is not None else None):
+        if tag.parent_id is not None:
+            raise ValueError('标签已属于一级标签「%s」' % tag.parent.name)
+        if tag.children.count():
+            raise ValueError('一级标签不能设为二级标签')
+        tag.parent = parent
+    return tag
+
+
+def rename_tag(tag, new_name):
+    new_name = (new_name or '').strip()[:MAX_TAG_LENGTH]
+    if not new_name:
+        raise ValueError('标签名不能为空')
+    if new_name != tag.name and find_tag(new_name):
+        raise ValueError('标签已存在')
+    tag.name = new_name
+    for article in tag.articles:
+        _sync_tag_string(article)
+
+
+def delete_tag(tag):
+    for child in tag.children.all():
+        delete_tag(child)
+    for article in tag.articles.all():
+        article.tag_list.remove(tag)
+        _sync_tag_string(article)
+    db.session.delete(tag)
+
+
+def rebuild_tag_index(batch_size=1000):
+    """根据 Article.tags 原文重建关联表并重新统计 article_count，已有的标签层级保留"""
+    names = set()
+    for (raw,) in db.session.execute(select(Article.tags).where(Article.tags != '')):
+        names.update(parse_tags(raw))
+    get_or_create_tags(sorted(names))
+    db.session.flush()
+    tag_ids = dict(db.session.query(Tag.name, Tag.id))
+
+    db.session.execute(article_tag.delete())
+    rows = []
+    result = db.session.execute(select(Article.id, Article.tags).where(Article.tags != ''))
+    for article_id, raw in result.all():
+        rows.extend({'article_id': article_id, 'tag_id': tag_ids[name]} for name in parse_tags(raw))
+        if len(rows) >= batch_size:
+            db.session.execute(article_tag.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(article_tag.insert(), rows)
+
+    db.session.execute(text(
+        'UPDATE tag SET article_count = '
+        '(SELECT count(*) FROM article_tag WHERE article_tag.tag_id = tag.id)'))
+    db.session.commit()
+    return len(tag_ids)
+
+
+def _before_flush(session, flush_context, instances):
+    deltas = session.info.setdefault('tag_count_deltas', Counter())
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Article):
+            continue
+        history = inspect(obj).attrs.tag_list.history
+        for tag in history.added:
+            deltas[tag] += 1
+        for tag in history.deleted:
+            deltas[tag] -= 1
+    for obj in session.deleted:
+        if isinstance(obj, Article):
+            for tag in obj.tag_list:
+                deltas[tag] -= 1
+
+
+def _after_flush_postexec(session, flush_context):
+    deltas = session.info.pop('tag_count_deltas', None)
+    if not deltas:
+        return
+    params = [{'id': tag.id, 'n': n} for tag, n in deltas.items()
+              if n and tag.id is not None]
+    if params:
+        session.connection().execute(
+            text('UPDATE tag SET article_count = article_count + :n WHERE id = :id'), params)
+    for tag in deltas:
+        if inspect(tag).persistent:
+            session.expire(tag, ['article_count'])
+
+
+def _after_rollback(session):
+    session.info.pop('tag_count_deltas', None)
+
+
+def init_app(app):
+    event.listen(Session, 'before_flush', _before_flush)
+    event.listen(Session, 'after_flush_postexec', _after_flush_postexec)
+    event.listen(Session, 'after_rollback', _after_rollback)
@@ -0,0 +1,66 @@
+"""
+模板编译缓存与渲染计时
+
+Jinja 把模板编译成 Python 字节码的结果默认只保存在进程内存中，每个新启动的 worker
+都要重新编译全部模板。这里配置 FileSystemBytecodeCache，把编译结果保存在
+JINJA_CACHE_DIR（默认 instance/jinja_cache）下，模板文件未修改时新进程直接加载。
+部署后可以运行 flask compile-templates 预先编译全部模板。
+
+每次渲染的耗时累加到请求上，通过 Server-Timing 响应头（render;dur=毫秒）给出，
+浏览器开发者工具的 Timing 面板中可以直接查看。
+"""
+
+import os
+import time
+
+import click
+from flask import before_render_template, g, template_rendered
+from jinja2 import FileSystemBytecodeCache
+
+
+def _before_render(sender, template, context, **extra):
+    g.setdefault('render_started', []).append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    started = g.get('render_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    # 嵌套渲染（如宏内再渲染模板）只计最外层
+    if not started:
+        g.render_time = g.get('render_time', 0) + elapsed
+
+
+def _server_timing(response):
+    render_time = g.get('render_time')
+    if render_time is not None:
+        timing = 'render;dur=%.2f' % (render_time * 1000)
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = '%s, %s' % (existing, timing) if existing else timing
+    return response
+
+
+@click.command('compile-templates')
+def compile_templates_command():
+    """编译全部模板并写入字节码缓存"""
+    from flask import current_app
+
+    env = current_app.jinja_env
+    count = 0
+    for name in env.list_templates(extensions=('html',)):
+        env.get_template(name)
+        count += 1
+    click.echo('已编译 %d 个模板' % count)
+
+
+def init_app(app):
+    cache_dir = app.config.get('JINJA_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    if app.config.get('RENDER_TIMING', True):
+        before_render_template.connect(_before_render, app)
+        template_rendered.connect(_after_render, app)
+        app.after_request(_server_timing)
+    app.cli.add_command(compile_templates_command)
@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from article_render import EXCERPT_LENGTH, make_anchor, render, safe_url
+
+
+@pytest.mark.parametrize('url', [
+    'javascript:alert(1)',
+    'JavaScript:alert(1)',
+    ' javascript:alert(1)',
+    'java\tscript:alert(1)',
+    'java\nscript:alert(1)',
+    '\x00javascript:alert(1)',
+    'vbscript:msgbox(1)',
+    'data:text/html;base64,PHNjcmlwdD4=',
+])
+def test_safe_url_rejects_unsafe_schemes(url):
+    assert safe_url(url) is None
+
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/a?b=1',
+    'http://example.com',
+    'mailto:someone@example.com',
+    '/articles/1',
+    '#section',
+    'image.png',
+])
+def test_safe_url_keeps_allowed_urls(url):
+    assert safe_url(url) == url
+
+
+@pytest.mark.parametrize('href', [
+    'javascript:alert(1)',
+    'jav&#x61;script:alert(1)',
+    '&#106;avascript:alert(1)',
+    'javascript&colon;alert(1)',
+    'java&#9;script:alert(1)',
+    'java&Tab;script:alert(1)',
+])
+def test_obfuscated_javascript_links_lose_href(href):
+    html = render('<a href="%s">link</a>' % href)['content_html']
+    assert html == '<a>link</a>'
+
+
+def test_external_links_get_rel():
+    html = render('<a href="https://example.com" target="_blank">x</a>')['content_html']
+    assert html == ('<a href="https://example.com" target="_blank" '
+                    'rel="nofollow noopener noreferrer">x</a>')
+
+
+def test_disallowed_attributes_and_tags_are_removed():
+    html = render('<p onclick="x()" class="c"><font>text</font></p>'
+                  '<img src="javascript:alert(1)"><img src="a.png" onerror="x()">')['content_html']
+    assert html == '<p class="c">text</p><img src="a.png">'
+
+
+def test_script_and_style_content_is_dropped():
+    result = render('<p>before</p><script>alert("x")</script>'
+                    '<style>p { color: red }</style><p>after</p>')
+    assert result['content_html'] == '<p>before</p><p>after</p>'
+    assert result['excerpt'] == 'before after'
+
+
+def test_nested_dropped_content():
+    html = render('<svg><svg><script>x</script></svg>inside</svg><p>ok</p>')['content_html']
+    assert html == '<p>ok</p>'
+
+
+def test_text_is_escaped():
+    html = render('<p>&lt;script&gt;alert(1)&lt;/script&gt; &amp;</p>')['content_html']
+    assert html == '<p>&lt;script&gt;alert(1)&lt;/script&gt; &amp;</p>'
+
+
+def test_unclosed_tags_are_closed():
+    html = render('<div><p><strong>bold<em>both')['content_html']
+    assert html == '<div><p><strong>bold<em>both</em></strong></p></div>'
+
+
+def test_inner_tags_closed_by_outer_end_tag():
+    html = render('<p><em>one</p><p>two</p>')['content_html']
+    assert html == '<p><em>one</em></p><p>two</p>'
+
+
+def test_stray_end_tags_are_ignored():
+    html = render('</div><p>text</span></p></p>')['content_html']
+    assert html == '<p>text</p>'
+
+
+def test_unclosed_heading_gets_anchor():
+    result = render('<h2>Title')
+    assert result['content_html'] == '<h2 id="title">Title</h2>'
+    assert json.loads(result['toc']) == [{'level': 2, 'id': 'title', 'text': 'Title'}]
+
+
+def test_heading_anchors_are_deduplicated():
+    result = render('<h2>Intro</h2><h3>Intro</h3><h2>Intro</h2><h2>中医 养生</h2>')
+    toc = json.loads(result['toc'])
+    assert [item['id'] for item in toc] == ['intro', 'intro-2', 'intro-3', '中医-养生']
+    assert [item['level'] for item in toc] == [2, 3, 2, 2]
+    assert '<h3 id="intro-2">Intro</h3>' in result['content_html']
+
+
+def test_empty_heading_has_no_anchor():
+    result = render('<h2> </h2>')
+    assert result['content_html'] == '<h2> </h2>'
+    assert json.loads(result['toc']) == []
+
+
+def test_make_anchor_falls_back_to_section():
+    used = set()
+    assert make_anchor('!!!', used) == 'section'
+    assert make_anchor('???', used) == 'section-2'
+
+
+def test_excerpt_is_plain_text_with_block_spacing():
+    result = render('<h2>标题</h2><p>第一段</p><p>second <b>para</b></p>')
+    assert result['excerpt'] == '标题 第一段 second para'
+
+
+def test_long_excerpt_is_truncated():
+    excerpt = render('<p>%s</p>' % ('字' * (EXCERPT_LENGTH + 10)))['excerpt']
+    assert excerpt == '字' * EXCERPT_LENGTH + '...'
+
+
+def test_reading_time():
+    assert render('')['reading_time'] == 1
+    assert render('<p>%s</p>' % ('字' * 1000))['reading_time'] == 3
+    assert render('<p>%s</p>' % ('word ' * 450))['reading_time'] == 3
+    assert render('<p>%s%s</p>' % ('字' * 200, ' word' * 100))['reading_time'] == 1
@@ -36,6 +36,11 @@ translations = {
         'profile_picture': '个人头像',
         'login_activity': '登录系统',
         'profile_updated': '更新了个人资料',
+        'password_updated_activity': '修改了密码',
+        'article_created_activity': '发表了文章',
+        'article_updated_activity': '编辑了文章',
+        'article_viewed_activity': '浏览了文章',
+        'chat_activity': '使用了 AI 问答',
         'profile_update_success': '个人资料已更新',
         'password_update_success': '密码已更新',
         'notifications_update_success': '通知设置已更新',
@@ -49,6 +54,7 @@ translations = {
         'total_users': '总用户数',
         'total_articles': '总文章数',
         'total_views': '总浏览量',
+        'total_comments': '评论数',
         'recent_activities': '最近活动',
         'new_user': '新建用户',
         'new_article': '新建文章',
@@ -67,6 +73,7 @@ translations = {
         'admin': '管理员',
         'user': '普通用户',
         'created_at': '创建时间',
+        'performance_metrics': '性能统计',
         'article_created': '文章创建成功',
         'article_updated': '文章更新成功'
     },
@@ -82,7 +89,7 @@ translations = {
         'account_info': 'Account Info',
         'settings': 'Settings',
         'search_results': 'Search Results',
-        'results_count': '{} results found',
+        'results_count': ('{} result found', '{} results found'),
         'no_results': 'No results found',
         'try_other_keywords': 'Try different keywords or browse our',
         'profile': 'Profile',
@@ -107,6 +114,11 @@ translations = {
         'profile_picture': 'Profile Picture',
         'login_activity': 'Logged into system',
         'profile_updated': 'Updated profile information',
+        'password_updated_activity': 'Changed password',
+        'article_created_activity': 'Published an article',
+        'article_updated_activity': 'Edited an article',
+        'article_viewed_activity': 'Viewed an article',
+        'chat_activity': 'Used AI chat',
         'profile_update_success': 'Profile updated successfully',
         'password_update_success': 'Password updated successfully',
         'notifications_update_success': 'Notification settings updated',
@@ -120,6 +132,7 @@ translations = {
         'total_users': 'Total Users',
         'total_articles': 'Total Articles',
         'total_views': 'Total Views',
+        'total_comments': 'Comments',
         'recent_activities': 'Recent Activities',
         'new_user': 'New User',
         'new_article': 'New Article',
@@ -138,6 +151,7 @@ translations = {
         'admin': 'Admin',
         'user': 'User',
         'created_at': 'Created At',
+        'performance_metrics': 'Performance Metrics',
         'article_created': 'Article created successfully',
         'article_updated': 'Article updated successfully'
     }
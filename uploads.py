@@ -0,0 +1,280 @@
+"""
+上传文件存储
+
+上传的文件按内容的 SHA-256 保存（UPLOAD_FOLDER/blobs/ab/<sha256>.<ext>），相同内容
+只存一份；upload_blob 表记录文件本身，user_upload 表记录哪个用户以什么用途引用了它，
+据此计算每个用户的空间/数量配额。不再被引用的文件由 flask gc-uploads 清理。
+
+图片上传后，后台线程池用 Pillow 生成头像等缩略图（UPLOAD_FOLDER/variants/<sha256>/）。
+没有安装 Pillow 或缩略图尚未生成时，直接返回原图。
+
+文件地址 /media/<sha256>[/<variant>] 与内容一一对应，响应带强 ETag 和一年的
+immutable 缓存，支持 If-None-Match（304）和 Range；文件经 send_file 发送，
+启用 USE_X_SENDFILE 时交给前端服务器零拷贝发送，否则使用 WSGI 服务器的
+file_wrapper（如 gunicorn 的 sendfile）。
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask import abort, send_file, url_for
+from sqlalchemy import func
+
+from extensions import db
+from models import UploadBlob, UserUpload
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# 变体名 -> 边长（像素），头像类变体裁成正方形
+VARIANTS = {
+    'icon': 64,
+    'avatar': 256,
+    'thumb': 480,
+}
+SQUARE_VARIANTS = {'icon', 'avatar'}
+
+# 文件头 -> (扩展名, MIME 类型)
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png', 'image/png'),
+    (b'\xff\xd8\xff', 'jpg', 'image/jpeg'),
+    (b'GIF87a', 'gif', 'image/gif'),
+    (b'GIF89a', 'gif', 'image/gif'),
+)
+MAX_AGE = 365 * 24 * 3600
+CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    pass
+
+
+def sniff_image(head):
+    for signature, ext, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext, content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp', 'image/webp'
+    return None
+
+
+class UploadStore:
+    def __init__(self):
+        self.root = None
+        self.max_size = 5 * 1024 * 1024
+        self.quota_bytes = 50 * 1024 * 1024
+        self.quota_files = 100
+        self.workers = 2
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.root = app.config['UPLOAD_FOLDER']
+        self.max_size = app.config.get('UPLOAD_MAX_SIZE', self.max_size)
+        self.quota_bytes = app.config.get('UPLOAD_QUOTA_BYTES', self.quota_bytes)
+        self.quota_files = app.config.get('UPLOAD_QUOTA_FILES', self.quota_files)
+        self.workers = app.config.get('UPLOAD_THUMBNAIL_WORKERS', self.workers)
+        for name in ('blobs', 'variants', 'tmp'):
+            os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        app.jinja_env.globals.update(avatar_url=avatar_url)
+        app.cli.add_command(gc_uploads_command)
+
+    # 路径
+    def blob_path(self, blob):
+        return os.path.join(self.root, 'blobs', blob.sha256[:2], '%s.%s' % (blob.sha256, blob.ext))
+
+    def variant_path(self, blob, variant):
+        ext = 'png' if blob.ext == 'gif' else blob.ext
+        return os.path.join(self.root, 'variants', blob.sha256, '%s.%s' % (variant, ext))
+
+    # 保存
+    def save(self, user_id, file, purpose, images_only=True):
+        """保存上传的文件并登记引用，返回 UploadBlob；同一用途的旧引用被替换。调用方负责提交事务"""
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, 'tmp'))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = file.stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise UploadError('文件不能超过 %.1f MB' % (self.max_size / (1024 * 1024)))
+                    if len(head) < 16:
+                        head += chunk[:16]
+                    digest.update(chunk)
+                    out.write(chunk)
+            if size == 0:
+                raise UploadError('文件为空')
+
+            kind = sniff_image(head)
+            if kind is None:
+                if images_only:
+                    raise UploadError('只支持 PNG、JPEG、GIF、WebP 图片')
+                ext = os.path.splitext(file.filename or '')[1].lstrip('.').lower()[:10] or 'bin'
+                kind = (ext, file.mimetype or 'application/octet-stream')
+
+            sha256 = digest.hexdigest()
+            blob = db.session.get(UploadBlob, sha256)
+            self._check_quota(user_id, purpose, 0 if blob is not None else size)
+            if blob is None:
+                blob = UploadBlob(sha256=sha256, size=size, ext=kind[0], content_type=kind[1])
+                db.session.add(blob)
+            path = self.blob_path(blob)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                tmp_path = None
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        UserUpload.query.filter_by(user_id=user_id, purpose=purpose).delete()
+        db.session.add(UserUpload(user_id=user_id, sha256=blob.sha256, purpose=purpose))
+        if blob.content_type.startswith('image/'):
+            self.schedule_variants(blob)
+        return blob
+
+    def _check_quota(self, user_id, purpose, new_bytes):
+        count, used = db.session.query(func.count(UserUpload.id), func.coalesce(func.sum(UploadBlob.size), 0))\
+            .join(UploadBlob, UploadBlob.sha256 == UserUpload.sha256)\
+            .filter(UserUpload.user_id == user_id, UserUpload.purpose != purpose).one()
+        if count + 1 > self.quota_files:
+            raise UploadError('上传文件数量已达上限')
+        if used + new_bytes > self.quota_bytes:
+            raise UploadError('上传空间已用完')
+
+    # 缩略图
+    def schedule_variants(self, blob):
+        if Image is None:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='thumbnail')
+        self._executor.submit(self._make_variants, self.blob_path(blob),
+                              {name: self.variant_path(blob, name) for name in VARIANTS})
+
+    def _make_variants(self, source, targets):
+        try:
+            with Image.open(source) as image:
+                image = ImageOps.exif_transpose(image)
+                if image.mode not in ('RGB', 'RGBA', 'L'):
+                    image = image.convert('RGBA')
+                for name, target in targets.items():
+                    if os.path.exists(target):
+                        continue
+                    size = VARIANTS[name]
+                    if name in SQUARE_VARIANTS:
+                        resized = ImageOps.fit(image, (size, size), Image.LANCZOS)
+                    else:
+                        resized = image.copy()
+                        resized.thumbnail((size, size), Image.LANCZOS)
+                    if target.endswith('.jpg') and resized.mode == 'RGBA':
+                        resized = resized.convert('RGB')
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    tmp = target + '.tmp'
+                    resized.save(tmp, format=_pil_format(target), quality=85, optimize=True)
+                    os.replace(tmp, target)
+        except Exception:
+            logger.exception('生成缩略图失败: %s', source)
+
+    # 发送
+    def send(self, sha256, variant=None):
+        blob = db.session.get(UploadBlob, sha256)
+        if blob is None:
+            abort(404)
+        if variant is not None and variant not in VARIANTS:
+            abort(404)
+
+        path = self.variant_path(blob, variant) if variant else self.blob_path(blob)
+        etag = '%s-%s' % (sha256, variant or 'orig')
+        immutable = True
+        if variant and not os.path.exists(path):
+            # 缩略图还没生成（或没有 Pillow），先返回原图，不长期缓存
+            path, etag, immutable = self.blob_path(blob), '%s-orig' % sha256, False
+        if not os.path.exists(path):
+            abort(404)
+
+        mimetype = blob.content_type if path == self.blob_path(blob) else _variant_mimetype(path)
+        response = send_file(path, mimetype=mimetype, etag=etag, conditional=True,
+                             max_age=MAX_AGE if immutable else 0)
+        if immutable:
+            response.headers['Cache-Control'] = 'public, max-age=%d, immutable' % MAX_AGE
+        return response
+
+    # 垃圾回收
+    def collect_garbage(self, grace=timedelta(hours=1)):
+        """删除没有任何引用、且创建时间早于 grace 之前的文件，返回删除的文件数"""
+        cutoff = datetime.utcnow() - grace
+        orphans = UploadBlob.query\
+            .filter(UploadBlob.created_at < cutoff,
+                    ~UploadBlob.sha256.in_(db.session.query(UserUpload.sha256)))\
+            .all()
+        for blob in orphans:
+            paths = [self.blob_path(blob)] + [self.variant_path(blob, name) for name in VARIANTS]
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            variant_dir = os.path.join(self.root, 'variants', blob.sha256)
+            if os.path.isdir(variant_dir) and not os.listdir(variant_dir):
+                os.rmdir(variant_dir)
+            db.session.delete(blob)
+        db.session.commit()
+
+        # 中断的上传留下的临时文件
+        tmp_dir = os.path.join(self.root, 'tmp')
+        for name in os.listdir(tmp_dir):
+            path = os.path.join(tmp_dir, name)
+            if os.path.getmtime(path) < time.time() - grace.total_seconds():
+                os.remove(path)
+        return len(orphans)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def _pil_format(path):
+    return {'jpg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP'}[path.rsplit('.', 1)[1]]
+
+
+def _variant_mimetype(path):
+    return {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp'}[path.rsplit('.', 1)[1]]
+
+
+store = UploadStore()
+
+
+def avatar_url(user, variant='avatar'):
+    """用户头像地址：内容寻址的头像返回对应尺寸的缩略图，旧数据中的地址原样返回"""
+    avatar = getattr(user, 'avatar', None)
+    if not avatar:
+        return url_for('static', filename='images/default-avatar.png')
+    if len(avatar) == 64 and '/' not in avatar:
+        return url_for('upload_file', sha256=avatar, variant=variant)
+    return avatar
+
+
+@click.command('gc-uploads')
+@click.option('--grace', default=3600, help='只清理创建超过这么多秒的文件')
+def gc_uploads_command(grace):
+    """清理不再被引用的上传文件和缩略图"""
+    count = store.collect_garbage(timedelta(seconds=grace))
+    click.echo('已清理 %d 个文件' % count)
@@ -0,0 +1,113 @@
+"""
+登录用户缓存
+
+Flask-Login 每个请求都要根据会话里的用户 id 取出当前用户，模板里的权限判断
+（can_post 等）还要再查一次用户组。这里把用户和所属用户组用一条 JOIN 查询取出，
+各列的值以快照形式缓存在进程内（LRU + TTL）；命中时直接由快照重建对象并并入
+当前会话，不访问数据库，之后对 current_user 的修改照常提交。
+
+用户或用户组提交修改后，会话事件使对应的缓存失效（用户组变化时清空全部）。
+每次失效都会增加版本号，失效前就开始的加载不会把旧数据写回缓存。其他进程中的
+副本依靠 TTL 过期。
+"""
+
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+import page_cache
+from extensions import db
+from page_cache import LRUCache
+
+cache = LRUCache(maxsize=2048, ttl=60)
+
+_version = 0
+_version_lock = threading.Lock()
+
+
+def _snapshot(obj):
+    return {prop.key: getattr(obj, prop.key) for prop in obj.__mapper__.column_attrs}
+
+
+def _restore(model, values):
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def load_user(user_id):
+    from models import User, UserGroup
+
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    entry = cache.get(user_id)
+    if entry is None:
+        version = _version
+        user = db.session.get(User, user_id, options=[joinedload(User.group)])
+        if user is None:
+            return None
+        entry = (_snapshot(user), _snapshot(user.group) if user.group else None)
+        with _version_lock:
+            if version == _version:
+                cache.set(user_id, entry)
+        return user
+
+    user_values, group_values = entry
+    user = _restore(User, user_values)
+    set_committed_value(user, 'group', _restore(UserGroup, group_values) if group_values else None)
+    return db.session.merge(user, load=False)
+
+
+def invalidate(user_id=None):
+    """使某个用户的缓存失效；不传 user_id 时清空全部"""
+    global _version
+    with _version_lock:
+        _version += 1
+        if user_id is None:
+            cache.clear()
+        else:
+            cache.delete(user_id)
+
+
+def stats():
+    return dict(cache.stats(), version=_version)
+
+
+def _after_flush(session, flush_context):
+    from models import User, UserGroup
+
+    changed = session.info.setdefault('user_cache_changes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, UserGroup):
+            changed.add(None)
+        elif isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+def _after_commit(session):
+    changed = session.info.pop('user_cache_changes', None)
+    if not changed:
+        return
+    if None in changed:
+        invalidate()
+    for user_id in changed - {None}:
+        invalidate(user_id)
+        # 导航栏等按用户缓存的页面也随之失效
+        page_cache.cache.invalidate('user:%s' % user_id)
+
+
+def _after_rollback(session):
+    session.info.pop('user_cache_changes', None)
+
+
+def init_app(app):
+    cache.maxsize = app.config.get('USER_CACHE_SIZE', cache.maxsize)
+    cache.ttl = app.config.get('USER_CACHE_TTL', cache.ttl)
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'after_commit', _after_commit)
+    event.listen(Session, 'after_rollback', _after_rollback)
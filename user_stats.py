@@ -0,0 +1,134 @@
+"""
+用户统计汇总
+
+个人中心展示的文章数、总浏览量和评论数保存在 user_stats 表中（每个用户一行），
+不在每次访问时对 Article、Comment 做聚合。会话事件在文章、评论新增或删除时
+按增量更新对应作者的计数；浏览量由 view_counter 批量写入时一并累加。
+
+计数只做增量维护，直接改库或更换文章作者等情况可能造成偏差，运行
+flask rebuild-user-stats 按实际数据重新统计。
+"""
+
+from collections import Counter
+
+import click
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Article, Comment, UserStats
+
+FIELDS = ('article_count', 'total_views', 'comment_count')
+
+_UPSERT = text(
+    'INSERT INTO user_stats (user_id, article_count, total_views, comment_count) '
+    'VALUES (:user_id, :article_count, :total_views, :comment_count) '
+    'ON CONFLICT (user_id) DO UPDATE SET '
+    'article_count = user_stats.article_count + excluded.article_count, '
+    'total_views = user_stats.total_views + excluded.total_views, '
+    'comment_count = user_stats.comment_count + excluded.comment_count')
+
+# 按文章 id 找到作者并累加浏览量，供 view_counter 在同一事务中调用
+_ADD_VIEWS = text(
+    'INSERT INTO user_stats (user_id, article_count, total_views, comment_count) '
+    'SELECT author_id, 0, :n, 0 FROM article WHERE id = :id '
+    'ON CONFLICT (user_id) DO UPDATE SET total_views = user_stats.total_views + excluded.total_views')
+
+
+def get_stats(user_id):
+    """返回用户的统计行；还没有记录时返回全为 0 的未保存对象"""
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        stats = UserStats(user_id=user_id, article_count=0, total_views=0, comment_count=0)
+    return stats
+
+
+def add_views(conn, views):
+    """views 为 {文章 id: 新增浏览量}，在调用方的连接（事务）中执行"""
+    if views:
+        conn.execute(_ADD_VIEWS, [{'id': article_id, 'n': n} for article_id, n in views.items()])
+
+
+def _author_id(obj):
+    if obj.author_id is not None:
+        return obj.author_id
+    author = obj.author
+    return author.id if author is not None else None
+
+
+def _before_flush(session, flush_context, instances):
+    pending = session.info.setdefault('user_stats_pending', [])
+    deltas = session.info.setdefault('user_stats_deltas', {})
+    for obj in session.new:
+        if isinstance(obj, (Article, Comment)):
+            pending.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Article):
+            delta = deltas.setdefault(obj.author_id, Counter())
+            delta['article_count'] -= 1
+            delta['total_views'] -= obj.views or 0
+        elif isinstance(obj, Comment):
+            deltas.setdefault(obj.author_id, Counter())['comment_count'] -= 1
+
+
+def _after_flush_postexec(session, flush_context):
+    pending = session.info.pop('user_stats_pending', None) or []
+    deltas = session.info.pop('user_stats_deltas', None) or {}
+    # 新对象的作者 id 要到 flush 之后才确定
+    for obj in pending:
+        delta = deltas.setdefault(_author_id(obj), Counter())
+        if isinstance(obj, Article):
+            delta['article_count'] += 1
+            delta['total_views'] += obj.views or 0
+        else:
+            delta['comment_count'] += 1
+    params = [dict({field: delta[field] for field in FIELDS}, user_id=user_id)
+              for user_id, delta in deltas.items() if user_id is not None and any(delta.values())]
+    if params:
+        session.connection().execute(_UPSERT, params)
+        for stats in session.identity_map.values():
+            if isinstance(stats, UserStats):
+                session.expire(stats, list(FIELDS))
+
+
+def _after_rollback(session):
+    session.info.pop('user_stats_pending', None)
+    session.info.pop('user_stats_deltas', None)
+
+
+def rebuild_user_stats():
+    """按 Article、Comment 的实际数据重新计算全部用户的统计"""
+    articles = select(Article.author_id.label('user_id'),
+                      func.count().label('article_count'),
+                      func.coalesce(func.sum(Article.views), 0).label('total_views'))\
+        .group_by(Article.author_id)
+    comments = select(Comment.author_id.label('user_id'), func.count().label('comment_count'))\
+        .group_by(Comment.author_id)
+
+    totals = {}
+    for row in db.session.execute(articles):
+        totals[row.user_id] = {'user_id': row.user_id, 'article_count': row.article_count,
+                               'total_views': row.total_views, 'comment_count': 0}
+    for row in db.session.execute(comments):
+        totals.setdefault(row.user_id, {'user_id': row.user_id, 'article_count': 0,
+                                        'total_views': 0})['comment_count'] = row.comment_count
+
+    UserStats.query.delete()
+    if totals:
+        db.session.execute(UserStats.__table__.insert(), list(totals.values()))
+    db.session.commit()
+    return len(totals)
+
+
+@click.command('rebuild-user-stats')
+def rebuild_user_stats_command():
+    """重新统计用户的文章数、浏览量和评论数"""
+    count = rebuild_user_stats()
+    click.echo('已重新统计 %d 个用户' % count)
+
+
+def init_app(app):
+    event.listen(Session, 'before_flush', _before_flush)
+    event.listen(Session, 'after_flush_postexec', _after_flush_postexec)
+    event.listen(Session, 'after_rollback', _after_rollback)
+    app.cli.add_command(rebuild_user_stats_command)
@@ -0,0 +1,108 @@
+"""
+文章浏览量的延迟写入
+
+浏览文章时只在内存里累加增量，由后台线程按时间间隔或累计数量阈值批量执行
+UPDATE article SET views = views + n，避免每次浏览都占用 SQLite 的写锁；
+同一事务中还会累加作者的总浏览量（见 user_stats.py）。进程退出时（atexit）会把剩余增量写回数据库。
+"""
+
+import atexit
+import threading
+from collections import Counter
+
+from sqlalchemy import text
+
+import user_stats
+from extensions import db
+
+
+class ViewCounter:
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 5.0
+        self.threshold = 500
+        self._pending = Counter()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopped = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_FLUSH_INTERVAL', self.interval)
+        self.threshold = app.config.get('VIEW_FLUSH_THRESHOLD', self.threshold)
+        atexit.register(self.shutdown)
+
+    def increment(self, article_id, n=1):
+        with self._lock:
+            self._pending[article_id] += n
+            self._total += n
+            total = self._total
+        self._ensure_thread()
+        if total >= self.threshold:
+            self._wakeup.set()
+
+    def pending(self, article_id):
+        with self._lock:
+            return self._pending.get(article_id, 0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending_articles': len(self._pending),
+                'pending_views': self._total,
+            }
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, Counter()
+            total, self._total = self._total, 0
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(
+                        text('UPDATE article SET views = coalesce(views, 0) + :n WHERE id = :id'),
+                        [{'id': article_id, 'n': n} for article_id, n in batch.items()])
+                    user_stats.add_views(conn, batch)
+        except Exception:
+            # 写入失败时把增量放回去，下次再试
+            with self._lock:
+                self._pending.update(batch)
+                self._total += total
+            raise
+        return len(batch)
+
+    def shutdown(self):
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopped:
+                break
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('浏览量写入失败')
+
+
+view_counter = ViewCounter()